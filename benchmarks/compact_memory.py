@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: default vs compact AirodumpParser DataFrames
+
+Usage: python benchmarks/compact_memory.py [--stations N] [--aps N]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from scanet.parser import AirodumpParser  # noqa: E402
+
+
+def _mac(rng: random.Random) -> str:
+    return ':'.join(f'{rng.randrange(256):02X}' for _ in range(6))
+
+
+def write_capture(path: Path, aps: int, stations: int, seed: int = 0):
+    """Write a synthetic airodump-ng CSV capture"""
+    rng = random.Random(seed)
+    bssids = [_mac(rng) for _ in range(aps)]
+    encryptions = [('WPA2', 'CCMP', 'PSK'), ('WPA', 'TKIP', 'PSK'), ('OPN', '', ''), ('WEP', 'WEP', '')]
+    
+    with open(path, 'w') as f:
+        f.write('\nBSSID, PWR, Beacons, #Data, #/s, CH, MB, ENC, CIPHER, AUTH, ESSID\n')
+        for bssid in bssids:
+            enc, cipher, auth = rng.choice(encryptions)
+            f.write(f'{bssid}, {rng.randint(-95, -20)}, {rng.randint(0, 5000)}, {rng.randint(0, 900)}, '
+                    f'{rng.randint(0, 5)}, {rng.choice([1, 6, 11, 36, 149])}, {rng.choice([54, 130, 360])}, '
+                    f'{enc}, {cipher}, {auth}, Net{rng.randrange(aps)}\n')
+        
+        f.write('\nStation MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs\n')
+        for _ in range(stations):
+            bssid = rng.choice(bssids + ['(not associated)'])
+            f.write(f'{_mac(rng)}, 2025-07-18 10:00:05, 2025-07-18 10:05:15, {rng.randint(-95, -20)}, '
+                    f'{rng.randint(0, 999)}, {bssid}, Net{rng.randrange(50)}\n')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--aps', type=int, default=20000)
+    arg_parser.add_argument('--stations', type=int, default=500000)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = Path(tmp) / 'capture-01.csv'
+        write_capture(csv_file, args.aps, args.stations)
+        
+        print(f"{'table':<10}{'default MB':>14}{'compact MB':>14}{'saving':>10}")
+        default = AirodumpParser().parse(csv_file)
+        compact = AirodumpParser(compact=True).parse(csv_file)
+        
+        for name, plain_df, compact_df in zip(('ap', 'station'), default, compact):
+            plain_bytes = plain_df.memory_usage(deep=True).sum()
+            compact_bytes = compact_df.memory_usage(deep=True).sum()
+            saving = 1 - compact_bytes / plain_bytes
+            print(f"{name:<10}{plain_bytes / 2**20:>14.1f}{compact_bytes / 2**20:>14.1f}{saving:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark: import time of scanet.cli against a budget
+
+Exits with status 1 when the import takes longer than the budget or pulls in
+a heavy dependency, so CI can enforce fast startup.
+
+Usage: python benchmarks/import_time.py [--budget-ms MS] [--repeat N]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+
+# Dependencies only the commands that need them may import
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'networkx', 'jinja2', 'pdfkit', 'requests', 'colorama')
+
+# What runs for `scanet --help`: loading the CLI and nothing else
+STARTUP = "import sys; sys.path.insert(0, {src!r}); from scanet.cli import cli; cli.main(['--help'])"
+
+
+def import_times() -> dict:
+    """Return the cumulative import time in microseconds of every module ``scanet --help`` loads"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP.format(src=str(SRC))],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"scanet failed to start:\n{result.stderr}")
+    
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def wall_time(repeat: int) -> float:
+    """Return the fastest of ``repeat`` ``scanet --help`` runs in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', STARTUP.format(src=str(SRC))], capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--budget-ms', type=float, default=250.0,
+                            help='Largest allowed import time of scanet.cli')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+    
+    # The fastest run is the least disturbed by the rest of the machine
+    runs = [import_times() for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times['scanet.cli'])
+    import_ms = best['scanet.cli'] / 1000
+    
+    print(f"{'scanet.cli import':<24}{import_ms:>10.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"{'scanet --help':<24}{wall_time(args.repeat):>10.1f} ms  (including interpreter startup)")
+    
+    print("\nslowest scanet modules:")
+    scanet_modules = sorted((name for name in best if name.startswith('scanet')), key=best.get, reverse=True)
+    for name in scanet_modules[:5]:
+        print(f"  {name:<22}{best[name] / 1000:>10.1f} ms")
+    
+    failed = False
+    heavy = [name for name in HEAVY_MODULES if name in best]
+    if heavy:
+        print(f"\nFAIL: startup imports {', '.join(heavy)}")
+        failed = True
+    if import_ms > args.budget_ms:
+        print(f"\nFAIL: scanet.cli import takes {import_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Station statistics benchmark: text probes table vs interned sta_probe table
+
+Usage: python benchmarks/stats_queries.py [--stations N] [--networks N] [--repeat N]
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from scanet.database import WiFiDatabase  # noqa: E402
+
+
+# The station statistics queries as they ran against the text probes table
+LEGACY_QUERIES = {
+    'multi_probe_stations': '''
+        SELECT sta.station, COUNT(probes.probe) as probe_count
+        FROM sta
+        LEFT JOIN probes ON sta.id = probes.station_id
+        GROUP BY sta.station
+        HAVING probe_count > 1
+        ORDER BY probe_count DESC
+        LIMIT 10
+    ''',
+    'most_probed_networks': '''
+        SELECT probe, COUNT(*) as count
+        FROM probes
+        GROUP BY probe
+        ORDER BY count DESC
+        LIMIT 10
+    ''',
+}
+
+# The same statistics computed from sta_probe through its covering indexes
+INTERNED_QUERIES = {
+    'multi_probe_stations': '''
+        SELECT sta.station, counts.probe_count
+        FROM (SELECT station_id, COUNT(*) AS probe_count
+              FROM sta_probe GROUP BY station_id HAVING probe_count > 1) counts
+        JOIN sta ON sta.id = counts.station_id
+        ORDER BY counts.probe_count DESC
+        LIMIT 10
+    ''',
+    'most_probed_networks': '''
+        SELECT essid.essid, counts.count
+        FROM (SELECT essid_id, COUNT(*) AS count FROM sta_probe GROUP BY essid_id) counts
+        JOIN essid ON essid.id = counts.essid_id
+        ORDER BY counts.count DESC
+        LIMIT 10
+    ''',
+}
+
+
+def _mac(rng: random.Random) -> str:
+    return ':'.join(f'{rng.randrange(256):02X}' for _ in range(6))
+
+
+def synthetic_stations(stations: int, networks: int, seed: int = 0) -> pd.DataFrame:
+    """Build a parsed station DataFrame probing up to five of ``networks`` ESSIDs each"""
+    rng = random.Random(seed)
+    names = [f'Network {index:05d} guest' for index in range(networks)]
+    
+    return pd.DataFrame({
+        'Station_MAC': [_mac(rng) for _ in range(stations)],
+        'First_time_seen': '2025-07-18 10:00:05',
+        'Last_time_seen': '2025-07-18 10:05:15',
+        'Power': [rng.randint(-95, -20) for _ in range(stations)],
+        'packets': [rng.randint(0, 999) for _ in range(stations)],
+        'BSSID': '(not associated)',
+        'Probed_ESSIDs': [','.join(rng.sample(names, rng.randint(0, 5))) for _ in range(stations)],
+    })
+
+
+def build_legacy(path: Path, interned_path: Path):
+    """Copy stations and probes into the old layout with text probes"""
+    conn = sqlite3.connect(path)
+    conn.executescript(f'''
+        CREATE TABLE sta (id INTEGER PRIMARY KEY AUTOINCREMENT, station TEXT NOT NULL);
+        CREATE TABLE probes (id INTEGER PRIMARY KEY AUTOINCREMENT, station_id INTEGER, probe TEXT);
+        ATTACH DATABASE '{interned_path}' AS interned;
+        INSERT INTO sta (id, station) SELECT id, station FROM interned.sta;
+        INSERT INTO probes (id, station_id, probe) SELECT id, station_id, probe FROM interned.probes;
+        CREATE INDEX idx_sta_station ON sta(station);
+        CREATE INDEX idx_probes_station ON probes(station_id);
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def table_bytes(conn: sqlite3.Connection, names) -> int:
+    """Return the bytes used by tables and indexes, 0 without the dbstat table"""
+    try:
+        placeholders = ', '.join('?' * len(names))
+        return conn.execute(
+            f'SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ({placeholders})', list(names)
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def best_time(function, repeat: int) -> float:
+    """Return the fastest of ``repeat`` runs in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--stations', type=int, default=200000)
+    arg_parser.add_argument('--networks', type=int, default=5000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        interned_path = Path(tmp) / 'interned.db'
+        legacy_path = Path(tmp) / 'legacy.db'
+        
+        db = WiFiDatabase(str(interned_path))
+        db.create_tables()
+        db.insert_stations(synthetic_stations(args.stations, args.networks))
+        build_legacy(legacy_path, interned_path)
+        
+        legacy = sqlite3.connect(legacy_path)
+        interned = db.connect()
+        probe_count = legacy.execute('SELECT COUNT(*) FROM probes').fetchone()[0]
+        print(f"{args.stations} stations, {probe_count} probes of {args.networks} networks\n")
+        
+        print(f"{'query':<24}{'text ms':>12}{'interned ms':>14}")
+        for name in LEGACY_QUERIES:
+            before = best_time(lambda: legacy.execute(LEGACY_QUERIES[name]).fetchall(), args.repeat)
+            after = best_time(lambda: interned.execute(INTERNED_QUERIES[name]).fetchall(), args.repeat)
+            print(f"{name:<24}{before:>12.1f}{after:>14.1f}")
+        
+        # What get_station_stats() actually runs: both statistics from the summary tables
+        summary = best_time(lambda: db._query_station_stats(interned), args.repeat)
+        print(f"{'summary tables (both)':<24}{'':>12}{summary:>14.2f}")
+        
+        legacy_bytes = table_bytes(legacy, ['probes', 'idx_probes_station'])
+        interned_bytes = table_bytes(interned, ['sta_probe', 'idx_sta_probe_station', 'idx_sta_probe_essid', 'essid'])
+        if legacy_bytes and interned_bytes:
+            print(f"\nprobe storage: text {legacy_bytes / 2**20:.1f} MB, "
+                  f"interned with covering indexes {interned_bytes / 2**20:.1f} MB")
+        
+        legacy.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
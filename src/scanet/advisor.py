@@ -0,0 +1,158 @@
+"""
+Query plan analysis and index suggestions for ad-hoc SQL
+"""
+
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+from .database import WiFiDatabase
+from .schema import INDEXES, index_sql
+
+
+# Tables that grow with the captures, so full scans of them are reported
+LARGE_TABLES = ('ap', 'sta', 'sta_probe')
+
+# Table references in FROM and JOIN clauses, with their optional alias
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+
+# Words that can follow a table reference in place of an alias
+_NOT_ALIAS = {
+    'where', 'on', 'using', 'join', 'inner', 'left', 'right', 'full', 'cross', 'natural',
+    'outer', 'group', 'order', 'limit', 'having', 'union', 'except', 'intersect', 'window',
+    'indexed', 'not',
+}
+
+
+def _aliases(query: str) -> Dict[str, str]:
+    """Map the names tables go by in a query (aliases and plain names) to the table"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(query):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+class QueryAdvisor:
+    """Explain ad-hoc queries and suggest indexes that avoid full table scans
+    
+    Suggestions are tried on an empty in-memory copy of the schema, so they
+    are checked against SQLite's own planner without building any index on
+    the real data.
+    """
+    
+    def __init__(self, db: WiFiDatabase):
+        self.db = db
+    
+    def explain(self, query: str) -> List[Dict[str, Any]]:
+        """Return the EXPLAIN QUERY PLAN steps of a query with their nesting depth"""
+        return self._plan(self.db.connect(), query)
+    
+    def full_scans(self, query: str, plan: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Return the plan steps that scan all of ap, sta or sta_probe
+        
+        Scans of a covering index still read every row and are included, with
+        the index name.
+        """
+        if plan is None:
+            plan = self.explain(query)
+        aliases = _aliases(query)
+        
+        scans = []
+        for step in plan:
+            match = re.match(r'SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?', step['detail'])
+            if not match:
+                continue
+            name = match.group(1)
+            table = aliases.get(name.lower(), name.lower())
+            if table in LARGE_TABLES:
+                scans.append({'table': table, 'alias': name, 'index': match.group(2),
+                              'detail': step['detail']})
+        return scans
+    
+    def suggest_indexes(self, query: str) -> List[Dict[str, Any]]:
+        """Suggest indexes that turn full scans in a query's plan into index searches
+        
+        Indexes from the schema that the database lacks are tried first, then
+        single-column indexes on the columns the query mentions.
+        """
+        copy = self._schema_copy()
+        try:
+            plan = self._plan(copy, query)
+            suggestions = []
+            
+            for scan in self.full_scans(query, plan):
+                for name, columns, unique in self._candidates(copy, scan['table'], query):
+                    copy.execute(index_sql(name, scan['table'], columns, unique))
+                    if self._searches(self._plan(copy, query), scan['alias'], name):
+                        # Keep it, so later scans are judged with it in place
+                        suggestions.append({'name': name, 'table': scan['table'], 'columns': columns,
+                                            'sql': index_sql(name, scan['table'], columns, unique)})
+                        break
+                    copy.execute(f'DROP INDEX {name}')
+            
+            return suggestions
+        finally:
+            copy.close()
+    
+    def time_query(self, query: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run a query to completion, returning its row count and elapsed seconds"""
+        start = time.perf_counter()
+        _, rows = self.db.stream_query(query, timeout=timeout)
+        count = sum(1 for _ in rows)
+        return {'rows': count, 'seconds': time.perf_counter() - start}
+    
+    def create_indexes(self, suggestions: List[Dict[str, Any]]):
+        """Create suggested indexes in the database"""
+        with self.db.connect() as conn:
+            for suggestion in suggestions:
+                conn.execute(suggestion['sql'])
+    
+    def _plan(self, conn: sqlite3.Connection, query: str) -> List[Dict[str, Any]]:
+        """Run EXPLAIN QUERY PLAN on a connection"""
+        depths = {0: -1}
+        plan = []
+        for step_id, parent, _, detail in conn.execute(f'EXPLAIN QUERY PLAN {query}'):
+            depths[step_id] = depths.get(parent, -1) + 1
+            plan.append({'id': step_id, 'parent': parent, 'depth': depths[step_id], 'detail': detail})
+        return plan
+    
+    def _schema_copy(self) -> sqlite3.Connection:
+        """Create an empty in-memory database with the tables, views and indexes of this one"""
+        copy = sqlite3.connect(':memory:')
+        rows = self.db.connect().execute(
+            "SELECT sql FROM sqlite_master WHERE type IN ('table', 'view', 'index') "
+            "AND sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+        ).fetchall()
+        for (sql,) in rows:
+            try:
+                copy.execute(sql)
+            except sqlite3.OperationalError:
+                # Shadow tables of virtual tables already exist in the copy
+                pass
+        return copy
+    
+    def _candidates(self, copy: sqlite3.Connection, table: str, query: str) -> List[tuple]:
+        """Return the (name, columns, unique) indexes worth trying for a scanned table"""
+        existing = {row[0] for row in copy.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        leading = set()
+        for (index,) in copy.execute('SELECT name FROM pragma_index_list(?)', (table,)):
+            first = copy.execute('SELECT name FROM pragma_index_info(?) WHERE seqno = 0', (index,)).fetchone()
+            if first and first[0]:
+                leading.add(first[0].lower())
+        
+        candidates = [(name, columns, unique) for name, index_table, columns, unique in INDEXES
+                      if index_table == table and name not in existing]
+        leading.update(columns.split(',')[0].strip().lower() for _, columns, _ in candidates)
+        
+        words = {word.lower() for word in re.findall(r'\w+', query)}
+        for (column,) in copy.execute('SELECT name FROM pragma_table_info(?)', (table,)):
+            if column.lower() in words and column.lower() not in leading:
+                candidates.append((f'idx_{table}_{column.lower()}', column, False))
+        return candidates
+    
+    def _searches(self, plan: List[Dict[str, Any]], alias: str, index: str) -> bool:
+        """Check whether a plan searches a table through an index instead of scanning it"""
+        pattern = rf'SEARCH {re.escape(alias)} USING (?:COVERING )?INDEX {re.escape(index)}\b'
+        return any(re.match(pattern, step['detail']) for step in plan)
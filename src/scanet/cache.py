@@ -0,0 +1,282 @@
+"""
+On-disk caches of parsed airodump-ng captures and rendered charts
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .parser import AirodumpParser
+
+
+# Bump when the on-disk layout or the parser output changes
+CACHE_FORMAT_VERSION = 2
+
+
+def default_cache_dir() -> Path:
+    """Return the per-user scanet cache directory"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'scanet'
+
+
+def content_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the BLAKE2b hex digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_strings(path: Path, strings: List[str]):
+    """Save strings exactly, as their UTF-8 text and the character offset each one ends at
+    
+    Fixed-width NumPy unicode arrays would drop trailing NULs, which airodump-ng
+    writes for hidden ESSIDs.
+    """
+    ends = np.cumsum([len(string) for string in strings], dtype=np.int64)
+    text = ''.join(strings).encode('utf-8', errors='surrogatepass')
+    np.save(path.with_name(path.name + '.utf8.npy'), np.frombuffer(text, dtype=np.uint8))
+    np.save(path.with_name(path.name + '.ends.npy'), ends)
+
+
+def _load_strings(path: Path) -> np.ndarray:
+    """Load strings saved by ``_save_strings`` as an object array"""
+    text = np.load(path.with_name(path.name + '.utf8.npy')).tobytes().decode('utf-8', errors='surrogatepass')
+    ends = np.load(path.with_name(path.name + '.ends.npy')).tolist()
+    
+    strings = np.empty(len(ends), dtype=object)
+    strings[:] = [text[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    return strings
+
+
+def _directory_size(path: Path) -> int:
+    return sum(entry.stat().st_size for entry in path.rglob('*') if entry.is_file())
+
+
+class ParseCache:
+    """Cache AirodumpParser batches as memory-mapped .npy columns
+    
+    Entries are keyed by the capture's size, mtime and content hash plus the
+    parser options, and the least recently used ones are evicted once the cache
+    grows past ``max_bytes``.
+    """
+    
+    DEFAULT_MAX_BYTES = 1 << 30
+    
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir() / 'parse'
+        self.max_bytes = max_bytes
+    
+    def key(self, csv_file: Path, parser: AirodumpParser, digest: Optional[str] = None) -> str:
+        """Return the cache key of a capture parsed with the given parser
+        
+        ``digest`` is the file's content_hash() when the caller already has it.
+        """
+        stat = os.stat(csv_file)
+        parts = [
+            CACHE_FORMAT_VERSION, stat.st_size, stat.st_mtime_ns,
+            digest or content_hash(csv_file), parser.compact,
+        ]
+        return hashlib.blake2b(json.dumps(parts).encode('utf-8'), digest_size=16).hexdigest()
+    
+    def iter_batches(self, parser: AirodumpParser, csv_file: Path,
+                     batch_size: Optional[int] = AirodumpParser.DEFAULT_BATCH_SIZE,
+                     digest: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield the parser's batches, from the cache when the capture is unchanged
+        
+        On a miss the batches are written to the cache while they are yielded.
+        Cached batches keep the size they were written with.
+        """
+        entry = self.cache_dir / self.key(csv_file, parser, digest)
+        meta_file = entry / 'meta.json'
+        
+        if meta_file.exists():
+            # Mark the entry as recently used
+            os.utime(meta_file)
+            yield from self._load(entry)
+            return
+        
+        yield from self._store(entry, parser.iter_batches(csv_file, batch_size=batch_size))
+        self.evict()
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        if not self.cache_dir.exists():
+            return
+        
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            meta_file = entry / 'meta.json'
+            if meta_file.exists():
+                entries.append((meta_file.stat().st_mtime, _directory_size(entry), entry))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+    
+    def clear(self):
+        """Remove every cache entry"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def _store(self, entry: Path, batches: Iterator[Tuple[str, pd.DataFrame]]) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Write batches to a temporary entry, publishing it once all are written"""
+        tmp_entry = entry.with_name(f".tmp-{entry.name}-{os.getpid()}")
+        tmp_entry.mkdir(parents=True, exist_ok=True)
+        chunks = []
+        
+        try:
+            for section, batch in batches:
+                chunk_dir = tmp_entry / f"{len(chunks):05d}"
+                chunk_dir.mkdir()
+                chunks.append({
+                    'section': section,
+                    'dir': chunk_dir.name,
+                    'columns': [self._save_column(chunk_dir, index, batch[col])
+                                for index, col in enumerate(batch.columns)],
+                })
+                yield section, batch
+            
+            with open(tmp_entry / 'meta.json', 'w') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'chunks': chunks}, f)
+            
+            try:
+                os.replace(tmp_entry, entry)
+            except OSError:
+                # Another process published the same entry first
+                pass
+        finally:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+    
+    def _load(self, entry: Path) -> Iterator[Tuple[str, pd.DataFrame]]:
+        with open(entry / 'meta.json') as f:
+            meta = json.load(f)
+        
+        for chunk in meta['chunks']:
+            chunk_dir = entry / chunk['dir']
+            data = {column['name']: self._load_column(chunk_dir, column) for column in chunk['columns']}
+            yield chunk['section'], pd.DataFrame(data, copy=False)
+    
+    def _save_column(self, chunk_dir: Path, index: int, values: pd.Series) -> Dict[str, Any]:
+        """Save one column as .npy arrays and return its description"""
+        column = {'name': values.name, 'dtype': str(values.dtype), 'file': f"{index:03d}"}
+        dtype = values.dtype
+        
+        if isinstance(dtype, pd.CategoricalDtype):
+            column['kind'] = 'category'
+            column['categories_dtype'] = str(values.cat.categories.dtype)
+            np.save(chunk_dir / f"{column['file']}.npy", values.cat.codes.to_numpy())
+            _save_strings(chunk_dir / f"{column['file']}.categories",
+                          [str(category) for category in values.cat.categories])
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in 'iu':
+            column['kind'] = 'masked'
+            np.save(chunk_dir / f"{column['file']}.npy",
+                    values.to_numpy(dtype=dtype.numpy_dtype, na_value=0))
+            np.save(chunk_dir / f"{column['file']}.mask.npy", values.isna().to_numpy())
+        elif dtype.kind in 'biuf':
+            column['kind'] = 'numeric'
+            np.save(chunk_dir / f"{column['file']}.npy", values.to_numpy())
+        else:
+            column['kind'] = 'text'
+            _save_strings(chunk_dir / column['file'], values.fillna('').astype(str).tolist())
+            np.save(chunk_dir / f"{column['file']}.mask.npy", values.isna().to_numpy())
+        
+        return column
+    
+    def _load_column(self, chunk_dir: Path, column: Dict[str, Any]) -> Any:
+        """Memory-map a column saved by ``_save_column``; text is decoded into memory"""
+        kind = column['kind']
+        if kind == 'text':
+            text = pd.Series(_load_strings(chunk_dir / column['file']), dtype=column['dtype'])
+            mask = np.load(chunk_dir / f"{column['file']}.mask.npy")
+            if mask.any():
+                text[mask] = None
+            # A Series, since a bare object array would be inferred as str again
+            return text
+        
+        # A plain ndarray view keeps the memory map without the np.memmap subclass
+        values = np.load(chunk_dir / f"{column['file']}.npy", mmap_mode='r').view(np.ndarray)
+        
+        if kind == 'numeric':
+            return values
+        
+        if kind == 'category':
+            categories = _load_strings(chunk_dir / f"{column['file']}.categories")
+            categories = pd.Index(categories, dtype=column['categories_dtype'])
+            return pd.Categorical.from_codes(values, categories=categories)
+        
+        mask = np.load(chunk_dir / f"{column['file']}.mask.npy")
+        return pd.arrays.IntegerArray(values, mask)
+
+
+class ChartCache:
+    """Cache rendered charts, base64 PNG text or SVG markup, keyed by what they were drawn from
+    
+    The key hashes the chart type, its input data and its rendering parameters,
+    so an entry is reused exactly when rendering again would draw the same
+    figure. The least recently used entries are evicted once the cache grows
+    past ``max_bytes``.
+    """
+    
+    DEFAULT_MAX_BYTES = 64 << 20
+    
+    # Entries are UTF-8 text; SVG keeps its labels as text, which need not be ASCII
+    ENTRY_SUFFIX = '.chart'
+    
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir() / 'charts'
+        self.max_bytes = max_bytes
+    
+    def key(self, chart: str, data: Any, params: Dict[str, Any]) -> str:
+        """Return the cache key of a chart type drawn from ``data`` with ``params``"""
+        parts = [chart, params, data]
+        encoded = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached chart, or None on a miss"""
+        entry = self.cache_dir / f"{key}{self.ENTRY_SUFFIX}"
+        try:
+            image = entry.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        
+        # Mark the entry as recently used
+        os.utime(entry)
+        return image
+    
+    def put(self, key: str, image: str):
+        """Store a rendered chart"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.cache_dir / f"{key}{self.ENTRY_SUFFIX}"
+        tmp_entry = entry.with_name(f".tmp-{entry.name}-{os.getpid()}")
+        tmp_entry.write_text(image, encoding='utf-8')
+        os.replace(tmp_entry, entry)
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        if not self.cache_dir.exists():
+            return
+        
+        entries = []
+        for entry in self.cache_dir.glob(f'*{self.ENTRY_SUFFIX}'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+    
+    def clear(self):
+        """Remove every cache entry"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
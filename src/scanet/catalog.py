@@ -0,0 +1,277 @@
+"""
+Cross-capture queries over many per-site, per-day databases through ATTACH
+"""
+
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .database import DatabaseReader, read_only_uri
+
+
+# Day in a partition file name, as YYYY-MM-DD or YYYYMMDD
+_DAY = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+
+# SQLite's default SQLITE_MAX_ATTACHED, for Pythons without Connection.getlimit()
+DEFAULT_ATTACH_LIMIT = 10
+
+# Relations the catalog exposes, as the columns and FROM clause selected from
+# each partition. Every row is tagged with its partition's site and day.
+# probes is read through each partition's probes view (a table in old
+# schemas), so partitions of any schema version can be mixed.
+CATALOG_RELATIONS = {
+    'ap': ('BSSID, PWR, Beacons, Data, per_s, CH, MB, ENC, CIPHER, AUTH, ESSID',
+           '{schema}.ap'),
+    'sta': ('station, first_seen, last_seen, power, packets, bssid, probed_essids',
+            '{schema}.sta'),
+    'probes': ('sta.station, probes.probe',
+               '{schema}.probes JOIN {schema}.sta ON sta.id = probes.station_id'),
+    # Stations associated with each AP, joined inside the partition so its indexes are used
+    'associations': ('ap.BSSID AS bssid, ap.ESSID AS essid, sta.station',
+                     '{schema}.ap JOIN {schema}.sta ON sta.bssid = ap.BSSID'),
+}
+
+
+def _quote(value: Optional[str]) -> str:
+    """Quote a value as an SQL literal"""
+    if value is None:
+        return 'NULL'
+    return "'" + value.replace("'", "''") + "'"
+
+
+def describe_partition(path: Path) -> Dict[str, Any]:
+    """Work out the site and day of a partition database from its path
+    
+    ``<site>/<day>.db`` and ``<site>_<day>.db`` are both understood. Without a
+    day in the file name, the day of the earliest station sighting is used.
+    """
+    path = Path(path)
+    match = _DAY.search(path.stem)
+    if match:
+        day = '-'.join(match.groups())
+        site = (path.stem[:match.start()] + path.stem[match.end():]).strip('_-. ')
+    else:
+        day = None
+        site = ''
+        conn = sqlite3.connect(read_only_uri(path), uri=True)
+        try:
+            first_seen = conn.execute('SELECT MIN(first_seen) FROM sta').fetchone()[0]
+            day = first_seen[:10] if first_seen else None
+        except sqlite3.OperationalError:
+            # Not a capture database
+            pass
+        finally:
+            conn.close()
+    
+    return {'path': path, 'site': site or path.parent.name, 'day': day}
+
+
+def select_partitions(partitions: Iterable[Dict[str, Any]], sites: Optional[Iterable[str]] = None,
+                      since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Keep the partitions of the given sites whose day falls within [since, until]
+    
+    Days are YYYY-MM-DD strings. Partitions of unknown day are dropped when a
+    date bound is given.
+    """
+    sites = set(sites) if sites else None
+    selected = []
+    for partition in partitions:
+        if sites is not None and partition['site'] not in sites:
+            continue
+        if since or until:
+            day = partition['day']
+            if day is None or (since and day < since) or (until and day > until):
+                continue
+        selected.append(partition)
+    return selected
+
+
+class RelationReader(DatabaseReader):
+    """Statistics and chart data read from ap, sta, probes and associations relations
+    
+    The relations may repeat an AP, station or probe; each is counted once.
+    Subclasses create the relations, with at least the columns the catalog
+    exposes.
+    """
+    
+    def _query_ap_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Compute access point statistics from the relations"""
+        stats = {}
+        
+        # Total APs
+        result = conn.execute('SELECT COUNT(DISTINCT BSSID) FROM ap').fetchone()
+        stats['total_aps'] = result[0]
+        
+        # APs by channel
+        results = conn.execute('''
+            SELECT CH as channel, COUNT(DISTINCT BSSID) as count
+            FROM ap
+            WHERE CH IS NOT NULL
+            GROUP BY CH
+            ORDER BY CH
+        ''').fetchall()
+        stats['aps_by_channel'] = [{'channel': r[0], 'count': r[1]} for r in results]
+        
+        # APs by encryption
+        results = conn.execute('''
+            SELECT ENC as encryption, COUNT(DISTINCT BSSID) as count
+            FROM ap
+            GROUP BY ENC
+            ORDER BY count DESC
+        ''').fetchall()
+        stats['aps_by_encryption'] = [{'encryption': r[0], 'count': r[1]} for r in results]
+        
+        # Top ESSIDs by client count; ESSIDs without clients still count as 0
+        results = conn.execute('''
+            SELECT essid, COUNT(DISTINCT station) as clients
+            FROM (SELECT ESSID AS essid, NULL AS station FROM ap WHERE ESSID != ''
+                  UNION ALL
+                  SELECT essid, station FROM associations WHERE essid != '')
+            GROUP BY essid
+            ORDER BY clients DESC
+            LIMIT 10
+        ''').fetchall()
+        stats['top_essids_by_clients'] = [{'essid': r[0], 'clients': r[1]} for r in results]
+        
+        return stats
+    
+    def _query_station_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Compute station statistics from the relations"""
+        stats = {}
+        
+        # Total stations
+        result = conn.execute('SELECT COUNT(DISTINCT station) FROM sta').fetchone()
+        stats['total_stations'] = result[0]
+        
+        # Stations with multiple probes
+        results = conn.execute('''
+            SELECT station, COUNT(DISTINCT probe) as probes
+            FROM probes
+            GROUP BY station
+            HAVING probes > 1
+            ORDER BY probes DESC
+            LIMIT 10
+        ''').fetchall()
+        stats['multi_probe_stations'] = [{'station': r[0], 'probes': r[1]} for r in results]
+        
+        # Most probed networks
+        results = conn.execute('''
+            SELECT probe, COUNT(DISTINCT station) as count
+            FROM probes
+            GROUP BY probe
+            ORDER BY count DESC
+            LIMIT 10
+        ''').fetchall()
+        stats['most_probed_networks'] = [{'network': r[0], 'count': r[1]} for r in results]
+        
+        return stats
+    
+    def get_channel_activity(self) -> List[Tuple]:
+        """Get each AP's strongest signal, busiest traffic and top rate on every known channel it used"""
+        return self.connect().execute('''
+            SELECT CH, MAX(PWR), MAX(per_s), MAX(MB)
+            FROM ap
+            WHERE CH > 0
+            GROUP BY BSSID, CH
+        ''').fetchall()
+    
+    def get_network_graph_data(self) -> List[Dict[str, str]]:
+        """Get the distinct AP to station links"""
+        results = self.connect().execute('''
+            SELECT DISTINCT bssid, essid, station
+            FROM associations
+            WHERE station != ''
+        ''').fetchall()
+        return [{'ap': r[0], 'ap_name': r[1], 'station': r[2]} for r in results]
+
+
+class CaptureCatalog(RelationReader):
+    """Read-only view of many capture databases as one
+    
+    Partitions are ATTACHed to an in-memory database, where ap, sta, probes and
+    associations are UNION ALL views over them with extra site and day
+    columns. Custom queries and get_ap_stats()/get_station_stats() run
+    against these views, counting every AP, station and probe once however
+    many partitions it appears in.
+    
+    When more partitions are selected than SQLite can attach at once, they
+    are attached a chunk at a time and copied into temporary tables instead.
+    """
+    
+    def __init__(self, partitions: List[Dict[str, Any]], pragmas: Optional[Dict[str, Any]] = None):
+        super().__init__(':memory:', pragmas)
+        self.partitions = list(partitions)
+        self.materialized = False
+    
+    @classmethod
+    def discover(cls, sources: Iterable[str], sites: Optional[Iterable[str]] = None,
+                 since: Optional[str] = None, until: Optional[str] = None) -> 'CaptureCatalog':
+        """Build a catalog of the .db files under files, directories or glob patterns"""
+        from .ingest import find_captures
+        
+        partitions = [describe_partition(path) for path in find_captures(sources, pattern='*.db')]
+        partitions.sort(key=lambda partition: (partition['site'], partition['day'] or '', str(partition['path'])))
+        return cls(select_partitions(partitions, sites, since, until))
+    
+    def connect(self) -> sqlite3.Connection:
+        """Return the current thread's connection, attaching the partitions on first use"""
+        conn = self.conn
+        if conn is not None:
+            return conn
+        
+        conn = super().connect()
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(conn, 'getlimit') else DEFAULT_ATTACH_LIMIT
+        if len(self.partitions) <= limit:
+            self._attach(conn, self.partitions)
+            self._create_relations(conn, 'VIEW', self.partitions)
+        else:
+            self._materialize(conn, limit)
+        return conn
+    
+    def data_version(self) -> Tuple[int, ...]:
+        """Return a token that changes whenever any attached partition changes"""
+        conn = self.connect()
+        schemas = [row[1] for row in conn.execute('PRAGMA database_list')]
+        versions = tuple(conn.execute(f'PRAGMA "{schema}".data_version').fetchone()[0] for schema in schemas)
+        return (id(conn),) + versions
+    
+    def _attach(self, conn: sqlite3.Connection, partitions: List[Dict[str, Any]], offset: int = 0):
+        """ATTACH partitions as p<offset>, p<offset + 1>, ..."""
+        for index, partition in enumerate(partitions, offset):
+            conn.execute('ATTACH DATABASE ? AS ?', (read_only_uri(partition['path']), f'p{index}'))
+    
+    def _union(self, relation: str, partitions: List[Dict[str, Any]], offset: int = 0) -> str:
+        """Return the UNION ALL of one relation's SELECT over attached partitions"""
+        columns, source = CATALOG_RELATIONS[relation]
+        selects = [
+            f"SELECT {_quote(partition['site'])} AS site, {_quote(partition['day'])} AS day, "
+            f"{columns} FROM {source.format(schema=f'p{index}')}"
+            for index, partition in enumerate(partitions, offset)
+        ]
+        return '\nUNION ALL '.join(selects)
+    
+    def _create_relations(self, conn: sqlite3.Connection, kind: str, partitions: List[Dict[str, Any]]):
+        """Create every relation as a TEMP VIEW or TEMP TABLE over attached partitions"""
+        for relation, (columns, _) in CATALOG_RELATIONS.items():
+            if partitions:
+                select = self._union(relation, partitions)
+            else:
+                # Nothing selected; keep the columns so queries still run
+                names = ['site', 'day'] + [column.split()[-1].split('.')[-1] for column in columns.split(',')]
+                select = 'SELECT ' + ', '.join(f'NULL AS {name}' for name in names) + ' WHERE 0'
+            conn.execute(f'CREATE TEMP {kind} {relation} AS {select}')
+    
+    def _materialize(self, conn: sqlite3.Connection, limit: int):
+        """Copy the partitions into temporary tables, attaching ``limit`` at a time"""
+        for start in range(0, len(self.partitions), limit):
+            chunk = self.partitions[start:start + limit]
+            self._attach(conn, chunk, start)
+            with conn:
+                if start == 0:
+                    self._create_relations(conn, 'TABLE', chunk)
+                else:
+                    for relation in CATALOG_RELATIONS:
+                        conn.execute(f'INSERT INTO temp.{relation} {self._union(relation, chunk, start)}')
+            for index in range(start, start + len(chunk)):
+                conn.execute(f'DETACH DATABASE p{index}')
+        self.materialized = True
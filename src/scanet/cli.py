@@ -5,12 +5,21 @@ SCANet CLI - Main command line interface
 
 import click
 import os
+import sqlite3
+import sys
 from pathlib import Path
-from .parser import AirodumpParser
+# Only modules that need neither pandas nor matplotlib are imported here;
+# commands import the rest themselves, so query and --help start quickly
 from .database import WiFiDatabase
-from .visualizer import WiFiVisualizer
-from .reporter import HTMLReporter, PDFReporter
-from .web_osint import run_server
+from .export import EXPORT_FORMATS, write_rows
+from .advisor import LARGE_TABLES, QueryAdvisor
+from .catalog import CaptureCatalog
+
+
+def _default_batch_size() -> int:
+    """Rows parsed per batch, looked up when a command runs since the parser imports pandas"""
+    from .parser import AirodumpParser
+    return AirodumpParser.DEFAULT_BATCH_SIZE
 
 
 @click.group()
@@ -25,78 +34,349 @@ def cli():
 @click.option('--output', '-o', default='report', help='Output directory for reports')
 @click.option('--format', '-f', type=click.Choice(['html', 'pdf', 'both']), default='both', help='Report format')
 @click.option('--db', default=None, help='SQLite database file (auto-generated if not specified)')
-def analyze(csv_file, output, format, db):
+@click.option('--batch-size', default=_default_batch_size, show_default=True,
+              type=click.IntRange(min=1), help='Rows parsed and stored per batch')
+@click.option('--no-cache', is_flag=True,
+              help='Always re-parse the CSV and re-render charts instead of using the caches')
+@click.option('--in-memory', is_flag=True,
+              help='Work on an in-memory database and save it to the database file at the end '
+                   '(also selected by --db :memory:)')
+@click.option('--charts', 'chart_format', type=click.Choice(['svg', 'png']), default='svg', show_default=True,
+              help='Chart encoding: inline SVG, or base64 PNG images')
+@click.option('--preview', is_flag=True,
+              help='Quickly write a small HTML preview with low resolution top-N charts and no topology, '
+                   'without storing the capture in a database')
+def analyze(csv_file, output, format, db, batch_size, no_cache, in_memory, chart_format, preview):
     """Analyze airodump-ng CSV file and generate reports"""
+    from .parser import AirodumpParser
+    from .cache import ChartCache, ParseCache
+    from .ingest import CaptureDelta
+    from .visualizer import WiFiVisualizer
+    from .reporter import HTMLReporter, PDFReporter
     
     csv_path = Path(csv_file)
     output_dir = Path(output)
     output_dir.mkdir(exist_ok=True)
     
+    if db == ':memory:':
+        in_memory, db = True, None
     if db is None:
         db = output_dir / f"{csv_path.stem}.db"
     
     click.echo(f"📡 Analyzing {csv_file}...")
     
-    # Parse CSV and store in database
     parser = AirodumpParser()
-    ap_data, station_data = parser.parse(csv_path)
+    if preview:
+        _write_preview(parser, csv_path, output_dir, batch_size, no_cache, chart_format)
+        return
+    
+    # Stream the CSV into the database batch by batch
+    if in_memory:
+        # Start from the existing file, so unchanged data is still skipped
+        db_manager = WiFiDatabase(':memory:')
+        if Path(db).exists():
+            db_manager.load_from(str(db))
+    else:
+        db_manager = WiFiDatabase(str(db))
+    db_manager.create_tables()
+    
+    # Only rows that changed since the file was last ingested are written
+    delta = CaptureDelta(db_manager, csv_path)
+    if delta.unchanged():
+        click.echo(f"⏭️  {csv_file} unchanged since its last ingest, skipped parsing")
+    else:
+        if no_cache:
+            batches = parser.iter_batches(csv_path, batch_size=batch_size)
+        else:
+            batches = ParseCache().iter_batches(parser, csv_path, batch_size=batch_size,
+                                                digest=delta.get_digest())
+        
+        for section, batch in batches:
+            delta.write(section, batch)
+        delta.finish()
+        
+        unchanged = delta.unchanged_rows['ap'] + delta.unchanged_rows['station']
+        if unchanged:
+            click.echo(f"⏭️  {unchanged} unchanged rows skipped")
+    
+    if not in_memory:
+        click.echo(f"✅ Data stored in {db}")
+    
+    try:
+        # Generate visualizations, reusing the ingest connection
+        visualizer = WiFiVisualizer(db_manager, cache=None if no_cache else ChartCache(),
+                                    chart_format=chart_format)
+        charts = visualizer.generate_all_charts()
+        
+        # Generate reports
+        if format in ['html', 'both']:
+            html_reporter = HTMLReporter(db_manager)
+            html_file = output_dir / f"{csv_path.stem}_report.html"
+            html_reporter.generate(str(html_file), charts)
+            click.echo(f"📄 HTML report: {html_file}")
+        
+        if format in ['pdf', 'both']:
+            pdf_reporter = PDFReporter(db_manager)
+            pdf_file = output_dir / f"{csv_path.stem}_report.pdf"
+            html_file = output_dir / f"{csv_path.stem}_report.html"
+            pdf_reporter.generate(str(html_file), str(pdf_file))
+            click.echo(f"📑 PDF report: {pdf_file}")
+    finally:
+        # The ingested data is kept even when a report fails
+        if in_memory:
+            db_manager.save_to(str(db))
+            click.echo(f"✅ Data stored in {db}")
+        db_manager.close()
+
+
+def _write_preview(parser, csv_path, output_dir, batch_size, no_cache, chart_format):
+    """Write the --preview page from the parsed batches, without ingesting them"""
+    from .cache import ChartCache, ParseCache
+    from .preview import CapturePreview
+    from .visualizer import WiFiVisualizer
+    from .reporter import HTMLReporter
+    
+    if no_cache:
+        batches = parser.iter_batches(csv_path, batch_size=batch_size)
+    else:
+        batches = ParseCache().iter_batches(parser, csv_path, batch_size=batch_size)
+    
+    capture = CapturePreview(batches)
+    try:
+        visualizer = WiFiVisualizer(capture, cache=None if no_cache else ChartCache(),
+                                    chart_format=chart_format, preview=True)
+        charts = visualizer.generate_all_charts()
+        
+        # An HTML page only; PDF conversion would take longer than the charts
+        html_file = output_dir / f"{csv_path.stem}_preview.html"
+        HTMLReporter(capture).generate(str(html_file), charts)
+    finally:
+        capture.close()
+    
+    click.echo(f"👀 Preview: {html_file}")
+
+
+@cli.command()
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--db', default='captures.db', show_default=True, help='SQLite database file to ingest into')
+@click.option('--workers', '-j', default=None, type=click.IntRange(min=1),
+              help='Parser processes (defaults to the number of CPUs)')
+@click.option('--batch-size', default=_default_batch_size, show_default=True,
+              type=click.IntRange(min=1), help='Rows parsed and stored per batch')
+def ingest(sources, db, workers, batch_size):
+    """Ingest many CSV files, directories or glob patterns into one database"""
+    from .ingest import ParallelIngestor, find_captures
+    
+    csv_files = find_captures(sources)
+    if not csv_files:
+        raise click.ClickException("No CSV files found")
+    
+    click.echo(f"📡 Ingesting {len(csv_files)} captures into {db}...")
+    
+    db_manager = WiFiDatabase(db)
+    db_manager.create_tables()
+    
+    def on_file(delta):
+        if delta.skipped:
+            click.echo(f"  {delta.csv_file}: unchanged, skipped")
+        else:
+            click.echo(f"  {delta.csv_file}: {delta.written['ap']} APs, "
+                       f"{delta.written['station']} stations")
+    
+    ingestor = ParallelIngestor(db_manager, workers=workers, batch_size=batch_size)
+    totals = ingestor.ingest(csv_files, on_file)
+    db_manager.close()
+    
+    click.echo(f"✅ {totals['files']} captures stored in {db} "
+               f"({totals['aps']} APs, {totals['stations']} stations, "
+               f"{totals['skipped']} unchanged captures skipped)")
+
+
+@cli.command()
+@click.argument('csv_file', type=click.Path(exists=True))
+@click.option('--output', '-o', default='report', help='Output directory for the database')
+@click.option('--db', default=None, help='SQLite database file (auto-generated if not specified)')
+@click.option('--interval', '-i', default=5.0, show_default=True,
+              type=click.FloatRange(min=0.1), help='Seconds between checks of the CSV file')
+def follow(csv_file, output, db, interval):
+    """Follow a live airodump-ng CSV file and store only new or changed rows"""
+    from .follower import CaptureFollower
+    
+    csv_path = Path(csv_file)
+    output_dir = Path(output)
+    output_dir.mkdir(exist_ok=True)
+    
+    if db is None:
+        db = output_dir / f"{csv_path.stem}.db"
     
     db_manager = WiFiDatabase(str(db))
     db_manager.create_tables()
-    db_manager.insert_access_points(ap_data)
-    db_manager.insert_stations(station_data)
     
-    click.echo(f"✅ Data stored in {db}")
+    follower = CaptureFollower(csv_path, db_manager)
     
-    # Generate visualizations
-    visualizer = WiFiVisualizer(str(db))
-    charts = visualizer.generate_all_charts()
+    def on_refresh(ap_count, station_count):
+        click.echo(f"🔄 {ap_count} APs, {station_count} stations updated")
     
-    # Generate reports
-    if format in ['html', 'both']:
-        html_reporter = HTMLReporter(str(db))
-        html_file = output_dir / f"{csv_path.stem}_report.html"
-        html_reporter.generate(str(html_file), charts)
-        click.echo(f"📄 HTML report: {html_file}")
+    click.echo(f"👀 Following {csv_file} into {db} (Ctrl+C to stop)...")
     
-    if format in ['pdf', 'both']:
-        pdf_reporter = PDFReporter(str(db))
-        pdf_file = output_dir / f"{csv_path.stem}_report.pdf"
-        html_file = output_dir / f"{csv_path.stem}_report.html"
-        pdf_reporter.generate(str(html_file), str(pdf_file))
-        click.echo(f"📑 PDF report: {pdf_file}")
+    try:
+        follower.follow(interval, on_refresh)
+    except KeyboardInterrupt:
+        click.echo("✅ Stopped following")
+    finally:
+        db_manager.close()
 
 
 @cli.command()
 @click.argument('db_file', type=click.Path(exists=True))
 @click.option('--query', '-q', help='Custom SQL query')
-def query(db_file, query):
+@click.option('--format', '-f', 'fmt', type=click.Choice(EXPORT_FORMATS), default='table', show_default=True,
+              help='Output format')
+@click.option('--limit', '-n', default=None, type=click.IntRange(min=0), help='Stop after this many rows')
+@click.option('--timeout', '-t', default=60.0, show_default=True, type=click.FloatRange(min=0),
+              help='Seconds SQLite may spend running the query (0 disables)')
+@click.option('--explain', 'plan_mode', flag_value='explain',
+              help='Show the query plan, full scans and suggested indexes instead of the results')
+@click.option('--analyze', 'plan_mode', flag_value='analyze', help='Like --explain, and also time the query')
+@click.option('--create-indexes', is_flag=True, help='With --explain/--analyze, create suggested indexes without asking')
+def query(db_file, query, fmt, limit, timeout, plan_mode, create_indexes):
     """Execute custom queries on the database"""
-    db_manager = WiFiDatabase(db_file)
+    # Only --explain/--analyze may write, to create suggested indexes
+    db_manager = WiFiDatabase(db_file, read_only=not plan_mode)
     
     if query:
-        results = db_manager.execute_query(query)
-        if results:
-            # Print column headers
-            if results:
-                columns = list(results[0].keys())
-                click.echo(" | ".join(columns))
-                click.echo("-" * (len(" | ".join(columns))))
-                
-                # Print data rows
-                for row in results:
-                    values = [str(row[col]) for col in columns]
-                    click.echo(" | ".join(values))
-        else:
-            click.echo("No results found.")
+        try:
+            if plan_mode:
+                _advise(db_manager, query, plan_mode == 'analyze', timeout or None, create_indexes)
+            else:
+                # Rows are streamed, so large results start printing at once
+                columns, rows = db_manager.stream_query(query, limit=limit, timeout=timeout or None)
+                write_rows(sys.stdout, columns, rows, fmt)
+        except TimeoutError as e:
+            raise click.ClickException(f"{e}; narrow the query or raise --timeout")
+        except sqlite3.Error as e:
+            raise click.ClickException(f"Query failed: {e}")
+        finally:
+            db_manager.close()
     else:
         click.echo("Available sample queries:")
         click.echo("1. SELECT CH, COUNT(*) FROM ap GROUP BY CH;")
         click.echo("2. SELECT ESSID, COUNT(DISTINCT station) FROM ap JOIN sta ON ap.BSSID = sta.bssid GROUP BY ESSID;")
 
+
+@cli.command()
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--site', 'sites', multiple=True, help='Only use partitions of this site (repeatable)')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), help='Only use partitions from this day on')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), help='Only use partitions up to this day')
+@click.option('--query', '-q', help='Custom SQL query over the ap, sta, probes and associations views')
+@click.option('--format', '-f', 'fmt', type=click.Choice(EXPORT_FORMATS), default='table', show_default=True,
+              help='Output format')
+@click.option('--limit', '-n', default=None, type=click.IntRange(min=0), help='Stop after this many rows')
+@click.option('--timeout', '-t', default=60.0, show_default=True, type=click.FloatRange(min=0),
+              help='Seconds SQLite may spend running the query (0 disables)')
+def catalog(sources, sites, since, until, query, fmt, limit, timeout):
+    """Query many per-site, per-day capture databases as one"""
+    capture_catalog = CaptureCatalog.discover(
+        sources, sites=sites,
+        since=since.strftime('%Y-%m-%d') if since else None,
+        until=until.strftime('%Y-%m-%d') if until else None,
+    )
+    
+    try:
+        if query:
+            columns, rows = capture_catalog.stream_query(query, limit=limit, timeout=timeout or None)
+            write_rows(sys.stdout, columns, rows, fmt)
+            return
+        
+        partitions = capture_catalog.partitions
+        click.echo(f"🗂️  {len(partitions)} partitions from "
+                   f"{len({partition['site'] for partition in partitions})} sites")
+        if not partitions:
+            return
+        
+        ap_stats = capture_catalog.get_ap_stats()
+        station_stats = capture_catalog.get_station_stats()
+        click.echo(f"📡 {ap_stats['total_aps']} APs, {station_stats['total_stations']} stations")
+        for network in ap_stats['top_essids_by_clients']:
+            click.echo(f"  {network['essid']} | {network['clients']} clients")
+    except TimeoutError as e:
+        raise click.ClickException(f"{e}; narrow the query or raise --timeout")
+    except sqlite3.Error as e:
+        raise click.ClickException(f"Query failed: {e}")
+    finally:
+        capture_catalog.close()
+
+
+def _advise(db_manager, query, analyze, timeout, create_indexes):
+    """Print the plan of a query with its full scans and index suggestions"""
+    advisor = QueryAdvisor(db_manager)
+    plan = advisor.explain(query)
+    
+    click.echo("🔍 Query plan:")
+    for step in plan:
+        click.echo("  " * (step['depth'] + 1) + step['detail'])
+    click.echo()
+    
+    scans = advisor.full_scans(query, plan)
+    for scan in scans:
+        name = scan['table'] if scan['alias'] == scan['table'] else f"{scan['table']} (as {scan['alias']})"
+        via = f" through covering index {scan['index']}" if scan['index'] else ""
+        click.echo(f"⚠️  Full scan of {name}{via}")
+    if not scans:
+        click.echo(f"✅ No full scans of {', '.join(LARGE_TABLES)}")
+    
+    if analyze:
+        timing = advisor.time_query(query, timeout=timeout)
+        click.echo(f"⏱️  {timing['rows']} rows in {timing['seconds']:.3f}s")
+    
+    if not scans:
+        return
+    
+    suggestions = advisor.suggest_indexes(query)
+    if not suggestions:
+        click.echo("💡 No single index avoids these scans")
+        return
+    
+    click.echo("💡 Suggested indexes:")
+    for suggestion in suggestions:
+        click.echo(f"  {suggestion['sql']};")
+    
+    # Only prompt when someone is there to answer
+    if create_indexes or (sys.stdin.isatty() and click.confirm("Create the suggested indexes?")):
+        try:
+            advisor.create_indexes(suggestions)
+        except sqlite3.Error as e:
+            raise click.ClickException(f"Could not create indexes: {e}")
+        click.echo(f"✅ Created {', '.join(suggestion['name'] for suggestion in suggestions)}")
+
+
+@cli.command()
+@click.argument('term')
+@click.option('--db', default='captures.db', show_default=True, type=click.Path(exists=True),
+              help='SQLite database file to search')
+@click.option('--prefix', is_flag=True, help='Only match ESSIDs starting with the term')
+@click.option('--limit', '-n', default=50, show_default=True, type=click.IntRange(min=1),
+              help='Maximum number of ESSIDs to show')
+def search(term, db, prefix, limit):
+    """Search broadcast and probed ESSIDs for a substring"""
+    db_manager = WiFiDatabase(db, read_only=True)
+    results = db_manager.search_essids(term, prefix=prefix, limit=limit)
+    db_manager.close()
+    
+    if not results:
+        click.echo("No results found.")
+        return
+    
+    click.echo("essid | aps | clients | probes")
+    click.echo("-" * len("essid | aps | clients | probes"))
+    for result in results:
+        click.echo(f"{result['essid']} | {result['aps']} | {result['clients']} | {result['probes']}")
+
 @cli.command()
 def web_osint():
     """Start the web server for IP OSINT."""
+    from .web_osint import run_server
     run_server()
 
 if __name__ == '__main__':
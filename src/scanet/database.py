@@ -2,30 +2,205 @@
 Database operations for WiFi analysis data
 """
 
+import bisect
+import itertools
+import json
 import sqlite3
-import pandas as pd
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from typing import TYPE_CHECKING, Callable, List, Tuple, Dict, Any, Iterator, Optional, Union
+from .schema import (
+    AGGREGATE_TABLES, AGGREGATE_TRIGGERS, BULK_AP_ADD, BULK_AP_REMOVE, BULK_STATION_ADD,
+    BULK_STATION_REMOVE, DEDUPLICATE_STATIONS, HISTORY_TABLES, INDEXES, INTERN_PROBES,
+    POPULATE_ESSIDS, PROBES_VIEW, REBUILD_AGGREGATES, REPLACED_TRIGGERS, SCHEMA_VERSION,
+    SEARCH_INDEX, SEARCH_TABLES, index_sql,
+)
 
 
-class WiFiDatabase:
-    """SQLite database manager for WiFi analysis data"""
+# pandas and numpy are only needed to insert parsed captures; queries and
+# stats skip their import
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Names of the shared-cache in-memory databases opened by this process
+_memory_ids = itertools.count()
+
+
+def read_only_uri(path: Union[str, Path]) -> str:
+    """Return an SQLite URI opening a database file read-only
+    
+    A WAL database without a -wal file has no writer attached, and is opened
+    immutable: a read-only connection would otherwise create -wal and -shm
+    files that it cannot remove again.
+    """
+    path = Path(path).resolve()
+    uri = f'{path.as_uri()}?mode=ro'
+    
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(20)
+    except OSError:
+        return uri
+    
+    # Bytes 18 and 19 of the header are 2 in WAL mode
+    if header[18:20] == b'\x02\x02' and not Path(f'{path}-wal').exists():
+        uri += '&immutable=1'
+    return uri
+
+
+def _int_values(df: 'pd.DataFrame', col: str) -> List[Optional[int]]:
+    """Return a numeric column as Python ints truncated toward zero, None for missing"""
+    import numpy as np
+    import pandas as pd
+    
+    if col not in df.columns:
+        return [None] * len(df)
+    
+    values = pd.to_numeric(df[col], errors='coerce').astype('float64').to_numpy()
+    missing = ~np.isfinite(values)
+    values = np.where(missing, 0, np.trunc(values)).astype(np.int64)
+    
+    result = values.tolist()
+    for position in np.flatnonzero(missing).tolist():
+        result[position] = None
+    return result
+
+
+def _split_probes(probed_essids: List[Any]) -> Tuple[List[int], List[str]]:
+    """Split comma separated probe lists into parallel (row position, ESSID) lists"""
+    positions = []
+    probes = []
+    
+    for position, value in enumerate(probed_essids):
+        if not isinstance(value, str) or not value:
+            continue
+        for essid in value.split(','):
+            essid = essid.strip().strip('"')
+            if essid:
+                positions.append(position)
+                probes.append(essid)
+    
+    return positions, probes
+
+
+def _text_values(df: 'pd.DataFrame', col: str) -> List[Any]:
+    """Return a text column as a list, '' when the column is missing and None for missing values"""
+    if col not in df.columns:
+        return [''] * len(df)
+    
+    values = df[col]
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _json_columns(count: int) -> str:
+    """Select list unpacking the first ``count`` items of each json_each() row array"""
+    return ', '.join(f"json_extract(value, '$[{index}]')" for index in range(count))
+
+
+class DatabaseReader:
+    """Connections, queries and cached statistics over an SQLite database
+    
+    Nothing here writes to the database. Subclasses compute the statistics
+    and chart data the reporters read.
+    """
+    
+    # Rows per fetchmany() call when streaming query results
+    QUERY_FETCH_SIZE = 1000
     
-    def __init__(self, db_path: str):
+    # SQLite VM instructions between query timeout checks
+    PROGRESS_INTERVAL = 10000
+    
+    # Connection PRAGMAs, overridable per instance (None skips a PRAGMA).
+    # journal_mode is stored in the database file, so it is only set by
+    # create_tables(); read-only use leaves the file as it was.
+    DEFAULT_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # KiB
+        'temp_store': 'MEMORY',
+    }
+    
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None, read_only: bool = False):
         self.db_path = db_path
-        self.conn = None
+        self.pragmas = {**self.DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.read_only = read_only
+        
+        # ':memory:' gets a named shared-cache database, so every thread's
+        # connection sees the same data
+        self._uri = None
+        if self.in_memory:
+            self._uri = f'file:scanet-{next(_memory_ids)}?mode=memory&cache=shared'
+        elif read_only:
+            self._uri = read_only_uri(db_path)
+        
+        # One reused connection per thread
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        
+        # (data_version() token, stats) of the last computed statistics
+        self._stats_snapshot = None
+        # Name -> (data_version() token, value) of other derived data
+        self._snapshots: Dict[str, Tuple[Any, Any]] = {}
+    
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """The current thread's connection, if one is open"""
+        return getattr(self._local, 'conn', None)
     
-    def connect(self):
-        """Establish database connection"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
-        return self.conn
+    def connect(self) -> sqlite3.Connection:
+        """Return the current thread's connection, opening it on first use"""
+        conn = self.conn
+        if conn is not None:
+            return conn
+        
+        # Connections are only used by the thread that opened them, but close()
+        # may run on another one
+        conn = sqlite3.connect(self._uri or self.db_path, uri=self._uri is not None,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if value is not None and name != 'journal_mode':
+                conn.execute(f'PRAGMA {name}={value}')
+        
+        # REPLACE conflict resolution must fire delete triggers to keep aggregates right
+        conn.execute('PRAGMA recursive_triggers=ON')
+        
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
     
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close every connection opened by this instance"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
+    @property
+    def in_memory(self) -> bool:
+        """Whether the database lives in memory instead of a file"""
+        return self.db_path == ':memory:'
+    
+    def save_to(self, path: str):
+        """Copy the whole database into a file with the SQLite backup API
+        
+        The copy is written as one transaction, so the file never holds a
+        partial database.
+        """
+        conn = self.connect()
+        conn.commit()
+        target = sqlite3.connect(path)
+        try:
+            conn.backup(target)
+        finally:
+            target.close()
     
     def __enter__(self):
         self.connect()
@@ -34,8 +209,180 @@ class WiFiDatabase:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
     
+    def _has_object(self, object_type: str, name: str) -> bool:
+        """Check whether the schema has a table, view, index or trigger of that name"""
+        row = self.connect().execute(
+            'SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?', (object_type, name)
+        ).fetchone()
+        return row is not None
+    
+    def execute_query(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        """Execute a custom SQL query"""
+        with self.connect() as conn:
+            cursor = conn.execute(query, params)
+            return cursor.fetchall()
+    
+    def stream_query(self, query: str, params: Tuple = (), limit: Optional[int] = None,
+                     timeout: Optional[float] = None) -> Tuple[List[str], Iterator[sqlite3.Row]]:
+        """Execute a custom SQL query, returning its column names and a row iterator
+        
+        Rows are fetched QUERY_FETCH_SIZE at a time, so memory does not grow with
+        the result. ``timeout`` bounds the seconds SQLite spends running the
+        query, not the time the caller spends consuming rows; once it runs out
+        TimeoutError is raised.
+        """
+        conn = self.connect()
+        clock = {'spent': 0.0, 'started': None, 'expired': False}
+        
+        def check_deadline():
+            if clock['started'] is not None and clock['spent'] + time.monotonic() - clock['started'] > timeout:
+                clock['expired'] = True
+                return 1
+            return 0
+        
+        def timed(call, *args):
+            clock['started'] = time.monotonic()
+            try:
+                return call(*args)
+            except sqlite3.OperationalError as e:
+                if clock['expired']:
+                    raise TimeoutError(f"Query exceeded the {timeout:g}s timeout") from e
+                raise
+            finally:
+                clock['spent'] += time.monotonic() - clock['started']
+                clock['started'] = None
+        
+        if timeout:
+            conn.set_progress_handler(check_deadline, self.PROGRESS_INTERVAL)
+        try:
+            cursor = timed(conn.execute, query, params)
+        except BaseException:
+            conn.set_progress_handler(None, 0)
+            raise
+        
+        columns = [column[0] for column in cursor.description or []]
+        
+        def rows() -> Iterator[sqlite3.Row]:
+            remaining = limit
+            try:
+                while remaining is None or remaining > 0:
+                    size = self.QUERY_FETCH_SIZE if remaining is None else min(remaining, self.QUERY_FETCH_SIZE)
+                    batch = timed(cursor.fetchmany, size)
+                    if not batch:
+                        break
+                    if remaining is not None:
+                        remaining -= len(batch)
+                    yield from batch
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                # Commit statements that write, as execute_query does
+                if conn.in_transaction:
+                    conn.commit()
+            finally:
+                cursor.close()
+                conn.set_progress_handler(None, 0)
+        
+        return columns, rows()
+    
+    def data_version(self) -> Tuple[int, int, int]:
+        """Return a token that changes whenever the database content changes
+        
+        PRAGMA data_version covers commits from other connections and
+        total_changes covers this connection's own writes.
+        """
+        conn = self.connect()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        return id(conn), data_version, conn.total_changes
+    
+    def get_stats_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get AP and station statistics, recomputed only when the data changed
+        
+        The snapshot is shared between callers and must be treated as read-only.
+        """
+        version = self.data_version()
+        if self._stats_snapshot is not None and self._stats_snapshot[0] == version:
+            return self._stats_snapshot[1]
+        
+        conn = self.connect()
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            # Read every aggregate from the same database state
+            conn.execute('BEGIN')
+        try:
+            snapshot = {
+                'ap': self._query_ap_stats(conn),
+                'station': self._query_station_stats(conn),
+            }
+        finally:
+            if own_transaction:
+                conn.rollback()
+        
+        self._stats_snapshot = (version, snapshot)
+        return snapshot
+    
+    def get_snapshot(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Return the value compute() derives from the data, recomputed only when the data changed
+        
+        Like get_stats_snapshot(), the value is shared between callers and must
+        be treated as read-only.
+        """
+        version = self.data_version()
+        cached = self._snapshots.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        value = compute()
+        self._snapshots[name] = (version, value)
+        return value
+    
+    def get_ap_stats(self) -> Dict[str, Any]:
+        """Get access point statistics"""
+        return self.get_stats_snapshot()['ap']
+    
+    def get_station_stats(self) -> Dict[str, Any]:
+        """Get station statistics"""
+        return self.get_stats_snapshot()['station']
+    
+    def _query_ap_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Compute access point statistics"""
+        raise NotImplementedError
+    
+    def _query_station_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Compute station statistics"""
+        raise NotImplementedError
+    
+    def get_channel_activity(self) -> List[Tuple]:
+        """Get the channel, signal, data frames per second and maximum rate of every AP on a known channel"""
+        raise NotImplementedError
+    
+    def get_network_graph_data(self) -> List[Dict[str, str]]:
+        """Get AP to station links for the network graph"""
+        raise NotImplementedError
+
+
+class WiFiDatabase(DatabaseReader):
+    """SQLite database manager for WiFi analysis data"""
+    
+    # Rows per executemany() call during bulk inserts
+    INSERT_BATCH_SIZE = 10000
+    
+    def load_from(self, path: str):
+        """Replace the database's contents with a copy of a database file"""
+        source = sqlite3.connect(path)
+        try:
+            source.backup(self.connect())
+        finally:
+            source.close()
+    
     def create_tables(self):
         """Create database tables for AP and Station data"""
+        journal_mode = self.pragmas.get('journal_mode')
+        if journal_mode is not None:
+            self.connect().execute(f'PRAGMA journal_mode={journal_mode}')
+        
         with self.connect() as conn:
             # Access Points table
             conn.execute('''
@@ -72,177 +419,466 @@ class WiFiDatabase:
                 )
             ''')
             
-            # Probed networks table (normalized)
+            # Probed networks, interned through the essid dictionary
             conn.execute('''
-                CREATE TABLE IF NOT EXISTS probes (
+                CREATE TABLE IF NOT EXISTS sta_probe (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    station_id INTEGER,
-                    probe TEXT,
-                    FOREIGN KEY (station_id) REFERENCES sta(id)
+                    station_id INTEGER NOT NULL,
+                    essid_id INTEGER NOT NULL,
+                    FOREIGN KEY (station_id) REFERENCES sta(id),
+                    FOREIGN KEY (essid_id) REFERENCES essid(id)
                 )
             ''')
             
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            
+            # ESSID dictionary, shared by probes and search
+            conn.executescript(SEARCH_TABLES)
+            if version < 4 and self._has_object('table', 'probes'):
+                conn.executescript(INTERN_PROBES)
+            
+            # Stations and probes became unique in version 2. Deduplicating
+            # before the triggers exist and rebuilding the summary tables
+            # afterwards is much faster than adjusting them row by row.
+            conn.executescript(AGGREGATE_TABLES)
+            if version < 2:
+                conn.executescript(REPLACED_TRIGGERS)
+                conn.executescript(DEDUPLICATE_STATIONS)
+            
+            # Summary tables kept current by triggers
+            conn.executescript(AGGREGATE_TRIGGERS)
+            if version < 2:
+                conn.executescript(REBUILD_AGGREGATES)
+            
             # Create indexes for better performance
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_ap_bssid ON ap(BSSID)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_ap_channel ON ap(CH)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_ap_essid ON ap(ESSID)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_sta_bssid ON sta(bssid)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_sta_station ON sta(station)')
+            for index in INDEXES:
+                conn.execute(index_sql(*index))
+            conn.executescript(PROBES_VIEW)
+            
+            # Per-capture history
+            conn.executescript(HISTORY_TABLES)
+            
+            # Full-text index over the ESSID dictionary
+            if version < 3:
+                conn.executescript(POPULATE_ESSIDS)
+            
+            had_index = self.has_search_index()
+            try:
+                conn.executescript(SEARCH_INDEX)
+            except sqlite3.OperationalError:
+                # No FTS5 or trigram tokenizer; search falls back to LIKE
+                pass
+            if not had_index and self.has_search_index():
+                conn.execute("INSERT INTO essid_fts (essid_fts) VALUES ('rebuild')")
+            
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            conn.commit()
+    
+    def rebuild_aggregates(self):
+        """Recompute the summary tables from the ap, sta and sta_probe tables"""
+        with self.connect() as conn:
+            conn.executescript(REBUILD_AGGREGATES)
+    
+    def start_session(self, source: str, content_hash: Optional[str] = None) -> int:
+        """Return the capture session id for a source, creating the session if needed
+        
+        Captures with a known content hash map to one session, so ingesting the
+        same file twice records its observations only once.
+        """
+        with self.connect() as conn:
+            if content_hash:
+                row = conn.execute(
+                    'SELECT id FROM capture_session WHERE content_hash = ?', (content_hash,)
+                ).fetchone()
+                if row:
+                    return row[0]
             
+            cursor = conn.execute(
+                'INSERT INTO capture_session (source, content_hash) VALUES (?, ?)',
+                (source, content_hash)
+            )
+            conn.commit()
+            return cursor.lastrowid
+    
+    def get_capture_file(self, source: str) -> Optional[Dict[str, Any]]:
+        """Get the recorded state of a previously ingested capture file"""
+        with self.connect() as conn:
+            row = conn.execute('''
+                SELECT session_id, content_hash, size, mtime_ns, ingested_at
+                FROM capture_file WHERE source = ?
+            ''', (source,)).fetchone()
+            
+            return dict(row) if row else None
+    
+    def record_capture_file(self, source: str, session_id: int, content_hash: str,
+                            size: int, mtime_ns: int):
+        """Remember the state of a capture file after ingesting it"""
+        with self.connect() as conn:
+            conn.execute('''
+                INSERT INTO capture_file (source, session_id, content_hash, size, mtime_ns)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (source) DO UPDATE SET
+                    session_id = excluded.session_id, content_hash = excluded.content_hash,
+                    size = excluded.size, mtime_ns = excluded.mtime_ns,
+                    ingested_at = CURRENT_TIMESTAMP
+            ''', (source, session_id, content_hash, size, mtime_ns))
             conn.commit()
     
-    def insert_access_points(self, ap_data: pd.DataFrame):
-        """Insert access point data into database"""
+    def get_row_fingerprints(self, source: str, section: str, keys: List[str]) -> Dict[str, int]:
+        """Get the fingerprints last written from a capture file section for the given row keys"""
+        with self.connect() as conn:
+            return dict(conn.execute('''
+                SELECT key, fingerprint FROM capture_row
+                WHERE source = ? AND section = ? AND key IN (SELECT value FROM json_each(?))
+            ''', (source, section, json.dumps(keys))).fetchall())
+    
+    def record_row_fingerprints(self, source: str, section: str,
+                                fingerprints: List[Tuple[str, int]]):
+        """Store (key, fingerprint) pairs of rows written from a capture file section"""
+        with self.connect() as conn:
+            conn.executemany('''
+                INSERT INTO capture_row (source, section, key, fingerprint)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (source, section, key) DO UPDATE SET fingerprint = excluded.fingerprint
+            ''', ((source, section, key, fingerprint) for key, fingerprint in fingerprints))
+            conn.commit()
+    
+    def insert_access_points(self, ap_data: 'pd.DataFrame', batch_size: int = INSERT_BATCH_SIZE,
+                             session_id: Optional[int] = None):
+        """Insert or update access point data, recording observations for a session"""
         if ap_data.empty:
             return
         
+        from .parser import expand_compact
+        ap_data = expand_compact(ap_data)
+        
+        # Convert each column once, then zip them into row tuples
+        bssids = _text_values(ap_data, 'BSSID')
+        power = _int_values(ap_data, 'PWR')
+        beacons = _int_values(ap_data, 'Beacons')
+        data = _int_values(ap_data, 'Data')
+        channels = _int_values(ap_data, 'CH')
+        records = list(zip(
+            bssids,
+            power,
+            beacons,
+            data,
+            _int_values(ap_data, 'per_s'),
+            channels,
+            _int_values(ap_data, 'MB'),
+            _text_values(ap_data, 'ENC'),
+            _text_values(ap_data, 'CIPHER'),
+            _text_values(ap_data, 'AUTH'),
+            _text_values(ap_data, 'ESSID'),
+        ))
+        
         with self.connect() as conn:
-            # Convert DataFrame to list of tuples
-            records = []
-            for _, row in ap_data.iterrows():
-                record = (
-                    row.get('BSSID', ''),
-                    int(row.get('PWR', 0)) if pd.notna(row.get('PWR')) else None,
-                    int(row.get('Beacons', 0)) if pd.notna(row.get('Beacons')) else None,
-                    int(row.get('Data', 0)) if pd.notna(row.get('Data')) else None,
-                    int(row.get('per_s', 0)) if pd.notna(row.get('per_s')) else None,
-                    int(row.get('CH', 0)) if pd.notna(row.get('CH')) else None,
-                    int(row.get('MB', 0)) if pd.notna(row.get('MB')) else None,
-                    row.get('ENC', ''),
-                    row.get('CIPHER', ''),
-                    row.get('AUTH', ''),
-                    row.get('ESSID', '')
-                )
-                records.append(record)
+            with self._bulk_write(conn):
+                for start in range(0, len(records), batch_size):
+                    end = start + batch_size
+                    params = {
+                        'bssids': json.dumps(bssids[start:end]),
+                        'rows': json.dumps(records[start:end]),
+                        'last_ap': conn.execute('SELECT COALESCE(MAX(id), 0) FROM ap').fetchone()[0],
+                    }
+                    
+                    for statement in BULK_AP_REMOVE:
+                        conn.execute(statement, params)
+                    conn.execute(f'''
+                        INSERT INTO ap 
+                        (BSSID, PWR, Beacons, Data, per_s, CH, MB, ENC, CIPHER, AUTH, ESSID)
+                        SELECT {_json_columns(11)} FROM json_each(:rows) WHERE true
+                        ON CONFLICT (BSSID) DO UPDATE SET
+                            PWR = excluded.PWR, Beacons = excluded.Beacons, Data = excluded.Data,
+                            per_s = excluded.per_s, CH = excluded.CH, MB = excluded.MB,
+                            ENC = excluded.ENC, CIPHER = excluded.CIPHER, AUTH = excluded.AUTH,
+                            ESSID = excluded.ESSID
+                    ''', params)
+                    for statement in BULK_AP_ADD:
+                        conn.execute(statement, params)
             
-            # Insert or replace records
-            conn.executemany('''
-                INSERT OR REPLACE INTO ap 
-                (BSSID, PWR, Beacons, Data, per_s, CH, MB, ENC, CIPHER, AUTH, ESSID)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', records)
+            if session_id is not None:
+                observations = list(zip([session_id] * len(bssids), bssids, power, beacons, data, channels))
+                for start in range(0, len(observations), batch_size):
+                    conn.executemany('''
+                        INSERT INTO ap_observation (session_id, bssid, pwr, beacons, data, channel)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (session_id, bssid) DO UPDATE SET
+                            pwr = excluded.pwr, beacons = excluded.beacons,
+                            data = excluded.data, channel = excluded.channel
+                    ''', observations[start:start + batch_size])
             
             conn.commit()
     
-    def insert_stations(self, station_data: pd.DataFrame):
-        """Insert station data into database"""
+    def insert_stations(self, station_data: 'pd.DataFrame', batch_size: int = INSERT_BATCH_SIZE,
+                        session_id: Optional[int] = None):
+        """Insert or update station data, recording observations for a session"""
         if station_data.empty:
             return
         
+        from .parser import expand_compact
+        station_data = expand_compact(station_data)
+        
         with self.connect() as conn:
-            for _, row in station_data.iterrows():
-                # Insert station record
-                cursor = conn.execute('''
-                    INSERT OR REPLACE INTO sta 
+            self._insert_stations(conn, station_data, batch_size)
+            if session_id is not None:
+                self._insert_station_observations(conn, station_data, batch_size, session_id)
+            conn.commit()
+    
+    def _insert_stations(self, conn: sqlite3.Connection, station_data: 'pd.DataFrame', batch_size: int):
+        """Bulk upsert stations and their probes inside the caller's transaction
+        
+        A station already stored keeps its earliest first_seen, and its other
+        columns are only overwritten by a row seen at least as recently.
+        """
+        stations = _text_values(station_data, 'Station_MAC')
+        probed_essids = _text_values(station_data, 'Probed_ESSIDs')
+        records = list(zip(
+            stations,
+            _text_values(station_data, 'First_time_seen'),
+            _text_values(station_data, 'Last_time_seen'),
+            _int_values(station_data, 'Power'),
+            _int_values(station_data, 'packets'),
+            _text_values(station_data, 'BSSID'),
+            probed_essids,
+        ))
+        
+        probe_positions, probe_values = _split_probes(probed_essids)
+        
+        with self._bulk_write(conn):
+            for start in range(0, len(records), batch_size):
+                end = start + batch_size
+                batch_stations = json.dumps(stations[start:end])
+                existing = [row[0] for row in conn.execute(
+                    'SELECT station FROM sta WHERE station IN (SELECT value FROM json_each(?))',
+                    (batch_stations,)
+                )]
+                params = {
+                    'existing': json.dumps(existing),
+                    'last_station': conn.execute('SELECT COALESCE(MAX(id), 0) FROM sta').fetchone()[0],
+                    'last_probe': conn.execute('SELECT COALESCE(MAX(id), 0) FROM sta_probe').fetchone()[0],
+                }
+                
+                for statement in BULK_STATION_REMOVE:
+                    conn.execute(statement, params)
+                conn.execute('''
+                    INSERT INTO sta 
                     (station, first_seen, last_seen, power, packets, bssid, probed_essids)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row.get('Station_MAC', ''),
-                    row.get('First_time_seen', ''),
-                    row.get('Last_time_seen', ''),
-                    int(row.get('Power', 0)) if pd.notna(row.get('Power')) else None,
-                    int(row.get('packets', 0)) if pd.notna(row.get('packets')) else None,
-                    row.get('BSSID', ''),
-                    row.get('Probed_ESSIDs', '')
-                ))
+                    SELECT {columns} FROM json_each(?) WHERE true
+                    ON CONFLICT (station) DO UPDATE SET
+                        first_seen = CASE
+                            WHEN COALESCE(sta.first_seen, '') = ''
+                              OR (excluded.first_seen != '' AND excluded.first_seen < sta.first_seen)
+                            THEN excluded.first_seen ELSE sta.first_seen END,
+                        last_seen = MAX(COALESCE(sta.last_seen, ''), COALESCE(excluded.last_seen, '')),
+                        power = CASE WHEN {newer} THEN excluded.power ELSE sta.power END,
+                        packets = CASE WHEN {newer} THEN excluded.packets ELSE sta.packets END,
+                        bssid = CASE WHEN {newer} THEN excluded.bssid ELSE sta.bssid END,
+                        probed_essids = CASE WHEN {newer} THEN excluded.probed_essids ELSE sta.probed_essids END
+                '''.format(columns=_json_columns(7),
+                           newer="COALESCE(excluded.last_seen, '') >= COALESCE(sta.last_seen, '')"),
+                    (json.dumps(records[start:end]),))
                 
-                station_id = cursor.lastrowid
+                low = bisect.bisect_left(probe_positions, start)
+                high = bisect.bisect_left(probe_positions, end)
+                probes = list(zip((stations[position] for position in probe_positions[low:high]),
+                                  probe_values[low:high]))
+                self._intern_essids(conn, probe_values[low:high])
                 
-                # Parse and insert probed ESSIDs
-                probed_essids = row.get('Probed_ESSIDs', '')
-                if probed_essids and probed_essids.strip():
-                    # Split by comma and clean
-                    essids = [essid.strip().strip('"') for essid in probed_essids.split(',')]
-                    essids = [essid for essid in essids if essid]
-                    
-                    for essid in essids:
-                        conn.execute('''
-                            INSERT INTO probes (station_id, probe)
-                            VALUES (?, ?)
-                        ''', (station_id, essid))
-            
-            conn.commit()
+                # Upserted rows keep their ids, so every station is looked up by MAC
+                conn.execute('''
+                    INSERT OR IGNORE INTO sta_probe (station_id, essid_id)
+                    SELECT sta.id, essid.id FROM json_each(?) AS probe
+                    JOIN sta ON sta.station = json_extract(probe.value, '$[0]')
+                    JOIN essid ON essid.essid = json_extract(probe.value, '$[1]')
+                ''', (json.dumps(probes),))
+                
+                for statement in BULK_STATION_ADD:
+                    conn.execute(statement, params)
     
-    def execute_query(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
-        """Execute a custom SQL query"""
-        with self.connect() as conn:
-            cursor = conn.execute(query, params)
-            return cursor.fetchall()
+    @contextmanager
+    def _bulk_write(self, conn: sqlite3.Connection) -> Iterator[None]:
+        """Gate the summary row triggers off for a bulk write in the caller's transaction
+        
+        The bulk paths apply each batch's summary deltas with set-based
+        statements instead. They also write a whole batch per statement: SQLite
+        sets up a trigger program once per statement, so with executemany()
+        even a gated trigger costs a setup on every row.
+        """
+        conn.execute("UPDATE agg_state SET value = 1 WHERE name = 'bulk_write'")
+        try:
+            yield
+        finally:
+            conn.execute("UPDATE agg_state SET value = 0 WHERE name = 'bulk_write'")
     
-    def get_ap_stats(self) -> Dict[str, Any]:
-        """Get access point statistics"""
+    def _intern_essids(self, conn: sqlite3.Connection, essids: List[str]):
+        """Add ESSIDs to the dictionary"""
+        conn.execute('INSERT OR IGNORE INTO essid (essid) SELECT value FROM json_each(?)',
+                     (json.dumps(list(set(essids))),))
+    
+    def _insert_station_observations(self, conn: sqlite3.Connection, station_data: 'pd.DataFrame',
+                                     batch_size: int, session_id: int):
+        """Upsert one observation per station for a capture session"""
+        stations = _text_values(station_data, 'Station_MAC')
+        observations = list(zip(
+            [session_id] * len(stations),
+            stations,
+            _text_values(station_data, 'BSSID'),
+            _int_values(station_data, 'Power'),
+            _int_values(station_data, 'packets'),
+            _text_values(station_data, 'First_time_seen'),
+            _text_values(station_data, 'Last_time_seen'),
+        ))
+        
+        for start in range(0, len(observations), batch_size):
+            conn.executemany('''
+                INSERT INTO sta_observation
+                (session_id, station, bssid, power, packets, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id, station) DO UPDATE SET
+                    bssid = excluded.bssid, power = excluded.power, packets = excluded.packets,
+                    first_seen = excluded.first_seen, last_seen = excluded.last_seen
+            ''', observations[start:start + batch_size])
+    
+    def has_search_index(self) -> bool:
+        """Check whether the ESSID full-text index exists"""
+        return self._has_object('table', 'essid_fts')
+    
+    def search_essids(self, term: str, prefix: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """Find ESSIDs containing (or starting with) a term, case-insensitively
+        
+        Terms of three or more characters use the trigram index when it exists;
+        shorter terms fall back to a LIKE scan of the ESSID dictionary.
+        Databases from before the dictionary are scanned with LIKE directly.
+        """
+        has_dictionary = self._has_object('table', 'essid')
+        if has_dictionary and self.has_search_index() and len(term) >= 3:
+            # The whole term as one FTS5 phrase matches it as a substring
+            condition = 'e.id IN (SELECT rowid FROM essid_fts WHERE essid_fts MATCH ?)'
+            params = ['"' + term.replace('"', '""') + '"']
+        else:
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condition = "e.essid LIKE ? ESCAPE '\\'"
+            params = [f'%{escaped}%']
+        
+        if prefix:
+            condition += ' AND lower(substr(e.essid, 1, ?)) = lower(?)'
+            params += [len(term), term]
+        
+        if has_dictionary:
+            sql = f'''
+                SELECT e.essid, COALESCE(c.aps, 0), COALESCE(c.clients, 0), COALESCE(p.count, 0)
+                FROM essid e
+                LEFT JOIN agg_essid_clients c ON c.essid = e.essid
+                LEFT JOIN agg_probe_counts p ON p.probe = e.essid
+                WHERE {condition} AND (c.aps > 0 OR p.count > 0)
+                ORDER BY COALESCE(c.aps, 0) + COALESCE(p.count, 0) DESC, e.essid
+                LIMIT ?
+            '''
+        else:
+            # Counted from the ap, sta and probes tables every schema has
+            sql = f'''
+                SELECT essid, aps, clients, probes
+                FROM (
+                    SELECT e.essid,
+                           (SELECT COUNT(*) FROM ap WHERE ap.ESSID = e.essid) AS aps,
+                           (SELECT COUNT(DISTINCT sta.station) FROM ap JOIN sta ON sta.bssid = ap.BSSID
+                            WHERE ap.ESSID = e.essid) AS clients,
+                           (SELECT COUNT(DISTINCT station_id) FROM probes WHERE probes.probe = e.essid) AS probes
+                    FROM (SELECT ESSID AS essid FROM ap WHERE ESSID != ''
+                          UNION SELECT probe FROM probes WHERE probe != '') e
+                    WHERE {condition}
+                )
+                ORDER BY aps + probes DESC, essid
+                LIMIT ?
+            '''
+        
         with self.connect() as conn:
-            stats = {}
-            
-            # Total APs
-            result = conn.execute('SELECT COUNT(*) FROM ap').fetchone()
-            stats['total_aps'] = result[0]
-            
-            # APs by channel
-            results = conn.execute('''
-                SELECT CH as channel, COUNT(*) as count 
-                FROM ap 
-                WHERE CH IS NOT NULL 
-                GROUP BY CH 
-                ORDER BY CH
-            ''').fetchall()
-            stats['aps_by_channel'] = [{'channel': r[0], 'count': r[1]} for r in results]
-            
-            # APs by encryption
-            results = conn.execute('''
-                SELECT ENC as encryption, COUNT(*) as count 
-                FROM ap 
-                GROUP BY ENC 
-                ORDER BY count DESC
-            ''').fetchall()
-            stats['aps_by_encryption'] = [{'encryption': r[0], 'count': r[1]} for r in results]
+            results = conn.execute(sql, params + [limit]).fetchall()
             
-            # Top ESSIDs by client count
-            results = conn.execute('''
-                SELECT ap.ESSID, COUNT(DISTINCT sta.station) as clients
-                FROM ap 
-                LEFT JOIN sta ON ap.BSSID = sta.bssid
-                WHERE ap.ESSID != ''
-                GROUP BY ap.ESSID
-                ORDER BY clients DESC
-                LIMIT 10
-            ''').fetchall()
-            stats['top_essids_by_clients'] = [{'essid': r[0], 'clients': r[1]} for r in results]
-            
-            return stats
+            return [{'essid': r[0], 'aps': r[1], 'clients': r[2], 'probes': r[3]} for r in results]
     
-    def get_station_stats(self) -> Dict[str, Any]:
-        """Get station statistics"""
+    def get_signal_history(self, bssid: str) -> List[Dict[str, Any]]:
+        """Get the observations of one access point, oldest capture session first"""
         with self.connect() as conn:
-            stats = {}
-            
-            # Total stations
-            result = conn.execute('SELECT COUNT(*) FROM sta').fetchone()
-            stats['total_stations'] = result[0]
-            
-            # Stations with multiple probes
             results = conn.execute('''
-                SELECT sta.station, COUNT(probes.probe) as probe_count
-                FROM sta
-                LEFT JOIN probes ON sta.id = probes.station_id
-                GROUP BY sta.station
-                HAVING probe_count > 1
-                ORDER BY probe_count DESC
-                LIMIT 10
-            ''').fetchall()
-            stats['multi_probe_stations'] = [{'station': r[0], 'probes': r[1]} for r in results]
+                SELECT s.id, s.source, s.ingested_at, o.pwr, o.beacons, o.data, o.channel
+                FROM ap_observation o
+                JOIN capture_session s ON s.id = o.session_id
+                WHERE o.bssid = ?
+                ORDER BY s.id
+            ''', (bssid,)).fetchall()
             
-            # Most probed networks
-            results = conn.execute('''
-                SELECT probe, COUNT(*) as count
-                FROM probes
-                GROUP BY probe
-                ORDER BY count DESC
-                LIMIT 10
-            ''').fetchall()
-            stats['most_probed_networks'] = [{'network': r[0], 'count': r[1]} for r in results]
-            
-            return stats
+            return [{'session': r[0], 'source': r[1], 'ingested_at': r[2], 'pwr': r[3],
+                     'beacons': r[4], 'data': r[5], 'channel': r[6]} for r in results]
+    
+    def _query_ap_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Read access point statistics from the summary tables"""
+        stats = {}
+        
+        # Total APs
+        result = conn.execute("SELECT value FROM agg_totals WHERE name = 'ap'").fetchone()
+        stats['total_aps'] = result[0]
+        
+        # APs by channel
+        results = conn.execute('''
+            SELECT channel, count
+            FROM agg_ap_channel
+            ORDER BY channel
+        ''').fetchall()
+        stats['aps_by_channel'] = [{'channel': r[0], 'count': r[1]} for r in results]
+        
+        # APs by encryption
+        results = conn.execute('''
+            SELECT encryption, count
+            FROM agg_ap_encryption
+            ORDER BY count DESC
+        ''').fetchall()
+        stats['aps_by_encryption'] = [{'encryption': r[0], 'count': r[1]} for r in results]
+        
+        # Top ESSIDs by client count
+        results = conn.execute('''
+            SELECT essid, clients
+            FROM agg_essid_clients
+            ORDER BY clients DESC
+            LIMIT 10
+        ''').fetchall()
+        stats['top_essids_by_clients'] = [{'essid': r[0], 'clients': r[1]} for r in results]
+        
+        return stats
+    
+    def _query_station_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Read station statistics from the summary tables"""
+        stats = {}
+        
+        # Total stations
+        result = conn.execute("SELECT value FROM agg_totals WHERE name = 'sta'").fetchone()
+        stats['total_stations'] = result[0]
+        
+        # Stations with multiple probes
+        results = conn.execute('''
+            SELECT station, probes
+            FROM agg_station_probes
+            WHERE probes > 1
+            ORDER BY probes DESC
+            LIMIT 10
+        ''').fetchall()
+        stats['multi_probe_stations'] = [{'station': r[0], 'probes': r[1]} for r in results]
+        
+        # Most probed networks
+        results = conn.execute('''
+            SELECT probe, count
+            FROM agg_probe_counts
+            ORDER BY count DESC
+            LIMIT 10
+        ''').fetchall()
+        stats['most_probed_networks'] = [{'network': r[0], 'count': r[1]} for r in results]
+        
+        return stats
+    
+    def get_channel_activity(self) -> List[Tuple]:
+        """Get the channel, signal, data frames per second and maximum rate of every AP on a known channel"""
+        return self.connect().execute('SELECT CH, PWR, per_s, MB FROM ap WHERE CH > 0').fetchall()
     
     def get_network_graph_data(self) -> List[Dict[str, str]]:
         """Get data for network graph visualization"""
@@ -254,4 +890,15 @@ class WiFiDatabase:
                 WHERE sta.station != ''
             ''').fetchall()
             
-            return [{'ap': r[0], 'ap_name': r[1], 'station': r[2]} for r in results]
\ No newline at end of file
+            return [{'ap': r[0], 'ap_name': r[1], 'station': r[2]} for r in results]
+
+
+def as_database(db: Union[str, DatabaseReader]) -> DatabaseReader:
+    """Return ``db`` itself if it is a database or catalog, else open a WiFiDatabase at that path
+    
+    Lets the visualizer and reporters share the caller's connection instead of
+    opening the database again.
+    """
+    if isinstance(db, DatabaseReader):
+        return db
+    return WiFiDatabase(str(db))
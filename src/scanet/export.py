@@ -0,0 +1,85 @@
+"""
+Streaming writers for query results
+"""
+
+import csv
+import json
+from typing import Any, Iterable, List, TextIO
+
+
+EXPORT_FORMATS = ('table', 'csv', 'json', 'ndjson')
+
+
+def _json_default(value: Any) -> Any:
+    """Make the SQLite values json cannot encode (BLOBs) serializable"""
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# json.dumps() with options builds a new encoder per call; rows reuse this one
+_encode_json = json.JSONEncoder(ensure_ascii=False, default=_json_default).encode
+
+
+def write_rows(stream: TextIO, columns: List[str], rows: Iterable[Any], fmt: str = 'table') -> int:
+    """Write rows to a text stream one at a time, returning how many were written"""
+    writer = _WRITERS[fmt]
+    return writer(stream, columns, rows)
+
+
+def _write_table(stream: TextIO, columns: List[str], rows: Iterable[Any]) -> int:
+    """Write rows as the " | " separated table printed by scanet query"""
+    count = 0
+    for row in rows:
+        if count == 0:
+            header = " | ".join(columns)
+            stream.write(header + "\n")
+            stream.write("-" * len(header) + "\n")
+        stream.write(" | ".join(str(value) for value in row) + "\n")
+        count += 1
+    
+    if count == 0:
+        stream.write("No results found.\n")
+    return count
+
+
+def _write_csv(stream: TextIO, columns: List[str], rows: Iterable[Any]) -> int:
+    """Write a header line and one CSV line per row"""
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+    
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _write_json(stream: TextIO, columns: List[str], rows: Iterable[Any]) -> int:
+    """Write a JSON array of row objects"""
+    # One array, written element by element instead of built in memory
+    count = 0
+    stream.write("[")
+    for row in rows:
+        stream.write(("," if count else "") + "\n  " + _encode_json(dict(zip(columns, row))))
+        count += 1
+    
+    stream.write("\n]\n" if count else "]\n")
+    return count
+
+
+def _write_ndjson(stream: TextIO, columns: List[str], rows: Iterable[Any]) -> int:
+    """Write one JSON object per line"""
+    count = 0
+    for row in rows:
+        stream.write(_encode_json(dict(zip(columns, row))) + "\n")
+        count += 1
+    return count
+
+
+_WRITERS = {
+    'table': _write_table,
+    'csv': _write_csv,
+    'json': _write_json,
+    'ndjson': _write_ndjson,
+}
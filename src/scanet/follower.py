@@ -0,0 +1,70 @@
+"""
+Follow mode for live airodump-ng CSV files
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from .parser import AirodumpParser
+from .database import WiFiDatabase
+from .ingest import changed_rows
+
+
+class CaptureFollower:
+    """Keep a WiFiDatabase in sync with a CSV file airodump-ng keeps rewriting"""
+    
+    def __init__(self, csv_file: Path, db: WiFiDatabase,
+                 batch_size: int = AirodumpParser.DEFAULT_BATCH_SIZE):
+        self.csv_file = Path(csv_file)
+        self.db = db
+        self.batch_size = batch_size
+        self.parser = AirodumpParser()
+        
+        # Last seen row hash per BSSID / station MAC
+        self.ap_hashes: Dict[str, int] = {}
+        self.station_hashes: Dict[str, int] = {}
+        self._last_stat: Optional[Tuple[int, int]] = None
+        
+        # One capture session per followed run, created on the first refresh
+        self.session_id: Optional[int] = None
+    
+    def refresh(self) -> Tuple[int, int]:
+        """Store new or changed rows, returning (APs, stations) written"""
+        try:
+            stat = os.stat(self.csv_file)
+        except FileNotFoundError:
+            # airodump-ng replaces the file while rewriting it
+            return 0, 0
+        
+        file_state = (stat.st_size, stat.st_mtime_ns)
+        if file_state == self._last_stat:
+            return 0, 0
+        self._last_stat = file_state
+        
+        if self.session_id is None:
+            self.session_id = self.db.start_session(str(self.csv_file))
+        
+        ap_count = 0
+        station_count = 0
+        
+        for section, batch in self.parser.iter_batches(self.csv_file, batch_size=self.batch_size):
+            if section == 'ap':
+                changed, _ = changed_rows(batch, section, self.ap_hashes)
+                self.db.insert_access_points(changed, session_id=self.session_id)
+                ap_count += len(changed)
+            else:
+                changed, _ = changed_rows(batch, section, self.station_hashes)
+                self.db.insert_stations(changed, session_id=self.session_id)
+                station_count += len(changed)
+        
+        return ap_count, station_count
+    
+    def follow(self, interval: float = 5.0,
+               on_refresh: Optional[Callable[[int, int], None]] = None):
+        """Refresh every ``interval`` seconds until interrupted"""
+        while True:
+            ap_count, station_count = self.refresh()
+            if on_refresh and (ap_count or station_count):
+                on_refresh(ap_count, station_count)
+            time.sleep(interval)
@@ -0,0 +1,297 @@
+"""
+Incremental and parallel ingestion of airodump-ng captures into a database
+"""
+
+import glob
+import multiprocessing
+import os
+import queue
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from .parser import AirodumpParser, expand_compact
+from .cache import content_hash
+from .database import WiFiDatabase
+
+
+# Column identifying a row in each section of a capture
+SECTION_KEYS = {'ap': 'BSSID', 'station': 'Station_MAC'}
+
+
+def find_captures(sources: Iterable[str], pattern: str = '*.csv') -> List[Path]:
+    """Expand files, directories and glob patterns into a sorted list of files
+    
+    Directories are searched recursively for files matching ``pattern``.
+    """
+    captures = set()
+    
+    for source in sources:
+        if glob.has_magic(source):
+            matches = [Path(match) for match in glob.glob(source, recursive=True)]
+        elif os.path.isdir(source):
+            matches = list(Path(source).rglob(pattern))
+        else:
+            matches = [Path(source)]
+        
+        captures.update(match for match in matches if match.is_file())
+    
+    return sorted(captures)
+
+
+def row_fingerprints(batch: pd.DataFrame) -> List[int]:
+    """Hash every row of a parsed batch as a signed 64-bit integer
+    
+    Compact and plain batches of the same rows get the same fingerprints.
+    """
+    plain = expand_compact(batch)
+    columns = {}
+    for col in plain.columns:
+        if pd.api.types.is_numeric_dtype(plain[col].dtype):
+            columns[col] = plain[col].astype('float64')
+        else:
+            columns[col] = plain[col].astype(object)
+    
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+    return hashes.view(np.int64).tolist()
+
+
+def row_keys(batch: pd.DataFrame, section: str) -> List[str]:
+    """Return the key identifying each row of a parsed batch"""
+    return expand_compact(batch[[SECTION_KEYS[section]]]).iloc[:, 0].tolist()
+
+
+def changed_rows(batch: pd.DataFrame, section: str, known: Dict[str, int],
+                 keys: Optional[List[str]] = None) -> Tuple[pd.DataFrame, List[Tuple[str, int]]]:
+    """Return the rows whose fingerprint differs from ``known`` and their (key, fingerprint) pairs
+    
+    ``known`` is updated in place with the new fingerprints. ``keys`` are the
+    batch's row keys, if already known.
+    """
+    if keys is None:
+        keys = row_keys(batch, section)
+    
+    positions = []
+    fingerprints = []
+    for position, (key, fingerprint) in enumerate(zip(keys, row_fingerprints(batch))):
+        if known.get(key) != fingerprint:
+            known[key] = fingerprint
+            positions.append(position)
+            fingerprints.append((key, fingerprint))
+    
+    return batch.iloc[positions], fingerprints
+
+
+class CaptureDelta:
+    """Write a capture file to a database, skipping what its last ingest already wrote
+    
+    Files with the same size and mtime, or the same content hash, as last time
+    are skipped entirely. Otherwise only rows whose fingerprint changed are
+    written.
+    """
+    
+    def __init__(self, db: WiFiDatabase, csv_file: Path, digest: Optional[str] = None):
+        self.db = db
+        self.csv_file = Path(csv_file)
+        # Relative and absolute paths to one file share its records
+        self.source = str(self.csv_file.resolve())
+        self.digest = digest
+        
+        stat = os.stat(self.csv_file)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.previous = db.get_capture_file(self.source)
+        
+        self.session_id: Optional[int] = None
+        self.written = {'ap': 0, 'station': 0}
+        self.unchanged_rows = {'ap': 0, 'station': 0}
+        self.skipped = False
+    
+    @property
+    def known_hash(self) -> Optional[str]:
+        """Content hash recorded by the last ingest, if any"""
+        return self.previous['content_hash'] if self.previous else None
+    
+    def get_digest(self) -> str:
+        """Return the file's content hash, computing it on first use"""
+        if self.digest is None:
+            self.digest = content_hash(self.csv_file)
+        return self.digest
+    
+    def unchanged(self, check_hash: bool = True) -> bool:
+        """Check whether the file is unchanged since its last ingest
+        
+        A file with the same size and mtime is unchanged. Otherwise its content
+        hash is compared, unless ``check_hash`` is False.
+        """
+        if self.previous is None:
+            return False
+        
+        if (self.previous['size'], self.previous['mtime_ns']) == (self.size, self.mtime_ns):
+            self.skipped = True
+            return True
+        
+        if not check_hash or self.get_digest() != self.known_hash:
+            return False
+        
+        # Touched or copied without changes; remember the new mtime
+        self.db.record_capture_file(self.source, self.previous['session_id'], self.digest,
+                                    self.size, self.mtime_ns)
+        self.skipped = True
+        return True
+    
+    def write(self, section: str, batch: pd.DataFrame):
+        """Write the rows of a batch that changed since the last ingest"""
+        if self.session_id is None:
+            self._start()
+        
+        # Only this batch's stored fingerprints are loaded, however large the capture
+        keys = row_keys(batch, section)
+        known = self.db.get_row_fingerprints(self.source, section, keys)
+        changed, fingerprints = changed_rows(batch, section, known, keys)
+        
+        if section == 'ap':
+            self.db.insert_access_points(changed, session_id=self.session_id)
+        else:
+            self.db.insert_stations(changed, session_id=self.session_id)
+        
+        # Fingerprints are stored after their rows, so an interrupted ingest
+        # rewrites rows rather than losing them
+        self.db.record_row_fingerprints(self.source, section, fingerprints)
+        
+        self.written[section] += len(changed)
+        self.unchanged_rows[section] += len(batch) - len(changed)
+    
+    def finish(self):
+        """Record the file as ingested"""
+        if self.session_id is None:
+            self._start()
+        self.db.record_capture_file(self.source, self.session_id, self.get_digest(),
+                                    self.size, self.mtime_ns)
+    
+    def _start(self):
+        """Resolve the capture session; a file that grew keeps its session"""
+        if self.previous is not None:
+            self.session_id = self.previous['session_id']
+        else:
+            self.session_id = self.db.start_session(self.source, self.get_digest())
+
+
+def _parse_capture(csv_file: Path, batch_size: int, known_hash: Optional[str], batches) -> str:
+    """Worker: hash one capture and put its ('ap' | 'station', DataFrame) batches on ``batches``
+    
+    The content hash is put first and None last. No batches are put when the
+    content hash equals ``known_hash``. Returns the content hash.
+    """
+    try:
+        digest = content_hash(csv_file)
+        batches.put(digest)
+        
+        if digest != known_hash:
+            # Compact frames are several times cheaper to pickle back to the writer
+            parser = AirodumpParser(compact=True)
+            for batch in parser.iter_batches(csv_file, batch_size=batch_size):
+                batches.put(batch)
+        return digest
+    finally:
+        batches.put(None)
+
+
+class ParallelIngestor:
+    """Parse captures on a process pool and write them through a single writer
+    
+    Captures are written in input order. Each worker streams its batches
+    through a bounded queue, so parsed data waiting on the writer stays at a
+    few batches per worker however large the captures are.
+    """
+    
+    # Batches a worker may parse ahead of the writer
+    QUEUED_BATCHES = 2
+    
+    def __init__(self, db: WiFiDatabase, workers: Optional[int] = None,
+                 batch_size: int = AirodumpParser.DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+    
+    def ingest(self, csv_files: List[Path],
+               on_file: Optional[Callable[[CaptureDelta], None]] = None) -> Dict[str, int]:
+        """Ingest all captures, returning totals of files, skipped files, APs and stations written"""
+        totals = {'files': 0, 'skipped': 0, 'aps': 0, 'stations': 0}
+        pending_files = deque(csv_files)
+        in_flight: Deque[Tuple[CaptureDelta, Optional[Future], Any]] = deque()
+        
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                while pending_files or in_flight:
+                    # Keep the workers busy on the captures after the one being written
+                    while pending_files and len(in_flight) < self.workers * 2:
+                        delta = CaptureDelta(self.db, pending_files.popleft())
+                        
+                        # Content hashes are computed by the workers
+                        if delta.unchanged(check_hash=False):
+                            in_flight.append((delta, None, None))
+                            continue
+                        
+                        batches = manager.Queue(self.QUEUED_BATCHES)
+                        future = pool.submit(_parse_capture, delta.csv_file, self.batch_size,
+                                             delta.known_hash, batches)
+                        in_flight.append((delta, future, batches))
+                    
+                    delta, future, batches = in_flight[0]
+                    if future is not None:
+                        self._write(delta, future, batches)
+                    in_flight.popleft()
+                    self._count(delta, totals, on_file)
+            finally:
+                self._abandon(in_flight)
+        
+        return totals
+    
+    def _write(self, delta: CaptureDelta, future: Future, batches):
+        """Write one capture's batches as its worker queues them"""
+        digest = batches.get()
+        if digest is None:
+            # The worker failed before hashing; raise its error
+            future.result()
+        delta.digest = digest
+        
+        if digest == delta.known_hash:
+            batches.get()
+            delta.unchanged()
+            return
+        
+        for section, batch in iter(batches.get, None):
+            delta.write(section, batch)
+        
+        # A worker that failed part way must not be recorded as ingested
+        future.result()
+        delta.finish()
+    
+    def _abandon(self, in_flight: Deque[Tuple[CaptureDelta, Optional[Future], Any]]):
+        """Cancel captures not yet written, draining the queues of running workers
+        
+        A worker blocked on a full queue would otherwise keep the pool from
+        shutting down.
+        """
+        for _, future, batches in in_flight:
+            if future is None or future.cancel():
+                continue
+            while not future.done():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+    
+    def _count(self, delta: CaptureDelta, totals: Dict[str, int],
+               on_file: Optional[Callable[[CaptureDelta], None]]):
+        """Add one finished capture to the totals and report it"""
+        totals['files'] += 1
+        totals['skipped'] += delta.skipped
+        totals['aps'] += delta.written['ap']
+        totals['stations'] += delta.written['station']
+        
+        if on_file:
+            on_file(delta)
@@ -2,16 +2,103 @@
 CSV Parser for airodump-ng files
 """
 
+import numpy as np
 import pandas as pd
 import re
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterator, Optional
+
+
+# Value stored by airodump-ng in the BSSID column of unassociated stations
+NOT_ASSOCIATED = '(not associated)'
+
+# Hex digit value for every ASCII code, used to pack MAC addresses
+_HEX_VALUES = np.zeros(256, dtype=np.uint64)
+for _digit in '0123456789abcdef':
+    _HEX_VALUES[ord(_digit)] = int(_digit, 16)
+    _HEX_VALUES[ord(_digit.upper())] = int(_digit, 16)
+
+_NIBBLE_SHIFTS = np.arange(44, -1, -4, dtype=np.uint64)
+
+
+def pack_macs(macs: pd.Series) -> pd.Series:
+    """Pack 'AA:BB:CC:DD:EE:FF' strings into a nullable UInt64 series
+    
+    Values that are not MAC addresses, such as '(not associated)', become <NA>.
+    """
+    digits = macs.astype(str).str.replace(':', '', regex=False)
+    valid = digits.str.fullmatch(r'[0-9A-Fa-f]{12}').fillna(False).to_numpy(dtype=bool)
+    
+    packed = np.zeros(len(macs), dtype=np.uint64)
+    if valid.any():
+        chars = np.frombuffer(''.join(digits[valid]).encode('ascii'), dtype=np.uint8)
+        nibbles = _HEX_VALUES[chars].reshape(-1, 12)
+        packed[valid] = np.bitwise_or.reduce(nibbles << _NIBBLE_SHIFTS, axis=1)
+    
+    return pd.Series(pd.arrays.IntegerArray(packed, ~valid), index=macs.index, name=macs.name)
+
+
+def unpack_macs(packed: pd.Series, missing: str = '') -> pd.Series:
+    """Turn a UInt64 series from ``pack_macs`` back into upper-case MAC strings"""
+    values = packed.to_numpy(dtype=np.uint64, na_value=0)
+    octets = (values[:, None] >> np.arange(40, -1, -8, dtype=np.uint64)) & np.uint64(0xFF)
+    
+    hex_text = np.char.zfill(np.char.upper(np.char.mod('%x', octets.astype(np.int64))), 2)
+    macs = [':'.join(row) for row in hex_text.tolist()]
+    
+    unpacked = pd.Series(macs, index=packed.index, name=packed.name, dtype=object)
+    unpacked[packed.isna().to_numpy()] = missing
+    return unpacked
+
+
+def expand_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a DataFrame parsed in compact mode back to plain column types
+    
+    Used by the database layer, which stores MACs and labels as text.
+    """
+    if df.empty:
+        return df
+    
+    df = df.copy()
+    for col in df.columns:
+        dtype = df[col].dtype
+        if dtype == 'UInt64':
+            missing = NOT_ASSOCIATED if col == 'BSSID' and 'Station_MAC' in df.columns else ''
+            df[col] = unpack_macs(df[col], missing)
+        elif isinstance(dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in 'iu':
+            df[col] = df[col].astype('float64')
+    
+    return df
+
+
+def _smallest_int(values: pd.Series) -> pd.Series:
+    """Downcast a numeric series to the smallest nullable integer type that fits"""
+    non_null = values.dropna()
+    if not (non_null == non_null.round()).all():
+        return values
+    
+    low = non_null.min() if len(non_null) else 0
+    high = non_null.max() if len(non_null) else 0
+    for dtype in ('Int8', 'Int16', 'Int32', 'Int64'):
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    
+    return values
 
 
 class AirodumpParser:
     """Parse airodump-ng CSV files into structured data"""
     
-    def __init__(self):
+    # Rows held in memory per streamed batch
+    DEFAULT_BATCH_SIZE = 50000
+    
+    def __init__(self, compact: bool = False):
+        # Compact mode packs MACs into UInt64, labels into categoricals and
+        # numbers into the smallest fitting integer type
+        self.compact = compact
         self.ap_columns = [
             'BSSID', 'PWR', 'Beacons', 'Data', 'per_s', 'CH', 'MB', 
             'ENC', 'CIPHER', 'AUTH', 'ESSID'
@@ -23,88 +110,143 @@ class AirodumpParser:
     
     def parse(self, csv_file: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Parse airodump CSV file and return AP and Station dataframes"""
+        ap_batches = []
+        station_batches = []
         
-        with open(csv_file, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        # A single unbounded batch per section keeps the DataFrames identical
+        # to a whole-file parse
+        for section, batch in self.iter_batches(csv_file, batch_size=None):
+            if section == 'ap':
+                ap_batches.append(batch)
+            else:
+                station_batches.append(batch)
         
-        # Split the file content into AP and Station sections
-        sections = content.split('\n\n')
+        ap_data = self._concat_batches(ap_batches)
+        station_data = self._concat_batches(station_batches)
         
-        ap_section = None
-        station_section = None
+        return ap_data, station_data
+    
+    def iter_batches(self, csv_file: Path,
+                     batch_size: Optional[int] = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Stream an airodump CSV file as ('ap' | 'station', DataFrame) batches
         
-        for section in sections:
-            if section.strip().startswith('BSSID'):
-                ap_section = section
-            elif section.strip().startswith('Station MAC'):
-                station_section = section
+        The file is read line by line and at most ``batch_size`` lines
+        are held in memory at once, so peak memory does not depend on the
+        capture size. ``batch_size=None`` yields one batch per section.
+        """
+        section = None
+        lines = []
         
-        ap_data = self._parse_ap_section(ap_section) if ap_section else pd.DataFrame()
-        station_data = self._parse_station_section(station_section) if station_section else pd.DataFrame()
+        with open(csv_file, 'r', encoding='utf-8', errors='ignore') as f:
+            for raw_line in f:
+                # Sections are separated by empty lines
+                if raw_line == '\n':
+                    if lines:
+                        batch = self._build_batch(section, lines)
+                        lines = []
+                        if batch is not None:
+                            yield section, batch
+                    section = None
+                    continue
+                
+                line = raw_line.strip()
+                if not line:
+                    continue
+                
+                # The first line of a section is its header
+                if section is None:
+                    if line.startswith('BSSID'):
+                        section = 'ap'
+                    elif line.startswith('Station MAC'):
+                        section = 'station'
+                    else:
+                        section = 'unknown'
+                    continue
+                
+                if section == 'unknown':
+                    continue
+                
+                lines.append(line)
+                if batch_size and len(lines) >= batch_size:
+                    batch = self._build_batch(section, lines)
+                    lines = []
+                    if batch is not None:
+                        yield section, batch
         
-        return ap_data, station_data
+        if lines:
+            batch = self._build_batch(section, lines)
+            if batch is not None:
+                yield section, batch
     
-    def _parse_ap_section(self, section: str) -> pd.DataFrame:
-        """Parse Access Points section"""
-        lines = [line.strip() for line in section.split('\n') if line.strip()]
+    def _build_batch(self, section: str, lines: List[str]) -> Optional[pd.DataFrame]:
+        """Tokenize stripped data lines of a section into a cleaned DataFrame"""
+        columns = self.ap_columns if section == 'ap' else self.station_columns
+        rows = self._tokenize_lines(lines, len(columns))
         
-        if not lines:
-            return pd.DataFrame()
+        if not rows:
+            return None
+        
+        df = pd.DataFrame(rows, columns=columns)
         
-        # Clean header line
-        header = lines[0].replace(' ', '').split(',')
-        data_lines = lines[1:]
+        if section == 'ap':
+            return self._clean_ap_data(df)
+        return self._clean_station_data(df)
+    
+    def _tokenize_lines(self, lines: List[str], n_columns: int) -> List[List[str]]:
+        """Split stripped data lines into their first ``n_columns`` fields
         
-        parsed_data = []
-        for line in data_lines:
-            if not line:
+        Lines with fewer fields are dropped. Unquoted lines, the bulk of any
+        capture, are split with ``str.split`` directly. Quoted lines go through
+        ``_split_quoted_line``, which matches ``_parse_csv_line`` exactly.
+        """
+        rows = []
+        for line in lines:
+            if '"' in line:
+                parts = self._split_quoted_line(line)
+                if len(parts) >= n_columns:
+                    rows.append(parts[:n_columns])
                 continue
             
-            # Handle quoted ESSID values
-            parts = self._parse_csv_line(line)
-            if len(parts) >= len(self.ap_columns):
-                # Take only the expected number of columns
-                row_data = parts[:len(self.ap_columns)]
-                parsed_data.append(row_data)
-        
-        if not parsed_data:
-            return pd.DataFrame()
+            # maxsplit leaves everything past the last wanted field unsplit
+            parts = line.split(',', n_columns)
+            if len(parts) >= n_columns:
+                rows.append([part.strip() for part in parts[:n_columns]])
         
-        df = pd.DataFrame(parsed_data, columns=self.ap_columns)
-        
-        # Clean and convert data types
-        df = self._clean_ap_data(df)
-        
-        return df
+        return rows
     
-    def _parse_station_section(self, section: str) -> pd.DataFrame:
-        """Parse Stations section"""
-        lines = [line.strip() for line in section.split('\n') if line.strip()]
+    def _split_quoted_line(self, line: str) -> List[str]:
+        """Split a line containing quotes with airodump's quoting rules
         
-        if not lines:
-            return pd.DataFrame()
-        
-        data_lines = lines[1:]  # Skip header
+        Every quote toggles quoting and is dropped, so after splitting on quotes
+        the even segments are unquoted and only their commas separate fields.
+        """
+        parts = []
+        current = ''
         
-        parsed_data = []
-        for line in data_lines:
-            if not line:
+        for index, segment in enumerate(line.split('"')):
+            if index % 2:
+                current += segment
+                continue
+            
+            pieces = segment.split(',')
+            if len(pieces) == 1:
+                current += segment
                 continue
             
-            parts = self._parse_csv_line(line)
-            if len(parts) >= len(self.station_columns):
-                row_data = parts[:len(self.station_columns)]
-                parsed_data.append(row_data)
+            parts.append((current + pieces[0]).strip())
+            parts.extend(piece.strip() for piece in pieces[1:-1])
+            current = pieces[-1]
         
-        if not parsed_data:
+        parts.append(current.strip())
+        return parts
+    
+    def _concat_batches(self, batches: List[pd.DataFrame]) -> pd.DataFrame:
+        """Join streamed batches back into a single DataFrame"""
+        if not batches:
             return pd.DataFrame()
-        
-        df = pd.DataFrame(parsed_data, columns=self.station_columns)
-        
-        # Clean and convert data types
-        df = self._clean_station_data(df)
-        
-        return df
+        if len(batches) == 1:
+            return batches[0]
+        return pd.concat(batches, ignore_index=True)
     
     def _parse_csv_line(self, line: str) -> List[str]:
         """Parse a CSV line handling quoted fields"""
@@ -153,6 +295,9 @@ class AirodumpParser:
             if col in df.columns:
                 df[col] = df[col].astype(str).str.strip()
         
+        if self.compact:
+            df = self._compact_data(df, numeric_cols, ['BSSID'], ['ENC', 'CIPHER', 'AUTH'])
+        
         return df
     
     def _clean_station_data(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -176,4 +321,24 @@ class AirodumpParser:
         if 'Probed_ESSIDs' in df.columns:
             df['Probed_ESSIDs'] = df['Probed_ESSIDs'].str.replace('"', '').str.strip()
         
+        if self.compact:
+            df = self._compact_data(df, numeric_cols, ['Station_MAC', 'BSSID'], [])
+        
+        return df
+    
+    def _compact_data(self, df: pd.DataFrame, numeric_cols: List[str],
+                      mac_cols: List[str], category_cols: List[str]) -> pd.DataFrame:
+        """Shrink cleaned columns to their compact representation"""
+        for col in numeric_cols:
+            if col in df.columns:
+                df[col] = _smallest_int(df[col])
+        
+        for col in mac_cols:
+            if col in df.columns:
+                df[col] = pack_macs(df[col])
+        
+        for col in category_cols:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
         return df
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Quick previews of a capture, computed from its parsed batches without ingesting it
+"""
+
+import sqlite3
+from typing import Iterable, List, Set, Tuple
+import pandas as pd
+from .catalog import RelationReader
+from .parser import expand_compact
+
+
+# Plain tables holding the last row seen for each AP and station. Unlike an
+# ingest, there are no triggers, summary tables, history or fingerprints.
+PREVIEW_TABLES = '''
+CREATE TABLE ap (
+    BSSID TEXT PRIMARY KEY, PWR INTEGER, Beacons INTEGER, Data INTEGER, per_s INTEGER,
+    CH INTEGER, MB INTEGER, ENC TEXT, CIPHER TEXT, AUTH TEXT, ESSID TEXT
+);
+CREATE TABLE sta (
+    station TEXT PRIMARY KEY, first_seen TEXT, last_seen TEXT, power INTEGER,
+    packets INTEGER, bssid TEXT, probed_essids TEXT
+);
+CREATE TABLE probes (
+    station TEXT, probe TEXT, PRIMARY KEY (station, probe)
+) WITHOUT ROWID;
+CREATE VIEW associations AS
+    SELECT ap.BSSID AS bssid, ap.ESSID AS essid, sta.station
+    FROM ap JOIN sta ON sta.bssid = ap.BSSID;
+'''
+
+# (table, parser columns, integer columns) of each section
+PREVIEW_SECTIONS = {
+    'ap': ('ap', ['BSSID', 'PWR', 'Beacons', 'Data', 'per_s', 'CH', 'MB', 'ENC', 'CIPHER', 'AUTH', 'ESSID'],
+           {'PWR', 'Beacons', 'Data', 'per_s', 'CH', 'MB'}),
+    'station': ('sta', ['Station_MAC', 'First_time_seen', 'Last_time_seen', 'Power', 'packets', 'BSSID',
+                        'Probed_ESSIDs'],
+                {'Power', 'packets'}),
+}
+
+
+def _rows(batch: pd.DataFrame, columns: List[str], integers: Set[str]) -> List[Tuple]:
+    """Return a batch's columns as row tuples, None for missing values
+    
+    Numbers are passed as floats; the INSERT casts them to integers.
+    """
+    batch = expand_compact(batch).reindex(columns=columns)
+    values = []
+    for col in columns:
+        if col in integers:
+            values.append(pd.to_numeric(batch[col], errors='coerce').astype('float64').tolist())
+        else:
+            values.append(batch[col].astype(object).where(batch[col].notna(), None).tolist())
+    return list(zip(*values))
+
+
+class CapturePreview(RelationReader):
+    """Statistics, chart data and report tables of one capture, held in memory
+    
+    The parsed batches are loaded into plain in-memory tables, so a preview
+    costs little more than parsing the capture. Nothing is written to disk.
+    """
+    
+    def __init__(self, batches: Iterable[Tuple[str, pd.DataFrame]]):
+        super().__init__(':memory:')
+        conn = self.connect()
+        conn.executescript(PREVIEW_TABLES)
+        
+        with conn:
+            for section, batch in batches:
+                self._load(conn, section, batch)
+    
+    def _load(self, conn: sqlite3.Connection, section: str, batch: pd.DataFrame):
+        """Insert one batch; a later row of an AP or station replaces the earlier one"""
+        table, columns, integers = PREVIEW_SECTIONS[section]
+        rows = _rows(batch, columns, integers)
+        placeholders = ', '.join('CAST(? AS INTEGER)' if col in integers else '?' for col in columns)
+        conn.executemany(f'INSERT OR REPLACE INTO {table} VALUES ({placeholders})', rows)
+        
+        if section == 'station':
+            probes = [(row[0], essid.strip().strip('"'))
+                      for row in rows if isinstance(row[-1], str)
+                      for essid in row[-1].split(',') if essid.strip().strip('"')]
+            conn.executemany('INSERT OR IGNORE INTO probes VALUES (?, ?)', probes)
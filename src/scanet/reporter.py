@@ -5,17 +5,18 @@ Report generation module for HTML and PDF outputs
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from jinja2 import Template
 import pdfkit
-from .database import WiFiDatabase
+from .database import DatabaseReader, as_database
+from .spectrum import analyze_channels, quietest_channels
 
 
 class HTMLReporter:
     """Generate HTML reports from WiFi analysis data"""
     
-    def __init__(self, db_path: str):
-        self.db = WiFiDatabase(db_path)
+    def __init__(self, db: Union[str, DatabaseReader]):
+        self.db = as_database(db)
         self.template = self._get_html_template()
     
     def generate(self, output_path: str, charts: Dict[str, str]):
@@ -37,6 +38,7 @@ class HTMLReporter:
             'station_stats': station_stats,
             'ap_data': ap_data,
             'station_data': station_data,
+            'channel_congestion': quietest_channels(analyze_channels(self.db)),
             'charts': charts
         }
         
@@ -160,7 +162,7 @@ class HTMLReporter:
             margin: 20px 0;
         }
         
-        .chart-container img {
+        .chart-container img, .chart-container svg {
             max-width: 100%;
             height: auto;
             border-radius: 8px;
@@ -233,6 +235,10 @@ class HTMLReporter:
     </style>
 </head>
 <body>
+    {# SVG charts are inlined as markup, PNG charts embedded as base64 images #}
+    {% macro chart(name, alt) -%}
+    {% if charts[name].startswith('<svg') %}{{ charts[name] }}{% else %}<img src="data:image/png;base64,{{ charts[name] }}" alt="{{ alt }}">{% endif %}
+    {%- endmacro %}
     <div class="header">
         <h1>📡 {{ title }}</h1>
         <p>Generated on {{ generated_at }}</p>
@@ -260,30 +266,62 @@ class HTMLReporter:
     <div class="section">
         <h2>📊 Access Points by Channel</h2>
         <div class="chart-container">
-            <img src="data:image/png;base64,{{ charts.aps_by_channel }}" alt="APs by Channel">
+            {{ chart('aps_by_channel', 'APs by Channel') }}
         </div>
     </div>
     
+    {% if charts.channel_interference %}
+    <div class="section">
+        <h2>📶 Channel Interference</h2>
+        <p>Interference each channel receives from APs on the same and overlapping channels, weighted by their signal and airtime. Channels are listed from least to most interference.</p>
+        <div class="chart-container">
+            {{ chart('channel_interference', 'Channel Interference') }}
+        </div>
+        <table>
+            <thead>
+                <tr>
+                    <th>Channel</th>
+                    <th>APs</th>
+                    <th>Interference</th>
+                    <th>From Same Channel</th>
+                </tr>
+            </thead>
+            <tbody>
+                {% for channel in channel_congestion %}
+                <tr>
+                    <td>{{ channel.channel }}</td>
+                    <td>{{ channel.aps }}</td>
+                    <td>{{ '%.1f dBm'|format(channel.interference_dbm) if channel.interference_dbm is not none else 'None' }}</td>
+                    <td>{{ '%.0f%%'|format(channel.co_channel * 100) }}</td>
+                </tr>
+                {% endfor %}
+            </tbody>
+        </table>
+    </div>
+    {% endif %}
+    
     <div class="section">
         <h2>🔒 Encryption Distribution</h2>
         <div class="chart-container">
-            <img src="data:image/png;base64,{{ charts.aps_by_encryption }}" alt="APs by Encryption">
+            {{ chart('aps_by_encryption', 'APs by Encryption') }}
         </div>
     </div>
     
     <div class="section">
         <h2>👥 Top Networks by Client Count</h2>
         <div class="chart-container">
-            <img src="data:image/png;base64,{{ charts.top_aps_by_clients }}" alt="Top APs by Clients">
+            {{ chart('top_aps_by_clients', 'Top APs by Clients') }}
         </div>
     </div>
     
+    {% if charts.network_graph %}
     <div class="section">
         <h2>🕸️ Network Topology</h2>
         <div class="chart-container">
-            <img src="data:image/png;base64,{{ charts.network_graph }}" alt="Network Graph">
+            {{ chart('network_graph', 'Network Graph') }}
         </div>
     </div>
+    {% endif %}
     
     <div class="section">
         <h2>📋 Access Points Details</h2>
@@ -367,8 +405,8 @@ class HTMLReporter:
 class PDFReporter:
     """Generate PDF reports from HTML reports"""
     
-    def __init__(self, db_path: str):
-        self.db = WiFiDatabase(db_path)
+    def __init__(self, db: Union[str, DatabaseReader]):
+        self.db = as_database(db)
     
     def generate(self, html_file: str, output_path: str):
         """Convert HTML report to PDF"""
@@ -387,7 +425,7 @@ class PDFReporter:
             }
             
             pdfkit.from_file(html_file, output_path, options=options)
-            
+        
         except Exception as e:
             # Fallback: create a simple text-based PDF info
             self._create_fallback_pdf(output_path, str(e))
@@ -0,0 +1,600 @@
+"""
+SQL for the tables maintained alongside the ap, sta and sta_probe tables
+"""
+
+# Schema version stored in PRAGMA user_version by WiFiDatabase.create_tables
+SCHEMA_VERSION = 4
+
+
+# One row per ingested capture, with per-capture observations of every AP and
+# station so signal history survives the current-state upserts. capture_file
+# and capture_row remember what each file contributed, so unchanged files and
+# rows are skipped when it is ingested again.
+HISTORY_TABLES = '''
+CREATE TABLE IF NOT EXISTS capture_session (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT,
+    content_hash TEXT UNIQUE,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS ap_observation (
+    session_id INTEGER NOT NULL,
+    bssid TEXT NOT NULL,
+    pwr INTEGER,
+    beacons INTEGER,
+    data INTEGER,
+    channel INTEGER,
+    PRIMARY KEY (session_id, bssid),
+    FOREIGN KEY (session_id) REFERENCES capture_session(id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ap_observation_bssid ON ap_observation(bssid, session_id);
+
+CREATE TABLE IF NOT EXISTS sta_observation (
+    session_id INTEGER NOT NULL,
+    station TEXT NOT NULL,
+    bssid TEXT,
+    power INTEGER,
+    packets INTEGER,
+    first_seen TEXT,
+    last_seen TEXT,
+    PRIMARY KEY (session_id, station),
+    FOREIGN KEY (session_id) REFERENCES capture_session(id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sta_observation_station ON sta_observation(station, session_id);
+
+CREATE TABLE IF NOT EXISTS capture_file (
+    source TEXT PRIMARY KEY,
+    session_id INTEGER,
+    content_hash TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES capture_session(id)
+);
+
+-- Fingerprint of each AP / station row as last written from a capture file
+CREATE TABLE IF NOT EXISTS capture_row (
+    source TEXT NOT NULL,
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    PRIMARY KEY (source, section, key)
+) WITHOUT ROWID;
+'''
+
+
+# Triggers redefined in version 2, dropped so AGGREGATE_TRIGGERS recreates them
+REPLACED_TRIGGERS = '''
+DROP TRIGGER IF EXISTS trg_ap_agg_update;
+DROP TRIGGER IF EXISTS trg_sta_agg_update;
+'''
+
+
+# Version 2 makes sta.station and sta_probe(station_id, essid_id) unique. Older
+# databases keep the newest row of each station and one copy of each probe.
+DEDUPLICATE_STATIONS = '''
+UPDATE sta_probe
+    SET station_id = (SELECT MAX(newest.id) FROM sta AS old JOIN sta AS newest
+                      ON newest.station = old.station
+                      WHERE old.id = sta_probe.station_id)
+    WHERE station_id NOT IN (SELECT MAX(id) FROM sta GROUP BY station);
+DELETE FROM sta WHERE id NOT IN (SELECT MAX(id) FROM sta GROUP BY station);
+DELETE FROM sta_probe WHERE id NOT IN (SELECT MIN(id) FROM sta_probe GROUP BY station_id, essid_id);
+
+DROP INDEX IF EXISTS idx_sta_station;
+'''
+
+
+# Version 4 replaces the probes table, which repeated the probed ESSID text on
+# every row, with sta_probe rows pointing into the essid dictionary. Triggers
+# whose bodies read probes are dropped so AGGREGATE_TRIGGERS recreates them.
+INTERN_PROBES = '''
+INSERT OR IGNORE INTO essid (essid) SELECT DISTINCT probe FROM probes WHERE probe != '';
+INSERT INTO sta_probe (id, station_id, essid_id)
+    SELECT probes.id, probes.station_id, essid.id
+    FROM probes JOIN essid ON essid.essid = probes.probe;
+DROP TABLE probes;
+
+DROP TRIGGER IF EXISTS trg_sta_agg_insert;
+DROP TRIGGER IF EXISTS trg_sta_agg_delete;
+DROP TRIGGER IF EXISTS trg_sta_agg_update;
+'''
+
+
+# Read-only view with the columns of the old probes table, for existing queries
+PROBES_VIEW = '''
+CREATE VIEW IF NOT EXISTS probes AS
+    SELECT sta_probe.id, sta_probe.station_id, essid.essid AS probe
+    FROM sta_probe JOIN essid ON essid.id = sta_probe.essid_id;
+'''
+
+
+# Indexes on the ap, sta and sta_probe tables, as (name, table, columns, unique).
+# Created by WiFiDatabase.create_tables and offered by the query advisor to
+# databases that lack them.
+INDEXES = [
+    ('idx_ap_bssid', 'ap', 'BSSID', False),
+    ('idx_ap_channel', 'ap', 'CH', False),
+    ('idx_ap_essid', 'ap', 'ESSID', False),
+    ('idx_sta_bssid', 'sta', 'bssid', False),
+    ('idx_sta_station_unique', 'sta', 'station', True),
+    # Covering indexes for station -> probes and probe -> stations
+    ('idx_sta_probe_station', 'sta_probe', 'station_id, essid_id', True),
+    ('idx_sta_probe_essid', 'sta_probe', 'essid_id, station_id', False),
+]
+
+
+def index_sql(name: str, table: str, columns: str, unique: bool = False) -> str:
+    """Return the CREATE INDEX statement for one index"""
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    return f'CREATE {kind} IF NOT EXISTS {name} ON {table}({columns})'
+
+
+# Materialized aggregates read by WiFiDatabase.get_ap_stats / get_station_stats.
+# agg_essid_station counts the ap/sta row pairs linking each ESSID to each
+# station, so agg_essid_clients.clients is a distinct station count.
+AGGREGATE_TABLES = '''
+CREATE TABLE IF NOT EXISTS agg_totals (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS agg_ap_channel (
+    channel INTEGER,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_agg_ap_channel ON agg_ap_channel(channel);
+
+CREATE TABLE IF NOT EXISTS agg_ap_encryption (
+    encryption TEXT,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_agg_ap_encryption ON agg_ap_encryption(encryption);
+
+CREATE TABLE IF NOT EXISTS agg_essid_clients (
+    essid TEXT PRIMARY KEY,
+    aps INTEGER NOT NULL DEFAULT 0,
+    clients INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_agg_essid_clients_clients ON agg_essid_clients(clients);
+
+CREATE TABLE IF NOT EXISTS agg_essid_station (
+    essid TEXT NOT NULL,
+    station TEXT NOT NULL,
+    links INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (essid, station)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_agg_essid_station_station ON agg_essid_station(station);
+
+CREATE TABLE IF NOT EXISTS agg_station_probes (
+    station TEXT PRIMARY KEY,
+    probes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_agg_station_probes_probes ON agg_station_probes(probes);
+
+CREATE TABLE IF NOT EXISTS agg_probe_counts (
+    probe TEXT,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_agg_probe_counts ON agg_probe_counts(probe);
+CREATE INDEX IF NOT EXISTS idx_agg_probe_counts_count ON agg_probe_counts(count);
+
+INSERT OR IGNORE INTO agg_totals (name, value) VALUES ('ap', 0), ('sta', 0);
+
+-- bulk_write is set to 1 only inside a bulk write transaction of WiFiDatabase,
+-- so other connections never see it set
+CREATE TABLE IF NOT EXISTS agg_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO agg_state (name, value) VALUES ('bulk_write', 0);
+'''
+
+
+# Trigger bodies adding or removing one row's contribution; {row} is NEW or OLD.
+# ENC may be NULL and is matched with IS. Rows are created with
+# INSERT ... WHERE NOT EXISTS and then updated, because the OR REPLACE of an
+# outer INSERT overrides OR IGNORE and upserts inside trigger bodies.
+_AP_ADD = '''
+    INSERT INTO agg_ap_channel (channel, count)
+        SELECT {row}.CH, 0 WHERE {row}.CH IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM agg_ap_channel WHERE channel = {row}.CH);
+    UPDATE agg_ap_channel SET count = count + 1 WHERE channel = {row}.CH;
+
+    INSERT INTO agg_ap_encryption (encryption, count)
+        SELECT {row}.ENC, 0
+        WHERE NOT EXISTS (SELECT 1 FROM agg_ap_encryption WHERE encryption IS {row}.ENC);
+    UPDATE agg_ap_encryption SET count = count + 1 WHERE encryption IS {row}.ENC;
+
+    INSERT INTO agg_essid_clients (essid)
+        SELECT {row}.ESSID WHERE {row}.ESSID != ''
+        AND NOT EXISTS (SELECT 1 FROM agg_essid_clients WHERE essid = {row}.ESSID);
+    UPDATE agg_essid_clients SET aps = aps + 1 WHERE essid = {row}.ESSID AND {row}.ESSID != '';
+
+    INSERT INTO agg_essid_station (essid, station, links)
+        SELECT {row}.ESSID, station, 0 FROM sta
+        WHERE bssid = {row}.BSSID AND {row}.ESSID != ''
+        AND NOT EXISTS (SELECT 1 FROM agg_essid_station e
+                        WHERE e.essid = {row}.ESSID AND e.station = sta.station)
+        GROUP BY station;
+    UPDATE agg_essid_station
+        SET links = links + (SELECT COUNT(*) FROM sta
+                             WHERE sta.bssid = {row}.BSSID AND sta.station = agg_essid_station.station)
+        WHERE essid = {row}.ESSID AND {row}.ESSID != ''
+        AND station IN (SELECT station FROM sta WHERE bssid = {row}.BSSID);
+'''
+
+_AP_REMOVE = '''
+    UPDATE agg_ap_channel SET count = count - 1 WHERE channel = {row}.CH;
+    DELETE FROM agg_ap_channel WHERE channel = {row}.CH AND count <= 0;
+
+    UPDATE agg_ap_encryption SET count = count - 1 WHERE encryption IS {row}.ENC;
+    DELETE FROM agg_ap_encryption WHERE encryption IS {row}.ENC AND count <= 0;
+
+    UPDATE agg_essid_station
+        SET links = links - (SELECT COUNT(*) FROM sta
+                             WHERE sta.bssid = {row}.BSSID AND sta.station = agg_essid_station.station)
+        WHERE essid = {row}.ESSID
+        AND station IN (SELECT station FROM sta WHERE bssid = {row}.BSSID);
+    DELETE FROM agg_essid_station WHERE essid = {row}.ESSID AND links <= 0;
+
+    UPDATE agg_essid_clients SET aps = aps - 1 WHERE essid = {row}.ESSID;
+    DELETE FROM agg_essid_clients WHERE essid = {row}.ESSID AND aps <= 0;
+'''
+
+_STA_ADD = '''
+    INSERT INTO agg_essid_station (essid, station, links)
+        SELECT ESSID, {row}.station, 0 FROM ap
+        WHERE BSSID = {row}.bssid AND ESSID != ''
+        AND NOT EXISTS (SELECT 1 FROM agg_essid_station e
+                        WHERE e.essid = ap.ESSID AND e.station = {row}.station);
+    UPDATE agg_essid_station SET links = links + 1
+        WHERE station = {row}.station
+        AND essid = (SELECT ESSID FROM ap WHERE BSSID = {row}.bssid AND ESSID != '');
+
+    INSERT INTO agg_station_probes (station, probes)
+        SELECT {row}.station, 0
+        WHERE EXISTS (SELECT 1 FROM sta_probe WHERE station_id = {row}.id)
+        AND NOT EXISTS (SELECT 1 FROM agg_station_probes WHERE station = {row}.station);
+    UPDATE agg_station_probes
+        SET probes = probes + (SELECT COUNT(*) FROM sta_probe WHERE station_id = {row}.id)
+        WHERE station = {row}.station;
+'''
+
+_STA_REMOVE = '''
+    UPDATE agg_essid_station SET links = links - 1
+        WHERE station = {row}.station
+        AND essid = (SELECT ESSID FROM ap WHERE BSSID = {row}.bssid);
+    DELETE FROM agg_essid_station
+        WHERE station = {row}.station AND links <= 0
+        AND essid = (SELECT ESSID FROM ap WHERE BSSID = {row}.bssid);
+
+    UPDATE agg_station_probes
+        SET probes = probes - (SELECT COUNT(*) FROM sta_probe WHERE station_id = {row}.id)
+        WHERE station = {row}.station;
+    DELETE FROM agg_station_probes WHERE station = {row}.station AND probes <= 0;
+'''
+
+_PROBE_ADD = '''
+    INSERT INTO agg_probe_counts (probe, count)
+        SELECT essid, 0 FROM essid
+        WHERE id = {row}.essid_id
+        AND NOT EXISTS (SELECT 1 FROM agg_probe_counts WHERE probe = essid.essid);
+    UPDATE agg_probe_counts SET count = count + 1
+        WHERE probe = (SELECT essid FROM essid WHERE id = {row}.essid_id);
+
+    INSERT INTO agg_station_probes (station, probes)
+        SELECT station, 0 FROM sta
+        WHERE id = {row}.station_id
+        AND NOT EXISTS (SELECT 1 FROM agg_station_probes a WHERE a.station = sta.station);
+    UPDATE agg_station_probes SET probes = probes + 1
+        WHERE station = (SELECT station FROM sta WHERE id = {row}.station_id);
+'''
+
+_PROBE_REMOVE = '''
+    UPDATE agg_probe_counts SET count = count - 1
+        WHERE probe = (SELECT essid FROM essid WHERE id = {row}.essid_id);
+    DELETE FROM agg_probe_counts
+        WHERE probe = (SELECT essid FROM essid WHERE id = {row}.essid_id) AND count <= 0;
+
+    UPDATE agg_station_probes SET probes = probes - 1
+        WHERE station = (SELECT station FROM sta WHERE id = {row}.station_id);
+    DELETE FROM agg_station_probes
+        WHERE station = (SELECT station FROM sta WHERE id = {row}.station_id) AND probes <= 0;
+'''
+
+
+def _trigger(name: str, event: str, body: str, when: str = '') -> str:
+    when = f' WHEN {when}' if when else ''
+    return f'CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW{when} BEGIN{body}END;\n'
+
+
+# Rows written by the bulk paths are accounted for by the BULK_* statements instead
+_NOT_BULK = "(SELECT value FROM agg_state WHERE name = 'bulk_write') = 0"
+
+
+def _changed(*columns: str) -> str:
+    return '(' + ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in columns) + ')'
+
+
+# Upserts rewrite every column, so update triggers only run on real changes
+AGGREGATE_TRIGGERS = ''.join([
+    _trigger('trg_ap_agg_insert', 'AFTER INSERT ON ap',
+             "\n    UPDATE agg_totals SET value = value + 1 WHERE name = 'ap';"
+             + _AP_ADD.format(row='NEW'), when=_NOT_BULK),
+    _trigger('trg_ap_agg_delete', 'AFTER DELETE ON ap',
+             "\n    UPDATE agg_totals SET value = value - 1 WHERE name = 'ap';"
+             + _AP_REMOVE.format(row='OLD'), when=_NOT_BULK),
+    _trigger('trg_ap_agg_update', 'AFTER UPDATE OF BSSID, CH, ENC, ESSID ON ap',
+             _AP_REMOVE.format(row='OLD') + _AP_ADD.format(row='NEW'),
+             when=_changed('BSSID', 'CH', 'ENC', 'ESSID') + ' AND ' + _NOT_BULK),
+
+    _trigger('trg_sta_agg_insert', 'AFTER INSERT ON sta',
+             "\n    UPDATE agg_totals SET value = value + 1 WHERE name = 'sta';"
+             + _STA_ADD.format(row='NEW'), when=_NOT_BULK),
+    _trigger('trg_sta_agg_delete', 'AFTER DELETE ON sta',
+             "\n    UPDATE agg_totals SET value = value - 1 WHERE name = 'sta';"
+             + _STA_REMOVE.format(row='OLD')),
+    _trigger('trg_sta_agg_update', 'AFTER UPDATE OF station, bssid ON sta',
+             _STA_REMOVE.format(row='OLD') + _STA_ADD.format(row='NEW'),
+             when=_changed('station', 'bssid') + ' AND ' + _NOT_BULK),
+
+    _trigger('trg_sta_probe_agg_insert', 'AFTER INSERT ON sta_probe', _PROBE_ADD.format(row='NEW'),
+             when=_NOT_BULK),
+    _trigger('trg_sta_probe_agg_delete', 'AFTER DELETE ON sta_probe', _PROBE_REMOVE.format(row='OLD')),
+    _trigger('trg_sta_probe_agg_update', 'AFTER UPDATE OF station_id, essid_id ON sta_probe',
+             _PROBE_REMOVE.format(row='OLD') + _PROBE_ADD.format(row='NEW')),
+
+    # Distinct client counts follow the ESSID/station links
+    _trigger('trg_essid_station_insert', 'AFTER INSERT ON agg_essid_station',
+             '\n    UPDATE agg_essid_clients SET clients = clients + 1 WHERE essid = NEW.essid;\n'),
+    _trigger('trg_essid_station_delete', 'AFTER DELETE ON agg_essid_station',
+             '\n    UPDATE agg_essid_clients SET clients = clients - 1 WHERE essid = OLD.essid;\n'),
+])
+
+
+# Set-based summary updates for the bulk paths, applied once per batch: the
+# batch's stored rows are taken out before its upsert and every row of the
+# batch is added back after it.
+
+# Remove the APs of a batch, a JSON array of BSSIDs in :bssids, that are
+# already stored
+BULK_AP_REMOVE = [
+    '''
+    WITH old AS (
+        SELECT CH, COUNT(*) AS n FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids)) AND CH IS NOT NULL
+        GROUP BY CH
+    )
+    UPDATE agg_ap_channel SET count = count - (SELECT n FROM old WHERE old.CH = agg_ap_channel.channel)
+        WHERE channel IN (SELECT CH FROM old)
+    ''',
+    'DELETE FROM agg_ap_channel WHERE count <= 0',
+    '''
+    WITH old AS (
+        SELECT ENC, COUNT(*) AS n FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids))
+        GROUP BY ENC
+    )
+    UPDATE agg_ap_encryption
+        SET count = count - (SELECT n FROM old WHERE old.ENC IS agg_ap_encryption.encryption)
+        WHERE EXISTS (SELECT 1 FROM old WHERE old.ENC IS agg_ap_encryption.encryption)
+    ''',
+    'DELETE FROM agg_ap_encryption WHERE count <= 0',
+    '''
+    WITH old AS (
+        SELECT ap.ESSID AS essid, sta.station, COUNT(*) AS n
+        FROM ap JOIN sta ON sta.bssid = ap.BSSID
+        WHERE ap.BSSID IN (SELECT value FROM json_each(:bssids)) AND ap.ESSID != ''
+        GROUP BY ap.ESSID, sta.station
+    )
+    UPDATE agg_essid_station
+        SET links = links - (SELECT n FROM old
+                             WHERE old.essid = agg_essid_station.essid
+                             AND old.station = agg_essid_station.station)
+        WHERE (essid, station) IN (SELECT essid, station FROM old)
+    ''',
+    '''
+    DELETE FROM agg_essid_station
+        WHERE essid IN (SELECT ESSID FROM ap WHERE BSSID IN (SELECT value FROM json_each(:bssids)))
+        AND links <= 0
+    ''',
+    '''
+    WITH old AS (
+        SELECT ESSID, COUNT(*) AS n FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids)) AND ESSID != ''
+        GROUP BY ESSID
+    )
+    UPDATE agg_essid_clients
+        SET aps = aps - (SELECT n FROM old WHERE old.ESSID = agg_essid_clients.essid)
+        WHERE essid IN (SELECT ESSID FROM old)
+    ''',
+    '''
+    DELETE FROM agg_essid_clients
+        WHERE essid IN (SELECT ESSID FROM ap WHERE BSSID IN (SELECT value FROM json_each(:bssids)))
+        AND aps <= 0
+    ''',
+]
+
+# Add every AP of a batch once it is written; new APs have ids above :last_ap
+BULK_AP_ADD = [
+    '''
+    UPDATE agg_totals
+        SET value = value + (SELECT COUNT(*) FROM ap WHERE id > :last_ap)
+        WHERE name = 'ap'
+    ''',
+    '''
+    INSERT INTO agg_ap_channel (channel, count)
+        SELECT CH, COUNT(*) FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids)) AND CH IS NOT NULL
+        GROUP BY CH
+        ON CONFLICT (channel) DO UPDATE SET count = count + excluded.count
+    ''',
+    # ENC may be NULL, which the unique index never treats as a conflict
+    '''
+    INSERT INTO agg_ap_encryption (encryption, count)
+        SELECT DISTINCT ENC, 0 FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids))
+        AND NOT EXISTS (SELECT 1 FROM agg_ap_encryption WHERE encryption IS ap.ENC)
+    ''',
+    '''
+    WITH new AS (
+        SELECT ENC, COUNT(*) AS n FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids))
+        GROUP BY ENC
+    )
+    UPDATE agg_ap_encryption
+        SET count = count + (SELECT n FROM new WHERE new.ENC IS agg_ap_encryption.encryption)
+        WHERE EXISTS (SELECT 1 FROM new WHERE new.ENC IS agg_ap_encryption.encryption)
+    ''',
+    '''
+    INSERT INTO agg_essid_clients (essid, aps)
+        SELECT ESSID, COUNT(*) FROM ap
+        WHERE BSSID IN (SELECT value FROM json_each(:bssids)) AND ESSID != ''
+        GROUP BY ESSID
+        ON CONFLICT (essid) DO UPDATE SET aps = aps + excluded.aps
+    ''',
+    '''
+    INSERT INTO agg_essid_station (essid, station, links)
+        SELECT ap.ESSID, sta.station, COUNT(*)
+        FROM ap JOIN sta ON sta.bssid = ap.BSSID
+        WHERE ap.BSSID IN (SELECT value FROM json_each(:bssids)) AND ap.ESSID != ''
+        GROUP BY ap.ESSID, sta.station
+        ON CONFLICT (essid, station) DO UPDATE SET links = links + excluded.links
+    ''',
+]
+
+
+# Remove the stations of a batch that are already stored, a JSON array of MACs
+# in :existing. An upsert keeps a station's probes, so only its link to the
+# ESSID of its AP can change.
+BULK_STATION_REMOVE = [
+    '''
+    UPDATE agg_essid_station SET links = links - 1
+        WHERE (essid, station) IN (
+            SELECT ap.ESSID, sta.station FROM sta JOIN ap ON ap.BSSID = sta.bssid
+            WHERE sta.station IN (SELECT value FROM json_each(:existing)) AND ap.ESSID != ''
+        )
+    ''',
+    '''
+    DELETE FROM agg_essid_station
+        WHERE station IN (SELECT value FROM json_each(:existing)) AND links <= 0
+    ''',
+]
+
+# Add every station of a batch once it and its probes are written: the
+# stations in :existing and new ones, with ids above :last_station. New
+# sta_probe rows have ids above :last_probe.
+BULK_STATION_ADD = [
+    '''
+    UPDATE agg_totals
+        SET value = value + (SELECT COUNT(*) FROM sta WHERE id > :last_station)
+        WHERE name = 'sta'
+    ''',
+    '''
+    INSERT INTO agg_essid_station (essid, station, links)
+        SELECT ap.ESSID, batch.station, COUNT(*)
+        FROM (SELECT station, bssid FROM sta WHERE id > :last_station
+              UNION ALL
+              SELECT station, bssid FROM sta
+              WHERE station IN (SELECT value FROM json_each(:existing))) AS batch
+        JOIN ap ON ap.BSSID = batch.bssid
+        WHERE ap.ESSID != ''
+        GROUP BY ap.ESSID, batch.station
+        ON CONFLICT (essid, station) DO UPDATE SET links = links + excluded.links
+    ''',
+    '''
+    INSERT INTO agg_probe_counts (probe, count)
+        SELECT essid.essid, COUNT(*)
+        FROM sta_probe JOIN essid ON essid.id = sta_probe.essid_id
+        WHERE sta_probe.id > :last_probe
+        GROUP BY essid.essid
+        ON CONFLICT (probe) DO UPDATE SET count = count + excluded.count
+    ''',
+    '''
+    INSERT INTO agg_station_probes (station, probes)
+        SELECT sta.station, COUNT(*)
+        FROM sta_probe JOIN sta ON sta.id = sta_probe.station_id
+        WHERE sta_probe.id > :last_probe
+        GROUP BY sta.station
+        ON CONFLICT (station) DO UPDATE SET probes = probes + excluded.probes
+    ''',
+]
+
+
+# Dictionary of every ESSID broadcast by an AP or probed by a station. Probed
+# names are interned by the station insert path and broadcast names by
+# triggers. Names are never removed, so searches join back to the data for
+# current counts.
+SEARCH_TABLES = '''
+CREATE TABLE IF NOT EXISTS essid (
+    id INTEGER PRIMARY KEY,
+    essid TEXT NOT NULL UNIQUE
+);
+''' + ''.join([
+    _trigger('trg_ap_essid_insert', 'AFTER INSERT ON ap', '''
+    INSERT INTO essid (essid) SELECT NEW.ESSID
+        WHERE NEW.ESSID != '' AND NOT EXISTS (SELECT 1 FROM essid WHERE essid = NEW.ESSID);
+'''),
+    _trigger('trg_ap_essid_update', 'AFTER UPDATE OF ESSID ON ap', '''
+    INSERT INTO essid (essid) SELECT NEW.ESSID
+        WHERE NEW.ESSID != '' AND NOT EXISTS (SELECT 1 FROM essid WHERE essid = NEW.ESSID);
+''', when='OLD.ESSID IS NOT NEW.ESSID'),
+])
+
+
+# Trigram full-text index over the ESSID dictionary, for substring searches.
+# Only created when SQLite has FTS5 with the trigram tokenizer (3.34+).
+SEARCH_INDEX = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS essid_fts
+    USING fts5(essid, content='essid', content_rowid='id', tokenize='trigram');
+''' + _trigger('trg_essid_fts_insert', 'AFTER INSERT ON essid', '''
+    INSERT INTO essid_fts (rowid, essid) VALUES (NEW.id, NEW.essid);
+''')
+
+
+# Fill the dictionary from existing data, used to migrate older databases
+POPULATE_ESSIDS = '''
+INSERT OR IGNORE INTO essid (essid) SELECT DISTINCT ESSID FROM ap WHERE ESSID != '';
+'''
+
+
+# Recompute every aggregate from the base tables, used when migrating databases
+# older than version 2
+REBUILD_AGGREGATES = '''
+DELETE FROM agg_essid_station;
+DELETE FROM agg_essid_clients;
+DELETE FROM agg_ap_channel;
+DELETE FROM agg_ap_encryption;
+DELETE FROM agg_station_probes;
+DELETE FROM agg_probe_counts;
+
+UPDATE agg_totals SET value = (SELECT COUNT(*) FROM ap) WHERE name = 'ap';
+UPDATE agg_totals SET value = (SELECT COUNT(*) FROM sta) WHERE name = 'sta';
+
+INSERT INTO agg_ap_channel (channel, count)
+    SELECT CH, COUNT(*) FROM ap WHERE CH IS NOT NULL GROUP BY CH;
+
+INSERT INTO agg_ap_encryption (encryption, count)
+    SELECT ENC, COUNT(*) FROM ap GROUP BY ENC;
+
+INSERT INTO agg_essid_clients (essid, aps, clients)
+    SELECT ESSID, COUNT(*), 0 FROM ap WHERE ESSID != '' GROUP BY ESSID;
+
+INSERT INTO agg_essid_station (essid, station, links)
+    SELECT ap.ESSID, sta.station, COUNT(*)
+    FROM ap JOIN sta ON ap.BSSID = sta.bssid
+    WHERE ap.ESSID != ''
+    GROUP BY ap.ESSID, sta.station;
+
+INSERT INTO agg_station_probes (station, probes)
+    SELECT sta.station, COUNT(*)
+    FROM sta JOIN sta_probe ON sta.id = sta_probe.station_id
+    GROUP BY sta.station;
+
+INSERT INTO agg_probe_counts (probe, count)
+    SELECT essid.essid, COUNT(*)
+    FROM sta_probe JOIN essid ON essid.id = sta_probe.essid_id
+    GROUP BY essid.essid;
+'''
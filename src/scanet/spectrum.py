@@ -0,0 +1,146 @@
+"""
+Channel congestion and overlap analysis
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Sequence, Tuple
+from .database import DatabaseReader
+
+
+# Share of a 2.4 GHz transmission's power received on a channel 0, 1, 2, ...
+# channels (5 MHz steps) away, from the 802.11b/g spectral mask. Channels five
+# or more apart do not overlap.
+OVERLAP_2GHZ = np.array([1.0, 0.7272, 0.2714, 0.0375, 0.0054, 0.0008])
+
+# Channels that never overlap each other in 2.4 GHz; always analyzed as
+# candidates, even when no AP uses them
+CLEAR_CHANNELS_2GHZ = (1, 6, 11)
+
+# Signal assumed for APs without a reading, and the floor weaker signals are
+# raised to. airodump-ng reports a missing reading as PWR -1 (or 0).
+NOISE_FLOOR_DBM = -100.0
+
+# Airtime of the beacons an idle AP sends (about 10 per second at 1 Mbps)
+BEACON_AIRTIME = 0.03
+
+# Bits in a full-size data frame, to turn frames per second into airtime
+FRAME_BITS = 1500 * 8
+
+
+def channel_frequencies(channels: np.ndarray) -> np.ndarray:
+    """Return the center frequency in MHz of 2.4 GHz and 5 GHz channel numbers"""
+    channels = np.asarray(channels, dtype=float)
+    return np.where(channels == 14, 2484.0,
+                    np.where(channels < 14, 2407.0 + 5 * channels, 5000.0 + 5 * channels))
+
+
+def overlap_matrix(transmit: np.ndarray, receive: np.ndarray) -> np.ndarray:
+    """Return the share of power sent on each transmit channel received on each receive channel
+    
+    2.4 GHz channels overlap by the spectral mask in OVERLAP_2GHZ. 5 GHz
+    channels are taken to be 20 MHz wide, so only the same channel overlaps.
+    """
+    sent = channel_frequencies(transmit)[:, None]
+    received = channel_frequencies(receive)[None, :]
+    
+    steps = np.rint(np.abs(sent - received) / 5).astype(int)
+    both_2ghz = (sent < 2500) & (received < 2500)
+    in_mask = both_2ghz & (steps < len(OVERLAP_2GHZ))
+    
+    overlap = np.where(in_mask, OVERLAP_2GHZ[np.minimum(steps, len(OVERLAP_2GHZ) - 1)], 0.0)
+    return np.where(steps == 0, 1.0, overlap)
+
+
+def ap_weights(power: np.ndarray, frames_per_s: np.ndarray, max_rate: np.ndarray) -> np.ndarray:
+    """Return how much each AP interferes with its channel, in mW of airtime-weighted signal
+    
+    The received signal in mW is scaled by the share of airtime the AP takes:
+    its beacons plus its data frames at its maximum rate. A missing rate
+    counts as 1 Mbps, the slowest, and a missing signal as the noise floor.
+    """
+    dbm = np.where(np.isnan(power) | (power >= -1), NOISE_FLOOR_DBM, power)
+    signal = 10 ** (np.maximum(dbm, NOISE_FLOOR_DBM) / 10)
+    
+    rate = np.where(np.isnan(max_rate) | (max_rate <= 0), 1.0, max_rate) * 1e6
+    frames = np.nan_to_num(np.maximum(frames_per_s, 0))
+    airtime = np.minimum(BEACON_AIRTIME + frames * FRAME_BITS / rate, 1.0)
+    return signal * airtime
+
+
+def interference_matrix(activity: Sequence[Tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Build the AP x channel interference matrix from (CH, PWR, per_s, MB) rows
+    
+    Returns the matrix in mW, each AP's index into the transmit channels, the
+    transmit channels in use and the receive channels (those plus the clear
+    2.4 GHz channels when any 2.4 GHz AP is seen).
+    """
+    values = np.array(activity, dtype=float).reshape(-1, 4)
+    channel, power, frames_per_s, max_rate = values.T
+    
+    transmit, ap_channel = np.unique(channel, return_inverse=True)
+    receive = transmit
+    if (transmit <= 14).any():
+        receive = np.union1d(transmit, CLEAR_CHANNELS_2GHZ)
+    
+    overlap = overlap_matrix(transmit, receive)
+    matrix = ap_weights(power, frames_per_s, max_rate)[:, None] * overlap[ap_channel]
+    return matrix, ap_channel, transmit, receive
+
+
+def channel_interference(activity: Sequence[Tuple]) -> Dict[str, Any]:
+    """Sum the interference matrix by channel
+    
+    ``matrix`` holds the interference in dBm that the APs on each transmit
+    channel cause on each receive channel, None where they cause none. Per
+    receive channel, ``total_dbm`` is the interference from every AP and
+    ``co_channel`` the share of it coming from APs on that same channel.
+    Returns an empty dict without APs on a known channel.
+    """
+    if not len(activity):
+        return {}
+    
+    matrix, ap_channel, transmit, receive = interference_matrix(activity)
+    
+    by_channel = np.zeros((len(transmit), len(receive)))
+    np.add.at(by_channel, ap_channel, matrix)
+    total = by_channel.sum(axis=0)
+    
+    # The diagonal of transmit x receive, where both are the same channel
+    same = transmit[:, None] == receive[None, :]
+    co_channel = (by_channel * same).sum(axis=0)
+    
+    return {
+        'transmit': transmit.astype(int).tolist(),
+        'receive': receive.astype(int).tolist(),
+        'aps': np.bincount(np.searchsorted(receive, transmit[ap_channel]), minlength=len(receive)).tolist(),
+        'matrix': _to_dbm(by_channel).tolist(),
+        'total_dbm': _to_dbm(total).tolist(),
+        'co_channel': np.round(np.divide(co_channel, total, out=np.zeros_like(total), where=total > 0), 3).tolist(),
+    }
+
+
+def analyze_channels(db: DatabaseReader) -> Dict[str, Any]:
+    """Compute the channel interference of the APs in a database
+    
+    The result is kept until the data changes, so the charts and every report
+    format share one computation.
+    """
+    return db.get_snapshot('channel_interference', lambda: channel_interference(db.get_channel_activity()))
+
+
+def quietest_channels(interference: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the receive channels from least to most interference, with their AP counts"""
+    channels = [
+        {'channel': channel, 'aps': aps, 'interference_dbm': dbm, 'co_channel': share}
+        for channel, aps, dbm, share in zip(interference.get('receive', []), interference.get('aps', []),
+                                            interference.get('total_dbm', []), interference.get('co_channel', []))
+    ]
+    return sorted(channels, key=lambda item: (item['interference_dbm'] is not None,
+                                              item['interference_dbm'] or 0, item['channel']))
+
+
+def _to_dbm(milliwatts: np.ndarray) -> np.ndarray:
+    """Convert mW to dBm rounded to 0.1, None for no power"""
+    with np.errstate(divide='ignore'):
+        dbm = np.round(10 * np.log10(milliwatts), 1)
+    return np.where(milliwatts > 0, dbm, None)
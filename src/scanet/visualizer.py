@@ -5,206 +5,518 @@ Data visualization module for WiFi analysis
 import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
+import numpy as np
 import pandas as pd
 import networkx as nx
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 import io
+import os
 import base64
-from typing import Dict, List, Any
-from .database import WiFiDatabase
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
+from .cache import ChartCache
+from .database import DatabaseReader, as_database
+from .spectrum import analyze_channels
+
+
+# Bump when the drawing of a chart changes, so cached renders are not reused
+CHART_RENDER_VERSION = 3
+
+# Figure size in inches of each chart, and the resolution they are saved at
+CHART_SIZES = {
+    'aps_by_channel': (12, 6),
+    'aps_by_encryption': (10, 8),
+    'top_aps_by_clients': (12, 8),
+    'network_graph': (14, 10),
+    'channel_interference': (12, 9),
+}
+EMPTY_CHART_SIZE = (10, 6)
+CHART_DPI = 150
+
+# Chart encodings: base64 PNG, or SVG markup inlined into the report
+CHART_FORMATS = ('png', 'svg')
+
+# Preview profile: every chart drawn in turn on one small, low resolution
+# canvas, with only the top categories and no topology chart
+PREVIEW_SIZE = (8, 4.5)
+PREVIEW_DPI = 72
+PREVIEW_TOP_N = 5
+
+# Channel pairs up to which the interference heatmap prints each cell's value
+HEATMAP_MAX_LABELLED_CELLS = 400
+
+# Topology chart limits. Larger graphs switch from a spring layout, which
+# costs O(n^2) per iteration, to a grouped layout of bounded size.
+SPRING_LAYOUT_MAX_NODES = 150
+TOPOLOGY_MAX_APS = 48
+TOPOLOGY_MAX_SHARED = 300
+TOPOLOGY_LEAF_THRESHOLD = 8
+
+
+def chart_params(chart: str, fmt: str = 'png', preview: bool = False) -> Dict[str, Any]:
+    """Return everything besides its data that determines how a chart is drawn"""
+    dpi = PREVIEW_DPI if preview else CHART_DPI
+    return {
+        'render_version': CHART_RENDER_VERSION,
+        'format': fmt,
+        'preview': preview,
+        'size': PREVIEW_SIZE if preview else CHART_SIZES[chart],
+        'dpi': dpi if fmt == 'png' else None,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+# Charts are drawn by module-level functions of plain aggregate data, so they
+# can run in worker processes without a database connection. Each draws on
+# the axes it is given, so the same code serves full-size figures and the
+# single reused preview canvas.
+
+def render_aps_by_channel(channel_data: List[Dict[str, Any]], fmt: str = 'png') -> str:
+    """Generate bar chart of APs by channel"""
+    return render_chart('aps_by_channel', channel_data, fmt)
+
+
+def render_aps_by_encryption(encryption_data: List[Dict[str, Any]], fmt: str = 'png') -> str:
+    """Generate pie chart of APs by encryption type"""
+    return render_chart('aps_by_encryption', encryption_data, fmt)
+
+
+def render_top_aps_by_clients(top_aps: List[Dict[str, Any]], fmt: str = 'png') -> str:
+    """Generate horizontal bar chart of top APs by client count"""
+    return render_chart('top_aps_by_clients', top_aps, fmt)
+
+
+def render_network_graph(graph_data: List[Dict[str, str]], fmt: str = 'png') -> str:
+    """Generate network graph showing AP-Client relationships"""
+    return render_chart('network_graph', graph_data, fmt)
+
+
+def render_channel_interference(interference: Dict[str, Any], fmt: str = 'png') -> str:
+    """Generate heatmap of the interference between channels"""
+    return render_chart('channel_interference', interference, fmt)
+
+
+def render_chart(chart: str, data: Any, fmt: str = 'png') -> str:
+    """Draw one chart on a figure of its own size and encode it"""
+    fig, ax = plt.subplots(figsize=CHART_SIZES[chart] if data else EMPTY_CHART_SIZE)
+    CHART_DRAWERS[chart](ax, data)
+    fig.tight_layout()
+    
+    try:
+        return _encode_figure(fig, fmt, CHART_DPI)
+    finally:
+        plt.close(fig)  # Free memory
+
+
+def render_preview(jobs: Dict[str, Any], fmt: str = 'png') -> Dict[str, str]:
+    """Draw charts one after another on a single reused low resolution canvas
+    
+    The figure is created once, outside pyplot, and cleared between charts.
+    """
+    fig = Figure(figsize=PREVIEW_SIZE)
+    FigureCanvasAgg(fig)
+    
+    charts = {}
+    for chart, data in jobs.items():
+        fig.clear()
+        CHART_DRAWERS[chart](fig.add_subplot(), data)
+        charts[chart] = _encode_figure(fig, fmt, PREVIEW_DPI)
+    return charts
+
+
+def _draw_aps_by_channel(ax, channel_data: List[Dict[str, Any]]):
+    """Draw bar chart of APs by channel"""
+    if not channel_data:
+        return _draw_message(ax, "No channel data available")
+    
+    channels = [item['channel'] for item in channel_data]
+    counts = [item['count'] for item in channel_data]
+    
+    bars = ax.bar(channels, counts, color='skyblue', edgecolor='navy', alpha=0.7)
+    
+    ax.set_xlabel('Channel', fontsize=12)
+    ax.set_ylabel('Number of Access Points', fontsize=12)
+    ax.set_title('Access Points Distribution by Channel', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+               f'{int(height)}', ha='center', va='bottom')
+
+
+def _draw_aps_by_encryption(ax, encryption_data: List[Dict[str, Any]]):
+    """Draw pie chart of APs by encryption type"""
+    if not encryption_data:
+        return _draw_message(ax, "No encryption data available")
+    
+    labels = [item['encryption'] for item in encryption_data]
+    sizes = [item['count'] for item in encryption_data]
+    
+    # Define colors for common encryption types
+    colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc']
+    
+    wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%',
+                                     colors=colors[:len(labels)], startangle=90)
+    
+    ax.set_title('Access Points by Encryption Type', fontsize=14, fontweight='bold')
+    
+    # Improve text readability
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+
+
+def _draw_top_aps_by_clients(ax, top_aps: List[Dict[str, Any]]):
+    """Draw horizontal bar chart of top APs by client count"""
+    if not top_aps:
+        return _draw_message(ax, "No client data available")
+    
+    # Take top 10 and reverse for better display
+    top_aps = top_aps[:10][::-1]
+    
+    essids = [item['essid'] for item in top_aps]
+    clients = [item['clients'] for item in top_aps]
+    
+    bars = ax.barh(essids, clients, color='lightgreen', edgecolor='darkgreen')
+    
+    ax.set_xlabel('Number of Connected Clients', fontsize=12)
+    ax.set_ylabel('Network Name (ESSID)', fontsize=12)
+    ax.set_title('Top Networks by Client Count', fontsize=14, fontweight='bold')
+    ax.grid(axis='x', alpha=0.3)
+    
+    # Add value labels
+    for i, bar in enumerate(bars):
+        width = bar.get_width()
+        ax.text(width + 0.1, bar.get_y() + bar.get_height()/2,
+               f'{int(width)}', ha='left', va='center')
+
+
+def _draw_network_graph(ax, graph_data: List[Dict[str, str]]):
+    """Draw network graph showing AP-Client relationships
+    
+    Nodes are keyed by full BSSID and station MAC. Graphs of up to
+    SPRING_LAYOUT_MAX_NODES nodes get a spring layout; larger ones the
+    grouped layout of _draw_grouped_topology, whose cost stays bounded.
+    """
+    if not graph_data:
+        return _draw_message(ax, "No network relationship data available")
+    
+    # Exact node identity; ESSIDs are only labels
+    edges = sorted({(item['ap'], item['station']) for item in graph_data if item['ap'] and item['station']})
+    ap_names = {item['ap']: item['ap_name'] or item['ap'] for item in graph_data}
+    
+    if not edges:
+        return _draw_message(ax, "No network connections to display")
+    
+    node_count = len({ap for ap, _ in edges}) + len({station for _, station in edges})
+    if node_count <= SPRING_LAYOUT_MAX_NODES:
+        title = _draw_spring_topology(ax, edges, ap_names)
+    else:
+        title = _draw_grouped_topology(ax, edges, ap_names)
+    
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, 0.0), ncol=3)
+    ax.axis('off')
+
+
+def _draw_channel_interference(ax, interference: Dict[str, Any]):
+    """Draw heatmap of the interference APs on each channel cause on every channel"""
+    if not interference:
+        return _draw_message(ax, "No channel data available")
+    
+    matrix = np.array(interference['matrix'], dtype=float)
+    transmit, receive = interference['transmit'], interference['receive']
+    
+    image = ax.imshow(np.ma.masked_invalid(matrix), cmap='YlOrRd', aspect='auto')
+    ax.figure.colorbar(image, ax=ax, label='Interference (dBm)')
+    
+    ax.set_xticks(np.arange(len(receive)), labels=receive)
+    ax.set_yticks(np.arange(len(transmit)), labels=transmit)
+    ax.set_xlabel('Affected Channel', fontsize=12)
+    ax.set_ylabel('Channel of the Interfering APs', fontsize=12)
+    ax.set_title('Channel Interference (signal and airtime weighted)', fontsize=14, fontweight='bold')
+    
+    if matrix.size <= HEATMAP_MAX_LABELLED_CELLS:
+        # White text on the darkest cells
+        dark = image.norm(matrix) > 0.6
+        rows, columns = np.nonzero(~np.isnan(matrix))
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            ax.text(column, row, f'{matrix[row, column]:.0f}', ha='center', va='center', fontsize=7,
+                    color='white' if dark[row, column] else 'black')
+
+
+def _draw_spring_topology(ax, edges: List[Tuple[str, str]], ap_names: Dict[str, str]) -> str:
+    """Draw every AP and station with a force-directed layout, returning the title"""
+    G = nx.Graph()
+    G.add_edges_from((('ap', ap), ('sta', station)) for ap, station in edges)
+    
+    # A fixed seed keeps repeat renders of the same data identical
+    pos = nx.spring_layout(G, k=1, iterations=50, seed=0)
+    
+    ap_nodes = [node for node in G if node[0] == 'ap']
+    station_nodes = [node for node in G if node[0] == 'sta']
+    
+    nx.draw_networkx_nodes(G, pos, nodelist=ap_nodes, node_color='orange', node_size=800,
+                           alpha=0.8, ax=ax, label='Access Points')
+    nx.draw_networkx_nodes(G, pos, nodelist=station_nodes, node_color='lightblue', node_size=400,
+                           alpha=0.8, ax=ax, label='Stations')
+    nx.draw_networkx_edges(G, pos, alpha=0.5, ax=ax)
+    
+    # Draw labels for APs only (stations would be too cluttered)
+    labels = {node: _short_label(ap_names[node[1]]) for node in ap_nodes}
+    nx.draw_networkx_labels(G, pos, labels=labels, font_size=8, ax=ax)
+    
+    return 'WiFi Network Topology: Access Points ↔ Stations'
+
+
+def _draw_grouped_topology(ax, edges: List[Tuple[str, str]], ap_names: Dict[str, str]) -> str:
+    """Draw the busiest APs on a grid with their stations grouped around them
+    
+    At most TOPOLOGY_MAX_APS APs are drawn. Stations seen with only one of
+    them are drawn around it, or collapsed into a single "+N" node once there
+    are more than TOPOLOGY_LEAF_THRESHOLD. Stations shared between APs sit
+    between them, at most TOPOLOGY_MAX_SHARED of them. Returns the title.
+    """
+    aps_of_station: Dict[str, List[str]] = {}
+    stations_of_ap: Dict[str, int] = {}
+    for ap, station in edges:
+        aps_of_station.setdefault(station, []).append(ap)
+        stations_of_ap[ap] = stations_of_ap.get(ap, 0) + 1
+    
+    # Keep the APs with the most stations
+    kept = sorted(stations_of_ap, key=lambda ap: (-stations_of_ap[ap], ap))[:TOPOLOGY_MAX_APS]
+    columns = int(np.ceil(np.sqrt(len(kept))))
+    grid = np.arange(len(kept))
+    ap_xy = np.column_stack([grid % columns, -(grid // columns)]).astype(float)
+    ap_index = {ap: index for index, ap in enumerate(kept)}
+    
+    leaves: Dict[str, List[str]] = {ap: [] for ap in kept}
+    shared = []
+    for station, aps in aps_of_station.items():
+        drawn = [ap for ap in aps if ap in ap_index]
+        if len(drawn) == 1:
+            leaves[drawn[0]].append(station)
+        elif len(drawn) > 1:
+            shared.append((station, drawn))
+    
+    # Stations seen with the most APs first
+    shared.sort(key=lambda item: (-len(item[1]), item[0]))
+    hidden_shared = max(len(shared) - TOPOLOGY_MAX_SHARED, 0)
+    shared = shared[:TOPOLOGY_MAX_SHARED]
+    
+    station_xy = []
+    group_xy, group_counts = [], []
+    lines = []
+    
+    for ap in kept:
+        center = ap_xy[ap_index[ap]]
+        if len(leaves[ap]) > TOPOLOGY_LEAF_THRESHOLD:
+            # One node standing for all the AP's own stations
+            point = center + (0.0, -0.3)
+            group_xy.append(point)
+            group_counts.append(len(leaves[ap]))
+            lines.append((center, point))
+        else:
+            angles = 2 * np.pi * np.arange(len(leaves[ap])) / max(len(leaves[ap]), 1)
+            for angle in angles:
+                point = center + 0.25 * np.array([np.cos(angle), np.sin(angle)])
+                station_xy.append(point)
+                lines.append((center, point))
+    
+    # Shared stations sit between their APs, spread by the golden angle
+    for index, (station, aps) in enumerate(shared):
+        centers = ap_xy[[ap_index[ap] for ap in aps]]
+        angle = index * 2.399963
+        point = centers.mean(axis=0) + 0.12 * np.array([np.cos(angle), np.sin(angle)])
+        station_xy.append(point)
+        lines.extend((center, point) for center in centers)
+    
+    ax.add_collection(LineCollection(lines, colors='gray', linewidths=0.5, alpha=0.4))
+    ax.scatter(ap_xy[:, 0], ap_xy[:, 1], s=300, c='orange', alpha=0.9, zorder=3, label='Access Points')
+    if station_xy:
+        points = np.array(station_xy)
+        ax.scatter(points[:, 0], points[:, 1], s=25, c='lightblue', edgecolors='steelblue',
+                   zorder=3, label='Stations')
+    if group_xy:
+        points = np.array(group_xy)
+        ax.scatter(points[:, 0], points[:, 1], s=40 + 60 * np.log2(group_counts), c='lightblue',
+                   edgecolors='steelblue', alpha=0.8, zorder=3, label='Grouped stations')
+        for point, count in zip(points, group_counts):
+            ax.annotate(f'+{count}', point, ha='center', va='center', fontsize=7, zorder=4)
+    
+    for ap in kept:
+        x, y = ap_xy[ap_index[ap]]
+        ax.annotate(_short_label(ap_names[ap]), (x, y + 0.3), ha='center', va='bottom', fontsize=7, zorder=4)
+    
+    ax.set_xlim(-0.6, columns - 0.4)
+    ax.set_ylim(ap_xy[:, 1].min() - 0.6, 0.6)
+    
+    title = (f'WiFi Network Topology: top {len(kept)} of {len(stations_of_ap)} Access Points, '
+             f'{len(aps_of_station)} Stations')
+    if hidden_shared:
+        title += f'\n({hidden_shared} more stations shared between APs not shown)'
+    return title
+
+
+def _top_n(items: List[Dict[str, Any]], label: str, n: int) -> List[Dict[str, Any]]:
+    """Keep the n largest counts of a count-descending list, folding the rest into 'Other'"""
+    if len(items) <= n:
+        return items
+    rest = sum(item['count'] for item in items[n - 1:])
+    return items[:n - 1] + [{label: 'Other', 'count': rest}]
+
+
+def _short_label(name: str, length: int = 20) -> str:
+    """Shorten a label for display; never used as a node identity"""
+    return name if len(name) <= length else name[:length - 1] + '…'
+
+
+def _encode_figure(fig, fmt: str, dpi: int) -> str:
+    """Encode a figure as base64 PNG text or as inline SVG markup"""
+    if fmt == 'svg':
+        return _fig_to_svg(fig)
+    return _fig_to_base64(fig, dpi)
+
+
+def _fig_to_svg(fig) -> str:
+    """Convert matplotlib figure to an inline <svg> element"""
+    buf = io.StringIO()
+    # Text stays text instead of glyph paths, and fixed ids and no date keep
+    # the output identical for identical data
+    with plt.rc_context({'svg.fonttype': 'none', 'svg.hashsalt': 'scanet'}):
+        fig.savefig(buf, format='svg', bbox_inches='tight', metadata={'Date': None})
+    
+    svg = buf.getvalue()
+    return svg[svg.index('<svg'):]
+
+
+def _fig_to_base64(fig, dpi: int) -> str:
+    """Convert matplotlib figure to base64 string"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
+    buf.seek(0)
+    
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def _draw_message(ax, message: str):
+    """Draw a message in place of a chart without data"""
+    ax.text(0.5, 0.5, message, transform=ax.transAxes,
+            ha='center', va='center', fontsize=14, 
+            bbox=dict(boxstyle='round', facecolor='lightgray', alpha=0.8))
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis('off')
+
+
+CHART_DRAWERS: Dict[str, Callable[[Any, Any], None]] = {
+    'aps_by_channel': _draw_aps_by_channel,
+    'aps_by_encryption': _draw_aps_by_encryption,
+    'top_aps_by_clients': _draw_top_aps_by_clients,
+    'network_graph': _draw_network_graph,
+    'channel_interference': _draw_channel_interference,
+}
 
 
 class WiFiVisualizer:
     """Generate charts and visualizations for WiFi data"""
     
-    def __init__(self, db_path: str):
-        self.db = WiFiDatabase(db_path)
+    def __init__(self, db: Union[str, DatabaseReader], workers: Optional[int] = None,
+                 cache: Optional[ChartCache] = None, chart_format: str = 'png', preview: bool = False):
+        self.db = as_database(db)
+        self.workers = workers
+        self.cache = cache
+        self.chart_format = chart_format
+        self.preview = preview
+    
+    def chart_data(self) -> Dict[str, Any]:
+        """Return the aggregate data each chart draws
         
+        Previews keep the top PREVIEW_TOP_N categories and skip the topology
+        chart, whose data grows with the capture.
+        """
+        stats = self.db.get_ap_stats()
+        if self.preview:
+            return {
+                'aps_by_channel': stats['aps_by_channel'],
+                'aps_by_encryption': _top_n(stats['aps_by_encryption'], 'encryption', PREVIEW_TOP_N),
+                'top_aps_by_clients': stats['top_essids_by_clients'][:PREVIEW_TOP_N],
+                'channel_interference': analyze_channels(self.db),
+            }
+        
+        return {
+            'aps_by_channel': stats['aps_by_channel'],
+            'aps_by_encryption': stats['aps_by_encryption'],
+            'top_aps_by_clients': stats['top_essids_by_clients'],
+            'network_graph': self.db.get_network_graph_data(),
+            'channel_interference': analyze_channels(self.db),
+        }
+    
     def generate_all_charts(self) -> Dict[str, str]:
-        """Generate all charts and return as base64 encoded images"""
+        """Generate all charts as base64 PNG text or SVG markup, per chart_format
+        
+        Charts are rendered on a process pool, since pyplot is not thread-safe,
+        so the total time is about that of the slowest chart. Previews are
+        drawn in-process on one reused canvas instead. With a cache, only
+        charts whose data or rendering parameters changed are rendered.
+        """
+        jobs = self.chart_data()
         charts = {}
+        keys = {}
         
-        charts['aps_by_channel'] = self.chart_aps_by_channel()
-        charts['aps_by_encryption'] = self.chart_aps_by_encryption()
-        charts['top_aps_by_clients'] = self.chart_top_aps_by_clients()
-        charts['network_graph'] = self.chart_network_graph()
-        
-        return charts
-    
-    def chart_aps_by_channel(self) -> str:
-        """Generate bar chart of APs by channel"""
-        stats = self.db.get_ap_stats()
-        channel_data = stats['aps_by_channel']
+        if self.cache is not None:
+            for name, data in jobs.items():
+                keys[name] = self.cache.key(name, data, chart_params(name, self.chart_format, self.preview))
+                image = self.cache.get(keys[name])
+                if image is not None:
+                    charts[name] = image
+            jobs = {name: data for name, data in jobs.items() if name not in charts}
         
-        if not channel_data:
-            return self._empty_chart("No channel data available")
+        rendered = self._render(jobs)
         
-        channels = [item['channel'] for item in channel_data]
-        counts = [item['count'] for item in channel_data]
+        if self.cache is not None and rendered:
+            for name, image in rendered.items():
+                self.cache.put(keys[name], image)
+            self.cache.evict()
         
-        fig, ax = plt.subplots(figsize=(12, 6))
-        bars = ax.bar(channels, counts, color='skyblue', edgecolor='navy', alpha=0.7)
+        charts.update(rendered)
+        return charts
+    
+    def _render(self, jobs: Dict[str, Any]) -> Dict[str, str]:
+        """Render charts, on a process pool when there is more than one"""
+        if self.preview:
+            return render_preview(jobs, self.chart_format)
         
-        ax.set_xlabel('Channel', fontsize=12)
-        ax.set_ylabel('Number of Access Points', fontsize=12)
-        ax.set_title('Access Points Distribution by Channel', fontsize=14, fontweight='bold')
-        ax.grid(axis='y', alpha=0.3)
+        workers = min(len(jobs), self.workers or os.cpu_count() or 1)
         
-        # Add value labels on bars
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                   f'{int(height)}', ha='center', va='bottom')
+        if workers <= 1:
+            return {name: render_chart(name, data, self.chart_format) for name, data in jobs.items()}
         
-        plt.tight_layout()
-        return self._fig_to_base64(fig)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(render_chart, name, data, self.chart_format)
+                       for name, data in jobs.items()}
+            return {name: future.result() for name, future in futures.items()}
+    
+    def chart_aps_by_channel(self) -> str:
+        """Generate bar chart of APs by channel"""
+        return render_aps_by_channel(self.db.get_ap_stats()['aps_by_channel'], self.chart_format)
     
     def chart_aps_by_encryption(self) -> str:
         """Generate pie chart of APs by encryption type"""
-        stats = self.db.get_ap_stats()
-        encryption_data = stats['aps_by_encryption']
-        
-        if not encryption_data:
-            return self._empty_chart("No encryption data available")
-        
-        labels = [item['encryption'] for item in encryption_data]
-        sizes = [item['count'] for item in encryption_data]
-        
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Define colors for common encryption types
-        colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc']
-        
-        wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%',
-                                         colors=colors[:len(labels)], startangle=90)
-        
-        ax.set_title('Access Points by Encryption Type', fontsize=14, fontweight='bold')
-        
-        # Improve text readability
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-        
-        plt.tight_layout()
-        return self._fig_to_base64(fig)
+        return render_aps_by_encryption(self.db.get_ap_stats()['aps_by_encryption'], self.chart_format)
     
     def chart_top_aps_by_clients(self) -> str:
         """Generate horizontal bar chart of top APs by client count"""
-        stats = self.db.get_ap_stats()
-        top_aps = stats['top_essids_by_clients']
-        
-        if not top_aps:
-            return self._empty_chart("No client data available")
-        
-        # Take top 10 and reverse for better display
-        top_aps = top_aps[:10][::-1]
-        
-        essids = [item['essid'] for item in top_aps]
-        clients = [item['clients'] for item in top_aps]
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        bars = ax.barh(essids, clients, color='lightgreen', edgecolor='darkgreen')
-        
-        ax.set_xlabel('Number of Connected Clients', fontsize=12)
-        ax.set_ylabel('Network Name (ESSID)', fontsize=12)
-        ax.set_title('Top Networks by Client Count', fontsize=14, fontweight='bold')
-        ax.grid(axis='x', alpha=0.3)
-        
-        # Add value labels
-        for i, bar in enumerate(bars):
-            width = bar.get_width()
-            ax.text(width + 0.1, bar.get_y() + bar.get_height()/2,
-                   f'{int(width)}', ha='left', va='center')
-        
-        plt.tight_layout()
-        return self._fig_to_base64(fig)
+        return render_top_aps_by_clients(self.db.get_ap_stats()['top_essids_by_clients'], self.chart_format)
     
     def chart_network_graph(self) -> str:
         """Generate network graph showing AP-Client relationships"""
-        graph_data = self.db.get_network_graph_data()
-        
-        if not graph_data:
-            return self._empty_chart("No network relationship data available")
-        
-        # Create NetworkX graph
-        G = nx.Graph()
-        
-        # Create unique node names to avoid conflicts
-        ap_nodes_set = set()
-        station_nodes_set = set()
-        
-        for item in graph_data:
-            ap = item['ap']
-            station = item['station']
-            ap_name = item['ap_name'] or f"AP_{ap[:8]}"  # Use ESSID or truncated BSSID
-            station_name = f"STA_{station[:8]}"  # Prefix station names
-            
-            ap_nodes_set.add(ap_name)
-            station_nodes_set.add(station_name)
-            G.add_edge(station_name, ap_name)
-        
-        if len(G.nodes()) == 0:
-            return self._empty_chart("No network connections to display")
-        
-        fig, ax = plt.subplots(figsize=(14, 10))
-        
-        # Create layout
-        pos = nx.spring_layout(G, k=1, iterations=50)
-        
-        # Convert sets to lists for drawing
-        ap_nodes = list(ap_nodes_set)
-        station_nodes = list(station_nodes_set)
-        
-        # Draw nodes
-        if ap_nodes:
-            nx.draw_networkx_nodes(G, pos, nodelist=ap_nodes, 
-                                 node_color='orange', node_size=800, 
-                                 alpha=0.8, ax=ax, label='Access Points')
-        
-        if station_nodes:
-            nx.draw_networkx_nodes(G, pos, nodelist=station_nodes,
-                                 node_color='lightblue', node_size=400,
-                                 alpha=0.8, ax=ax, label='Stations')
-        
-        # Draw edges
-        nx.draw_networkx_edges(G, pos, alpha=0.5, ax=ax)
-        
-        # Draw labels for APs only (stations would be too cluttered)
-        try:
-            if ap_nodes:
-                ap_pos = {node: pos[node] for node in ap_nodes if node in pos and node in G.nodes()}
-                if ap_pos:
-                    nx.draw_networkx_labels(G, ap_pos, font_size=8, ax=ax)
-        except KeyError:
-            # Skip labels if there's an issue with positioning
-            pass
-        
-        ax.set_title('WiFi Network Topology: Access Points ↔ Stations', 
-                    fontsize=14, fontweight='bold')
-        ax.legend()
-        ax.axis('off')
-        
-        plt.tight_layout()
-        return self._fig_to_base64(fig)
-    
-    def _fig_to_base64(self, fig) -> str:
-        """Convert matplotlib figure to base64 string"""
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-        buf.seek(0)
-        
-        img_base64 = base64.b64encode(buf.getvalue()).decode('ascii')
-        plt.close(fig)  # Free memory
-        
-        return img_base64
-    
-    def _empty_chart(self, message: str) -> str:
-        """Generate an empty chart with a message"""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.text(0.5, 0.5, message, transform=ax.transAxes,
-                ha='center', va='center', fontsize=14, 
-                bbox=dict(boxstyle='round', facecolor='lightgray', alpha=0.8))
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        return self._fig_to_base64(fig)
\ No newline at end of file
+        return render_network_graph(self.db.get_network_graph_data(), self.chart_format)
+    
+    def chart_channel_interference(self) -> str:
+        """Generate heatmap of the interference between channels"""
+        return render_channel_interference(analyze_channels(self.db), self.chart_format)
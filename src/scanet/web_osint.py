@@ -3,17 +3,21 @@ import socketserver
 import sys
 import os
 import importlib.util
+from functools import lru_cache
 
 # Get the absolute path to the geo-recon.py script
 current_dir = os.path.dirname(os.path.abspath(__file__))
 geo_recon_path = os.path.join(current_dir, 'modules', 'geo-recon.py')
 
-# Load the geo_recon module dynamically
-spec = importlib.util.spec_from_file_location('geo_recon', geo_recon_path)
-geo_recon = importlib.util.module_from_spec(spec)
-sys.path.insert(0, os.path.join(current_dir, 'modules')) # Add modules to path for its own imports
-spec.loader.exec_module(geo_recon)
-get_osint = geo_recon.get_osint
+
+@lru_cache(maxsize=None)
+def load_get_osint():
+    """Load the geo_recon module dynamically, on first use since it imports requests and colorama"""
+    spec = importlib.util.spec_from_file_location('geo_recon', geo_recon_path)
+    geo_recon = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.join(current_dir, 'modules')) # Add modules to path for its own imports
+    spec.loader.exec_module(geo_recon)
+    return geo_recon.get_osint
 
 
 PORT = 8000
@@ -59,16 +63,18 @@ class OSINTHandler(http.server.SimpleHTTPRequestHandler):
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
             self.end_headers()
-
+            
             # Run the geo-recon script and capture the output
-            results = get_osint(client_ip)
-
+            results = load_get_osint()(client_ip)
+            
             # Render the results page
             self.wfile.write(results_page_template.format(results=results).encode('utf-8'))
         else:
             super().do_GET()
 
 def run_server():
+    # Fail before serving if geo-recon cannot be loaded
+    load_get_osint()
     with socketserver.TCPServer(("", PORT), OSINTHandler) as httpd:
         print("serving at port", PORT)
         httpd.serve_forever()
@@ -0,0 +1,21 @@
+"""
+Shared test setup: import scanet from src without installing it
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+SAMPLE_CSV = ROOT / 'examples' / 'sample_airodump.csv'
+
+
+@pytest.fixture
+def cache_home(tmp_path, monkeypatch):
+    """Point the parse and chart caches at a temporary directory"""
+    home = tmp_path / 'cache'
+    monkeypatch.setenv('XDG_CACHE_HOME', str(home))
+    return home
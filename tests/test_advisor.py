@@ -0,0 +1,63 @@
+"""
+The query advisor must find full scans and only suggest indexes the planner
+would actually use, without touching the database until asked to
+"""
+
+import pytest
+
+from scanet.advisor import QueryAdvisor
+from scanet.database import WiFiDatabase
+
+
+def index_names(db):
+    return {row[0] for row in db.connect().execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = WiFiDatabase(str(tmp_path / 'advisor.db'))
+    db.create_tables()
+    yield db
+    db.close()
+
+
+def test_explain_and_full_scans(db):
+    advisor = QueryAdvisor(db)
+    query = 'SELECT s.station FROM sta AS s JOIN ap ON ap.BSSID = s.bssid WHERE s.packets > 5'
+    
+    plan = advisor.explain(query)
+    assert plan and all(step['depth'] >= 0 for step in plan)
+    
+    # The alias is resolved back to its table; the ap lookup is an index search
+    scans = advisor.full_scans(query, plan)
+    assert [(scan['table'], scan['alias']) for scan in scans] == [('sta', 's')]
+    assert advisor.full_scans("SELECT * FROM sta WHERE station = 'S1'") == []
+
+
+def test_suggestions_are_checked_before_creation(db):
+    advisor = QueryAdvisor(db)
+    query = 'SELECT station FROM sta WHERE packets = 10'
+    before = index_names(db)
+    
+    suggestions = advisor.suggest_indexes(query)
+    assert [(s['name'], s['table'], s['columns']) for s in suggestions] == [('idx_sta_packets', 'sta', 'packets')]
+    assert index_names(db) == before
+    
+    advisor.create_indexes(suggestions)
+    assert 'idx_sta_packets' in index_names(db)
+    assert advisor.full_scans(query) == []
+    assert advisor.suggest_indexes(query) == []
+
+
+def test_missing_schema_index_is_offered_first(db):
+    db.connect().execute('DROP INDEX idx_ap_channel')
+    advisor = QueryAdvisor(db)
+    
+    suggestions = advisor.suggest_indexes('SELECT BSSID FROM ap WHERE CH = 6')
+    assert [s['sql'] for s in suggestions] == ['CREATE INDEX IF NOT EXISTS idx_ap_channel ON ap(CH)']
+
+
+def test_unhelpful_index_is_not_suggested(db):
+    # LIKE with a leading wildcard cannot use an index on ESSID
+    advisor = QueryAdvisor(db)
+    assert advisor.suggest_indexes("SELECT * FROM ap WHERE ESSID LIKE '%cafe%'") == []
@@ -0,0 +1,61 @@
+"""
+Parse cache round trips: a cache hit must give back what a fresh parse does
+"""
+
+import pandas as pd
+import pytest
+
+from scanet.cache import ParseCache
+from scanet.parser import AirodumpParser
+
+# Hidden ESSIDs as airodump-ng writes them, other control characters and non-ASCII text
+ESSIDS = ['\x00\x00\x00', 'ab\x00', '\x00lead', 'tab\there', 'bell\x07\x1b', 'café ↔ …', '']
+
+
+def write_capture(path):
+    """Write a capture whose ESSIDs and cipher labels need exact round trips"""
+    lines = ['', 'BSSID, PWR, Beacons, #Data, #/s, CH, MB, ENC, CIPHER, AUTH, ESSID']
+    for index, essid in enumerate(ESSIDS):
+        lines.append(f'00:11:22:33:44:{index:02X}, -45, 1200, 300, 1, 6, 54, WPA2, '
+                     f'CCMP\x00, PSK, {essid}')
+    lines += ['', 'Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs',
+              '66:77:88:99:AA:00, 2025-07-18 10:00:05, 2025-07-18 10:05:15, -50, 10, '
+              '(not associated), \x00\x00,x\x01y', '']
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_cache_hit_matches_fresh_parse(tmp_path, compact):
+    capture = tmp_path / 'capture.csv'
+    write_capture(capture)
+    parser = AirodumpParser(compact=compact)
+    cache = ParseCache(tmp_path / 'cache')
+    
+    fresh = list(parser.iter_batches(capture))
+    cold = list(cache.iter_batches(parser, capture))
+    warm = list(cache.iter_batches(parser, capture))
+    
+    assert [section for section, _ in warm] == [section for section, _ in fresh]
+    for (_, expected), (_, first), (_, cached) in zip(fresh, cold, warm):
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(cached, expected)
+
+
+def test_text_column_round_trip(tmp_path):
+    values = pd.Series(ESSIDS + [None], name='ESSID', dtype=object)
+    cache = ParseCache(tmp_path)
+    
+    column = cache._save_column(tmp_path, 0, values)
+    loaded = pd.Series(cache._load_column(tmp_path, column), name='ESSID')
+    
+    pd.testing.assert_series_equal(loaded, values)
+
+
+def test_category_round_trip(tmp_path):
+    values = pd.Series(ESSIDS, name='ENC', dtype=object).astype('category')
+    cache = ParseCache(tmp_path)
+    
+    column = cache._save_column(tmp_path, 0, values)
+    loaded = pd.Series(cache._load_column(tmp_path, column), name='ENC')
+    
+    pd.testing.assert_series_equal(loaded, values)
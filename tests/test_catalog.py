@@ -0,0 +1,115 @@
+"""
+The catalog must answer across partitions like one database would, whether
+the partitions are attached or copied, and prune by site and day
+"""
+
+import pandas as pd
+import pytest
+
+from scanet.catalog import CaptureCatalog, describe_partition
+from scanet.database import WiFiDatabase
+
+AP_COLUMNS = ['BSSID', 'PWR', 'Beacons', 'Data', 'per_s', 'CH', 'MB', 'ENC', 'CIPHER', 'AUTH', 'ESSID']
+STATION_COLUMNS = ['Station_MAC', 'First_time_seen', 'Last_time_seen', 'Power', 'packets',
+                   'BSSID', 'Probed_ESSIDs']
+
+
+def write_partition(path, day, aps, stations):
+    """Write a capture database of (bssid, channel, essid) APs and (mac, bssid, probes) stations"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = WiFiDatabase(str(path))
+    db.create_tables()
+    db.insert_access_points(pd.DataFrame(
+        [(bssid, -40, 10, 1, 0, channel, 54, 'WPA2', 'CCMP', 'PSK', essid) for bssid, channel, essid in aps],
+        columns=AP_COLUMNS))
+    db.insert_stations(pd.DataFrame(
+        [(mac, f'{day} 10:00:00', f'{day} 10:05:00', -50, 10, bssid, probes) for mac, bssid, probes in stations],
+        columns=STATION_COLUMNS))
+    db.close()
+
+
+def query(catalog, sql):
+    return [tuple(row) for row in catalog.execute_query(sql)]
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    # The same AP and station show up on both days at site-a
+    write_partition(tmp_path / 'site-a' / '2025-07-18.db', '2025-07-18',
+                    [('AP:1', 6, 'home'), ('AP:2', 11, 'cafe')], [('S1', 'AP:1', 'home,work')])
+    write_partition(tmp_path / 'site-a' / '2025-07-19.db', '2025-07-19',
+                    [('AP:1', 6, 'home')], [('S1', 'AP:1', 'home'), ('S2', 'AP:1', '')])
+    write_partition(tmp_path / 'site-b_20250720.db', '2025-07-20',
+                    [('AP:3', 1, 'office')], [('S3', 'AP:3', 'work')])
+    return tmp_path
+
+
+def test_partition_names_give_site_and_day(partitions, tmp_path):
+    assert describe_partition(partitions / 'site-b_20250720.db')['site'] == 'site-b'
+    assert describe_partition(partitions / 'site-a' / '2025-07-19.db')['day'] == '2025-07-19'
+    
+    # Without a day in the name, the first station sighting is used
+    write_partition(tmp_path / 'loose' / 'capture.db', '2025-07-21', [], [('S9', '(not associated)', '')])
+    assert describe_partition(tmp_path / 'loose' / 'capture.db') == {
+        'path': tmp_path / 'loose' / 'capture.db', 'site': 'loose', 'day': '2025-07-21'}
+
+
+def test_attached_partitions_count_each_device_once(partitions):
+    catalog = CaptureCatalog.discover([str(partitions)])
+    assert len(catalog.partitions) == 3
+    
+    ap_stats = catalog.get_ap_stats()
+    assert ap_stats['total_aps'] == 3
+    assert ap_stats['aps_by_channel'] == [{'channel': 1, 'count': 1}, {'channel': 6, 'count': 1},
+                                          {'channel': 11, 'count': 1}]
+    assert {entry['essid']: entry['clients'] for entry in ap_stats['top_essids_by_clients']} == \
+        {'home': 2, 'office': 1, 'cafe': 0}
+    
+    station_stats = catalog.get_station_stats()
+    assert station_stats['total_stations'] == 3
+    assert station_stats['multi_probe_stations'] == [{'station': 'S1', 'probes': 2}]
+    
+    assert query(catalog, 'SELECT site, day, station FROM sta ORDER BY day, station') == [
+        ('site-a', '2025-07-18', 'S1'), ('site-a', '2025-07-19', 'S1'),
+        ('site-a', '2025-07-19', 'S2'), ('site-b', '2025-07-20', 'S3')]
+    assert not catalog.materialized
+    catalog.close()
+
+
+def test_site_and_day_pruning(partitions):
+    catalog = CaptureCatalog.discover([str(partitions)], sites=['site-a'], since='2025-07-19')
+    assert [(p['site'], p['day']) for p in catalog.partitions] == [('site-a', '2025-07-19')]
+    assert query(catalog, 'SELECT BSSID FROM ap') == [('AP:1',)]
+    catalog.close()
+    
+    catalog = CaptureCatalog.discover([str(partitions)], until='2025-07-17')
+    assert catalog.partitions == []
+    assert query(catalog, 'SELECT COUNT(*) FROM probes') == [(0,)]
+    catalog.close()
+
+
+def test_more_partitions_than_attach_limit_are_copied(tmp_path):
+    for day in range(1, 13):
+        write_partition(tmp_path / 'site' / f'2025-07-{day:02d}.db', f'2025-07-{day:02d}',
+                        [(f'AP:{day % 4}', day % 4 + 1, f'net{day % 4}')],
+                        [(f'S{day % 5}', f'AP:{day % 4}', f'probe{day % 3}')])
+    
+    attached = CaptureCatalog.discover([str(tmp_path / 'site' / '2025-07-0*.db')])
+    copied = CaptureCatalog.discover([str(tmp_path / 'site')])
+    assert len(copied.partitions) == 12
+    
+    sql = 'SELECT day, BSSID, station FROM associations ORDER BY day'
+    assert query(copied, sql)[:9] == query(attached, sql)
+    assert copied.get_ap_stats()['total_aps'] == 4
+    assert copied.get_station_stats()['total_stations'] == 5
+    assert copied.materialized and not attached.materialized
+    attached.close()
+    copied.close()
+
+
+def test_catalog_has_no_writers(partitions):
+    catalog = CaptureCatalog.discover([str(partitions)])
+    assert not isinstance(catalog, WiFiDatabase)
+    for name in ('create_tables', 'insert_access_points', 'insert_stations', 'start_session'):
+        assert not hasattr(catalog, name)
+    catalog.close()
@@ -0,0 +1,43 @@
+"""
+End-to-end runs of the scanet command line
+"""
+
+import pytest
+from click.testing import CliRunner
+
+from conftest import SAMPLE_CSV
+from scanet.cli import cli
+
+
+@pytest.mark.parametrize('chart_format', ['svg', 'png'])
+@pytest.mark.parametrize('preview', [False, True])
+def test_analyze_with_chart_cache(tmp_path, cache_home, chart_format, preview):
+    """A cold and a warm chart cache both produce the same report"""
+    args = ['analyze', str(SAMPLE_CSV), '-o', str(tmp_path / 'report'), '-f', 'html',
+            '--charts', chart_format]
+    if preview:
+        args.append('--preview')
+    report = tmp_path / 'report' / f"{SAMPLE_CSV.stem}_{'preview' if preview else 'report'}.html"
+    
+    runner = CliRunner()
+    reports = []
+    for _ in range(2):
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        reports.append(report.read_text(encoding='utf-8'))
+    
+    # A preview stores nothing
+    assert (tmp_path / 'report' / f'{SAMPLE_CSV.stem}.db').exists() != preview
+    
+    entries = list((cache_home / 'scanet' / 'charts').iterdir())
+    assert entries
+    # Reports differ only in their generation time
+    assert _without_timestamp(reports[0]) == _without_timestamp(reports[1])
+    if chart_format == 'svg':
+        assert '<svg' in reports[1]
+    else:
+        assert 'data:image/png;base64,' in reports[1]
+
+
+def _without_timestamp(html):
+    return [line for line in html.splitlines() if 'Generated on' not in line]
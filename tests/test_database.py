@@ -0,0 +1,247 @@
+"""
+Summary tables kept by the bulk insert paths must match a full rebuild, and
+repeated ingestion must update current state in place while keeping history
+"""
+
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+import scanet.database
+from scanet.database import WiFiDatabase
+
+SUMMARY_TABLES = ['agg_totals', 'agg_ap_channel', 'agg_ap_encryption', 'agg_essid_clients',
+                  'agg_essid_station', 'agg_station_probes', 'agg_probe_counts']
+
+AP_COLUMNS = ['BSSID', 'PWR', 'Beacons', 'Data', 'per_s', 'CH', 'MB', 'ENC', 'CIPHER', 'AUTH', 'ESSID']
+STATION_COLUMNS = ['Station_MAC', 'First_time_seen', 'Last_time_seen', 'Power', 'packets',
+                   'BSSID', 'Probed_ESSIDs']
+
+A1, A2, A3, A4, A5 = (f'00:11:22:33:44:0{i}' for i in range(1, 6))
+
+
+def aps(*rows):
+    return pd.DataFrame([(bssid, -40, 10, 1, 0, channel, 54, enc, 'CCMP', 'PSK', essid)
+                         for bssid, channel, enc, essid in rows], columns=AP_COLUMNS)
+
+
+def stations(*rows):
+    return pd.DataFrame([(station, '2025-07-18 10:00:00', last_seen, -50, 10, bssid, probes)
+                         for station, last_seen, bssid, probes in rows], columns=STATION_COLUMNS)
+
+
+def count(db, table):
+    return db.connect().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def snapshot(db):
+    conn = db.connect()
+    return {table: sorted(map(tuple, conn.execute(f'SELECT * FROM {table}')), key=repr)
+            for table in SUMMARY_TABLES}
+
+
+def assert_summaries_current(db):
+    kept = snapshot(db)
+    db.rebuild_aggregates()
+    assert kept == snapshot(db)
+
+
+def bulk_flag(db):
+    return db.connect().execute("SELECT value FROM agg_state WHERE name = 'bulk_write'").fetchone()[0]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = WiFiDatabase(str(tmp_path / 'capture.db'))
+    db.create_tables()
+    yield db
+    db.close()
+
+
+def test_bulk_inserts_keep_summaries_current(db):
+    # A2 appears twice in one batch; the later row replaces the earlier one
+    db.insert_access_points(aps((A1, 6, 'WPA2', 'net1'), (A2, 6, 'WPA2', 'net1'),
+                                (A3, 11, 'OPN', 'net2'), (A2, 1, 'WPA', 'net2'),
+                                (A4, None, 'WPA', '')), batch_size=2)
+    assert_summaries_current(db)
+    
+    db.insert_stations(stations(('S1', '2025-07-18 10:01:00', A1, 'home,work'),
+                                ('S2', '2025-07-18 10:01:00', A2, ''),
+                                ('S3', '2025-07-18 10:01:00', A2, 'work'),
+                                ('S4', '2025-07-18 10:01:00', '(not associated)', 'cafe'),
+                                ('S5', '2025-07-18 10:01:00', A4, '')), batch_size=2)
+    assert_summaries_current(db)
+    
+    # Renamed, moved and re-encrypted APs, one with a NULL ENC written by hand
+    db.connect().execute('UPDATE ap SET ENC = NULL WHERE BSSID = ?', (A3,))
+    db.connect().commit()
+    db.insert_access_points(aps((A1, 1, 'WPA3', 'net3'), (A3, 11, 'WPA2', 'net2'),
+                                (A5, 36, None, 'net1')), batch_size=2)
+    assert_summaries_current(db)
+    
+    db.insert_stations(stations(('S2', '2025-07-18 10:05:00', A5, 'home'),
+                                ('S6', '2025-07-18 10:05:00', A1, 'work,gym'),
+                                ('S6', '2025-07-18 10:06:00', A3, 'cafe')), batch_size=2)
+    assert_summaries_current(db)
+    assert bulk_flag(db) == 0
+
+
+def test_row_triggers_still_cover_ad_hoc_writes(db):
+    db.insert_access_points(aps((A1, 6, 'WPA2', 'net1'), (A2, 11, 'WPA2', 'net2')))
+    db.insert_stations(stations(('S1', '2025-07-18 10:01:00', A1, 'home')))
+    
+    with db.connect() as conn:
+        conn.execute("INSERT INTO sta (station, bssid) VALUES ('S2', ?)", (A2,))
+        conn.execute('UPDATE sta SET bssid = ? WHERE station = ?', (A2, 'S1'))
+        conn.execute('UPDATE ap SET ESSID = ? WHERE BSSID = ?', ('net3', A2))
+        conn.execute("INSERT INTO essid (essid) VALUES ('gym')")
+        conn.execute("INSERT INTO sta_probe (station_id, essid_id) "
+                     "SELECT sta.id, essid.id FROM sta, essid WHERE essid.essid = 'gym'")
+        conn.execute('DELETE FROM ap WHERE BSSID = ?', (A1,))
+    assert_summaries_current(db)
+
+
+def test_failed_bulk_write_rolls_back(db, monkeypatch):
+    db.insert_access_points(aps((A1, 6, 'WPA2', 'net1')))
+    before = snapshot(db)
+    
+    # Fail after the stations and their probes are written
+    monkeypatch.setattr(scanet.database, 'BULK_STATION_ADD',
+                        scanet.database.BULK_STATION_ADD + ['SELECT no_such_function()'])
+    with pytest.raises(sqlite3.OperationalError):
+        db.insert_stations(stations(('S1', '2025-07-18 10:01:00', A1, 'home')))
+    
+    assert bulk_flag(db) == 0
+    assert count(db, 'sta') == 0
+    assert snapshot(db) == before
+    
+    # The row triggers run again for later writes
+    with db.connect() as conn:
+        conn.execute("INSERT INTO sta (station, bssid) VALUES ('S2', ?)", (A1,))
+    assert_summaries_current(db)
+
+
+def test_reingesting_updates_in_place(db):
+    ap_rows = aps((A1, 6, 'WPA2', 'net1'), (A2, 11, 'OPN', 'net2'))
+    station_rows = stations(('S1', '2025-07-18 10:05:00', A1, 'home,work'),
+                            ('S2', '2025-07-18 10:05:00', A2, ''))
+    for _ in range(2):
+        db.insert_access_points(ap_rows)
+        db.insert_stations(station_rows)
+    
+    assert [count(db, table) for table in ('ap', 'sta', 'probes')] == [2, 2, 2]
+    assert_summaries_current(db)
+    
+    # An older sighting only widens first_seen; a newer one replaces the rest
+    older = stations(('S1', '2025-07-18 10:03:00', A2, 'cafe'))
+    older['First_time_seen'] = '2025-07-18 09:00:00'
+    db.insert_stations(older)
+    db.insert_stations(stations(('S2', '2025-07-18 10:09:00', A1, 'gym')))
+    
+    rows = [tuple(row) for row in db.connect().execute(
+        'SELECT station, first_seen, last_seen, bssid FROM sta ORDER BY station'
+    )]
+    assert rows == [('S1', '2025-07-18 09:00:00', '2025-07-18 10:05:00', A1),
+                    ('S2', '2025-07-18 10:00:00', '2025-07-18 10:09:00', A1)]
+    assert count(db, 'probes') == 4
+    assert_summaries_current(db)
+
+
+def test_signal_history_per_session(db):
+    first = db.start_session('a.csv', 'hash-a')
+    db.insert_access_points(aps((A1, 6, 'WPA2', 'net1')), session_id=first)
+    
+    moved = aps((A1, 11, 'WPA2', 'net1'))
+    moved['PWR'] = -70
+    second = db.start_session('b.csv', 'hash-b')
+    db.insert_access_points(moved, session_id=second)
+    
+    # The same content maps back to its session, which is not recorded twice
+    assert db.start_session('copy-of-a.csv', 'hash-a') == first
+    db.insert_access_points(aps((A1, 6, 'WPA2', 'net1')), session_id=first)
+    
+    history = [(entry['session'], entry['pwr'], entry['channel']) for entry in db.get_signal_history(A1)]
+    assert history == [(first, -40, 6), (second, -70, 11)]
+    assert count(db, 'ap') == 1
+
+
+def test_in_memory_database_round_trips_through_a_file(tmp_path):
+    saved = tmp_path / 'saved.db'
+    memory = WiFiDatabase(':memory:')
+    memory.create_tables()
+    memory.insert_access_points(aps((A1, 6, 'WPA2', 'net1'), (A2, 11, 'OPN', 'net2')))
+    memory.insert_stations(stations(('S1', '2025-07-18 10:01:00', A1, 'home,work')))
+    
+    # Every thread's connection sees the same in-memory database
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(count(memory, 'ap')))
+    thread.start()
+    thread.join()
+    assert seen == [2]
+    
+    # Another in-memory instance is a separate database
+    other = WiFiDatabase(':memory:')
+    other.create_tables()
+    assert count(other, 'ap') == 0
+    other.close()
+    
+    memory.save_to(str(saved))
+    expected = snapshot(memory)
+    memory.close()
+    
+    on_disk = WiFiDatabase(str(saved))
+    assert [count(on_disk, table) for table in ('ap', 'sta', 'probes')] == [2, 1, 2]
+    assert snapshot(on_disk) == expected
+    on_disk.close()
+    
+    reloaded = WiFiDatabase(':memory:')
+    reloaded.load_from(str(saved))
+    assert snapshot(reloaded) == expected
+    reloaded.insert_stations(stations(('S2', '2025-07-18 10:02:00', A2, '')))
+    assert_summaries_current(reloaded)
+    reloaded.close()
+
+
+@pytest.mark.parametrize('journal_mode', ['DELETE', 'WAL'])
+def test_read_only_use_leaves_the_file_alone(tmp_path, journal_mode):
+    path = tmp_path / 'capture.db'
+    writer = WiFiDatabase(str(path), pragmas={'journal_mode': journal_mode})
+    writer.create_tables()
+    writer.insert_access_points(aps((A1, 6, 'WPA2', 'net1')))
+    writer.close()
+    before = path.read_bytes()
+    
+    reader = WiFiDatabase(str(path), read_only=True)
+    _, rows = reader.stream_query('SELECT BSSID FROM ap')
+    assert [row[0] for row in rows] == [A1]
+    with pytest.raises(sqlite3.OperationalError):
+        reader.connect().execute('DELETE FROM ap')
+    reader.close()
+    
+    assert path.read_bytes() == before
+    assert [p.name for p in tmp_path.iterdir()] == ['capture.db']
+
+
+def test_search_without_the_essid_dictionary(tmp_path):
+    # The tables of a database written before the ESSID dictionary and summaries
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.executescript(f'''
+        CREATE TABLE ap (id INTEGER PRIMARY KEY, BSSID TEXT, ESSID TEXT);
+        CREATE TABLE sta (id INTEGER PRIMARY KEY, station TEXT, bssid TEXT);
+        CREATE TABLE probes (id INTEGER PRIMARY KEY, station_id INTEGER, probe TEXT);
+        INSERT INTO ap (BSSID, ESSID) VALUES ('{A1}', 'Cafe Guest'), ('{A2}', 'Cafe Guest'), ('{A3}', 'home');
+        INSERT INTO sta (station, bssid) VALUES ('S1', '{A1}'), ('S2', '{A2}');
+        INSERT INTO probes (station_id, probe) VALUES (1, 'home'), (2, 'cafe-5g'), (2, 'cafe-5g');
+    ''')
+    conn.commit()
+    conn.close()
+    
+    db = WiFiDatabase(str(path), read_only=True)
+    assert db.search_essids('CAFE') == [
+        {'essid': 'Cafe Guest', 'aps': 2, 'clients': 2, 'probes': 0},
+        {'essid': 'cafe-5g', 'aps': 0, 'clients': 0, 'probes': 1}]
+    assert db.search_essids('ho', prefix=True) == [{'essid': 'home', 'aps': 1, 'clients': 0, 'probes': 1}]
+    db.close()
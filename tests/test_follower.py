@@ -0,0 +1,84 @@
+"""
+Follow mode must store new and changed rows only, and keep one copy of each
+station and its probes across rewrites of the capture file
+"""
+
+import itertools
+import os
+import sqlite3
+
+import pytest
+
+from conftest import SAMPLE_CSV
+from scanet.database import WiFiDatabase
+from scanet.follower import CaptureFollower
+
+_mtimes = itertools.count(1_700_000_000)
+
+
+def rewrite(path, text):
+    """Write the capture with an mtime that always moves forward"""
+    path.write_text(text, encoding='utf-8')
+    mtime = next(_mtimes)
+    os.utime(path, (mtime, mtime))
+
+
+def query(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def follower(tmp_path):
+    capture = tmp_path / 'live.csv'
+    rewrite(capture, SAMPLE_CSV.read_text(encoding='utf-8'))
+    
+    db = WiFiDatabase(str(tmp_path / 'live.db'))
+    db.create_tables()
+    yield CaptureFollower(capture, db)
+    db.close()
+
+
+def test_unchanged_file_is_skipped(follower):
+    assert follower.refresh() == (7, 7)
+    assert follower.refresh() == (0, 0)
+    
+    # Rewritten with the same content: the file is read but no row changed
+    rewrite(follower.csv_file, follower.csv_file.read_text(encoding='utf-8'))
+    assert follower.refresh() == (0, 0)
+
+
+def test_only_changed_rows_are_written(follower):
+    follower.refresh()
+    db_path = follower.db.db_path
+    
+    text = follower.csv_file.read_text(encoding='utf-8')
+    text = text.replace('OldRouter', 'NewRouter')
+    text = text.replace('2025-07-18 10:07:45, -45,  200', '2025-07-18 10:12:00, -44,  260')
+    rewrite(follower.csv_file, text)
+    
+    assert follower.refresh() == (1, 1)
+    assert query(db_path, "SELECT ESSID FROM ap WHERE BSSID = '33:44:55:66:77:88'") == [('NewRouter',)]
+    
+    rows = query(db_path, '''
+        SELECT sta.last_seen, sta.packets, COUNT(probes.id) FROM sta
+        LEFT JOIN probes ON probes.station_id = sta.id
+        WHERE sta.station = 'FF:EE:DD:CC:BB:AA'
+        GROUP BY sta.id
+    ''')
+    assert rows == [('2025-07-18 10:12:00', 260, 1)]
+    assert query(db_path, 'SELECT COUNT(*), COUNT(DISTINCT station) FROM sta') == [(7, 7)]
+
+
+def test_missing_file_is_retried(follower):
+    follower.refresh()
+    text = follower.csv_file.read_text(encoding='utf-8')
+    
+    follower.csv_file.unlink()
+    assert follower.refresh() == (0, 0)
+    
+    rewrite(follower.csv_file, text.replace('OldRouter', 'NewRouter'))
+    assert follower.refresh() == (1, 0)
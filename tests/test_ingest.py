@@ -0,0 +1,93 @@
+"""
+Parallel ingestion must write captures in input order, stream batches from
+the workers and skip what an earlier ingest already wrote
+"""
+
+import queue
+
+import pytest
+
+from conftest import SAMPLE_CSV
+from scanet.database import WiFiDatabase
+from scanet.ingest import ParallelIngestor, _parse_capture
+from scanet.cache import content_hash
+
+
+def count(db, table):
+    return db.connect().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = WiFiDatabase(str(tmp_path / 'ingest.db'))
+    db.create_tables()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def captures(tmp_path):
+    # Every capture sees the sample devices plus one AP of its own
+    sample = SAMPLE_CSV.read_text(encoding='utf-8')
+    paths = []
+    for index in range(6):
+        own_ap = f'02:00:00:00:00:{index:02d}, -50, 10, 1, 0, 6, 54, WPA2, CCMP, PSK, own{index}\n'
+        path = tmp_path / 'captures' / f'{5 - index}.csv'
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(sample.replace('\n\n', '\n' + own_ap + '\n', 1), encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def test_captures_are_written_in_input_order(db, captures):
+    reported = []
+    ingestor = ParallelIngestor(db, workers=3, batch_size=2)
+    
+    totals = ingestor.ingest(captures, lambda delta: reported.append(delta.csv_file))
+    assert reported == captures
+    assert totals == {'files': 6, 'skipped': 0, 'aps': 6 * 8, 'stations': 6 * 7}
+    assert count(db, 'ap') == 7 + 6
+    assert count(db, 'sta') == 7
+    
+    reported.clear()
+    totals = ingestor.ingest(captures, lambda delta: reported.append(delta.csv_file))
+    assert reported == captures
+    assert totals == {'files': 6, 'skipped': 6, 'aps': 0, 'stations': 0}
+
+
+def test_worker_streams_batches_between_hash_and_end(tmp_path):
+    batches = queue.Queue()
+    digest = _parse_capture(SAMPLE_CSV, 4, None, batches)
+    
+    items = []
+    while not batches.empty():
+        items.append(batches.get())
+    assert items[0] == digest == content_hash(SAMPLE_CSV)
+    assert items[-1] is None
+    assert [(section, len(batch)) for section, batch in items[1:-1]] == [
+        ('ap', 4), ('ap', 3), ('station', 4), ('station', 3)]
+    
+    # A capture with a known hash is not parsed
+    _parse_capture(SAMPLE_CSV, 4, digest, batches)
+    assert [batches.get(), batches.get()] == [digest, None]
+
+
+def test_relative_and_absolute_paths_are_one_capture(db, captures, monkeypatch):
+    monkeypatch.chdir(captures[0].parent)
+    ingestor = ParallelIngestor(db, workers=1)
+    ingestor.ingest([captures[0].relative_to(captures[0].parent)])
+    rows = count(db, 'capture_row')
+    
+    assert ingestor.ingest([captures[0]])['skipped'] == 1
+    assert (count(db, 'capture_file'), count(db, 'capture_row')) == (1, rows)
+
+
+def test_only_changed_rows_are_rewritten(db, captures):
+    ingestor = ParallelIngestor(db, workers=1, batch_size=2)
+    ingestor.ingest(captures[:1])
+    
+    text = captures[0].read_text(encoding='utf-8')
+    captures[0].write_text(text.replace('-45,  1200', '-47,  1250'), encoding='utf-8')
+    totals = ingestor.ingest(captures[:1])
+    assert (totals['aps'], totals['stations']) == (1, 0)
+    assert db.connect().execute("SELECT PWR FROM ap WHERE BSSID = '00:11:22:33:44:55'").fetchone()[0] == -47
@@ -0,0 +1,115 @@
+"""
+Tokenizer regression: the str.split fast path must split every line exactly
+as the original per-character _parse_csv_line did
+"""
+
+import random
+
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_CSV
+from scanet.parser import AirodumpParser, expand_compact
+
+AP_HEADER = 'BSSID, PWR, Beacons, #Data, #/s, CH, MB, ENC, CIPHER, AUTH, ESSID'
+STATION_HEADER = 'Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs'
+
+# Separators, quotes, whitespace strip() removes, control and non-ASCII characters
+ALPHABET = ',,,""  \t\x0b\x1c\x00ab1-é'
+
+
+def fuzzed_lines(count, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(ALPHABET) for _ in range(rng.randrange(40))) for _ in range(count)]
+
+
+def legacy_parse(parser, csv_file):
+    """The whole-file parse the streaming parser replaced, built on _parse_csv_line"""
+    with open(csv_file, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    
+    frames = {'ap': pd.DataFrame(), 'station': pd.DataFrame()}
+    for section in content.split('\n\n'):
+        if section.strip().startswith('BSSID'):
+            name, columns, clean = 'ap', parser.ap_columns, parser._clean_ap_data
+        elif section.strip().startswith('Station MAC'):
+            name, columns, clean = 'station', parser.station_columns, parser._clean_station_data
+        else:
+            continue
+        
+        lines = [line.strip() for line in section.split('\n') if line.strip()]
+        rows = [parts[:len(columns)] for parts in map(parser._parse_csv_line, lines[1:])
+                if len(parts) >= len(columns)]
+        if rows:
+            frames[name] = clean(pd.DataFrame(rows, columns=columns))
+    
+    return frames['ap'], frames['station']
+
+
+def assert_parses_like_legacy(csv_file):
+    parser = AirodumpParser()
+    ap_df, sta_df = parser.parse(csv_file)
+    expected_ap, expected_sta = legacy_parse(parser, csv_file)
+    
+    pd.testing.assert_frame_equal(ap_df, expected_ap)
+    pd.testing.assert_frame_equal(sta_df, expected_sta)
+
+
+@pytest.mark.parametrize('n_columns', [1, 2, 7, 11])
+def test_tokenize_matches_parse_csv_line(n_columns):
+    parser = AirodumpParser()
+    
+    for line in fuzzed_lines(3000, seed=n_columns):
+        line = line.strip()
+        expected = parser._parse_csv_line(line)
+        rows = [expected[:n_columns]] if len(expected) >= n_columns else []
+        assert parser._tokenize_lines([line], n_columns) == rows, repr(line)
+
+
+def test_split_quoted_line_matches_parse_csv_line():
+    parser = AirodumpParser()
+    
+    for line in fuzzed_lines(3000):
+        assert parser._split_quoted_line(line) == parser._parse_csv_line(line), repr(line)
+
+
+def test_sample_capture():
+    assert_parses_like_legacy(SAMPLE_CSV)
+
+
+def test_compact_round_trip(tmp_path):
+    """expand_compact restores what a plain parse returns, values and all"""
+    capture = tmp_path / 'capture.csv'
+    capture.write_text('\n'.join([
+        '', AP_HEADER,
+        '00:11:22:33:44:55, -45, 1200, 300, 1, 6, 54, WPA2, CCMP, PSK, "Home"',
+        'AA:BB:CC:DD:EE:FF, , 70000, 0, 0, -1, 54, OPN, , , ',
+        '', STATION_HEADER,
+        'FF:EE:DD:CC:BB:AA, 2025-07-18 10:01:30, 2025-07-18 10:07:45, -45, 200, 00:11:22:33:44:55, "Home","Cafe"',
+        '66:77:88:99:AA:BB, 2025-07-18 10:00:05, 2025-07-18 10:05:15, , 5000000000, (not associated), ',
+        '',
+    ]), encoding='utf-8')
+    
+    for csv_file in (SAMPLE_CSV, capture):
+        plain = AirodumpParser().parse(csv_file)
+        compact = AirodumpParser(compact=True).parse(csv_file)
+        for expected, df in zip(plain, compact):
+            pd.testing.assert_frame_equal(expand_compact(df), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('blank', ['', '   ', '\t'])
+def test_line_endings_and_blank_lines(tmp_path, newline, blank):
+    """Fuzzed data lines under LF and CRLF, with empty or whitespace-only blank lines"""
+    ap_lines = [f'00:11:22:33:44:55, -4{i % 10}, 12, 3, 0, {i % 14}, 54, WPA2, CCMP, PSK, {line}'
+                for i, line in enumerate(fuzzed_lines(200, seed=1))]
+    station_lines = [f'66:77:88:99:AA:BB, 2025-07-18 10:00:05, 2025-07-18 10:05:15, -50, 10, '
+                     f'(not associated), {line}' for line in fuzzed_lines(200, seed=2)]
+    lines = ['', AP_HEADER] + ap_lines[:100] + [blank] + ap_lines[100:] + \
+            ['', STATION_HEADER] + station_lines[:100] + [blank] + station_lines[100:] + ['']
+    
+    capture = tmp_path / 'capture.csv'
+    with open(capture, 'w', encoding='utf-8', newline='') as f:
+        f.write(newline.join(lines))
+    
+    assert_parses_like_legacy(capture)
@@ -0,0 +1,44 @@
+"""
+A preview must report what an ingest of the same capture would, without
+writing anything to disk
+"""
+
+import pytest
+
+from conftest import SAMPLE_CSV
+from scanet.database import WiFiDatabase
+from scanet.parser import AirodumpParser
+from scanet.preview import CapturePreview
+
+
+def unordered(stats):
+    """Statistics with their lists sorted, since ties may come in any order"""
+    return {name: sorted(value, key=repr) if isinstance(value, list) else value for name, value in stats.items()}
+
+
+@pytest.fixture
+def ingested():
+    db = WiFiDatabase(':memory:')
+    db.create_tables()
+    for section, batch in AirodumpParser().iter_batches(SAMPLE_CSV):
+        if section == 'ap':
+            db.insert_access_points(batch)
+        else:
+            db.insert_stations(batch)
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_preview_matches_ingest(ingested, compact):
+    preview = CapturePreview(AirodumpParser(compact=compact).iter_batches(SAMPLE_CSV, batch_size=3))
+    
+    assert unordered(preview.get_ap_stats()) == unordered(ingested.get_ap_stats())
+    assert unordered(preview.get_station_stats()) == unordered(ingested.get_station_stats())
+    assert sorted(map(tuple, preview.get_channel_activity())) == sorted(map(tuple, ingested.get_channel_activity()))
+    
+    sql = 'SELECT * FROM sta LEFT JOIN ap ON sta.bssid = ap.BSSID ORDER BY station'
+    columns = 'station, first_seen, last_seen, power, packets, sta.bssid, probed_essids, ESSID, PWR, CH'
+    assert [tuple(row) for row in preview.execute_query(sql.replace('*', columns))] == \
+        [tuple(row) for row in ingested.execute_query(sql.replace('*', columns))]
+    preview.close()
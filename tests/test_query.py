@@ -0,0 +1,76 @@
+"""
+stream_query must fetch lazily, honour --limit and bound only the time SQLite
+spends on the query
+"""
+
+import io
+import json
+import time
+
+import pytest
+
+from scanet.database import WiFiDatabase
+from scanet.export import write_rows
+
+COUNTER = 'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {stop}) SELECT i FROM n'
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = WiFiDatabase(str(tmp_path / 'query.db'))
+    db.QUERY_FETCH_SIZE = 10
+    yield db
+    db.close()
+
+
+def test_rows_are_fetched_lazily_up_to_the_limit(db):
+    columns, rows = db.stream_query(COUNTER.format(stop=1000), limit=25)
+    assert columns == ['i']
+    
+    # Nothing past the first fetch is read until it is consumed
+    first = next(rows)
+    assert first[0] == 1
+    assert [row[0] for row in rows] == list(range(2, 26))
+
+
+def test_unbounded_query_times_out(db):
+    # The sort runs to completion before the first row can be returned
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        db.stream_query(COUNTER.format(stop=10 ** 12) + ' ORDER BY i DESC', timeout=0.2)
+    assert time.monotonic() - started < 5
+    
+    # Without the sort, rows stream until the time spent fetching runs out
+    _, rows = db.stream_query(COUNTER.format(stop=10 ** 12), timeout=0.2)
+    with pytest.raises(TimeoutError):
+        for _ in rows:
+            pass
+    
+    # The connection is usable again afterwards, without the handler
+    _, rows = db.stream_query(COUNTER.format(stop=3))
+    assert [row[0] for row in rows] == [1, 2, 3]
+
+
+def test_slow_consumer_does_not_count_against_the_timeout(db):
+    _, rows = db.stream_query(COUNTER.format(stop=30), timeout=0.05)
+    
+    values = []
+    for row in rows:
+        values.append(row[0])
+        time.sleep(0.01)
+    assert values == list(range(1, 31))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'json', 'ndjson'])
+def test_formats_round_trip(db, fmt):
+    columns, rows = db.stream_query("SELECT 1 AS id, 'Café, \"Home\"' AS essid, NULL AS enc")
+    stream = io.StringIO()
+    assert write_rows(stream, columns, rows, fmt) == 1
+    
+    text = stream.getvalue()
+    if fmt == 'csv':
+        assert text.splitlines() == ['id,essid,enc', '1,"Café, ""Home""",']
+    elif fmt == 'json':
+        assert json.loads(text) == [{'id': 1, 'essid': 'Café, "Home"', 'enc': None}]
+    else:
+        assert [json.loads(line) for line in text.splitlines()] == [{'id': 1, 'essid': 'Café, "Home"', 'enc': None}]
@@ -0,0 +1,52 @@
+"""
+Channel interference must weight APs by signal and airtime, treat
+airodump-ng's missing readings as the noise floor and be computed once per
+database state
+"""
+
+import numpy as np
+
+from scanet.database import WiFiDatabase
+from scanet.spectrum import NOISE_FLOOR_DBM, analyze_channels, ap_weights, channel_interference
+
+
+def test_missing_signal_counts_as_noise_floor():
+    power = np.array([-1, 0, np.nan, -100, -120, -50], dtype=float)
+    weights = ap_weights(power, np.zeros(6), np.full(6, 54.0))
+    
+    floor = weights[3]
+    assert floor == 10 ** (NOISE_FLOOR_DBM / 10) * 0.03
+    assert np.all(weights[:5] == floor)
+    assert weights[5] > floor * 1e4
+
+
+def test_co_channel_share():
+    # Two APs on channel 6 and one on channel 1, none with a signal reading on 1
+    result = channel_interference([(6, -40, 0, 54), (6, -40, 0, 54), (1, -1, 0, 54)])
+    assert result['receive'] == [1, 6, 11]
+    assert result['aps'] == [1, 2, 0]
+    
+    co_channel = dict(zip(result['receive'], result['co_channel']))
+    assert co_channel[6] == 1.0
+    assert co_channel[1] < 0.01
+
+
+def test_analysis_is_computed_once_per_data_state(monkeypatch):
+    db = WiFiDatabase(':memory:')
+    db.create_tables()
+    with db.connect() as conn:
+        conn.execute("INSERT INTO ap (BSSID, PWR, per_s, CH, MB) VALUES ('A1', -40, 0, 6, 54)")
+    
+    calls = []
+    get_channel_activity = db.get_channel_activity
+    monkeypatch.setattr(db, 'get_channel_activity', lambda: calls.append(1) or get_channel_activity())
+    
+    first = analyze_channels(db)
+    assert analyze_channels(db) is first
+    assert len(calls) == 1
+    
+    with db.connect() as conn:
+        conn.execute("INSERT INTO ap (BSSID, PWR, per_s, CH, MB) VALUES ('A2', -40, 0, 11, 54)")
+    assert analyze_channels(db)['transmit'] == [6, 11]
+    assert len(calls) == 2
+    db.close()
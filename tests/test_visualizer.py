@@ -0,0 +1,63 @@
+"""
+Topology charts must keep distinct devices apart and stay bounded in size on
+large captures
+"""
+
+import base64
+
+import matplotlib.pyplot as plt
+import pytest
+
+from scanet import visualizer
+from scanet.visualizer import render_network_graph
+
+
+def drawn_points(ax):
+    """Count the scatter points drawn for each legend label"""
+    return {collection.get_label(): len(collection.get_offsets()) for collection in ax.collections
+            if collection.get_label() and not collection.get_label().startswith('_')}
+
+
+@pytest.fixture
+def ax():
+    fig, ax = plt.subplots()
+    yield ax
+    plt.close(fig)
+
+
+def test_same_essid_and_oui_stay_separate_nodes(ax):
+    # Two APs broadcasting one ESSID, and stations sharing an OUI prefix
+    edges = [('00:11:22:33:44:01', 'AA:BB:CC:00:00:01'), ('00:11:22:33:44:02', 'AA:BB:CC:00:00:02'),
+             ('00:11:22:33:44:02', 'AA:BB:CC:00:00:03')]
+    names = {'00:11:22:33:44:01': 'Home', '00:11:22:33:44:02': 'Home'}
+    
+    visualizer._draw_spring_topology(ax, edges, names)
+    assert drawn_points(ax) == {'Access Points': 2, 'Stations': 3}
+
+
+def test_grouped_layout_is_bounded(ax):
+    # 200 APs with 50 own stations each, and 1000 stations roaming between APs
+    edges = [(f'AP{ap:03d}', f'S{ap:03d}-{station}') for ap in range(200) for station in range(50)]
+    edges += [(f'AP{station % 20:03d}', f'R{station}') for station in range(1000)]
+    edges += [(f'AP{station % 20 + 20:03d}', f'R{station}') for station in range(1000)]
+    names = {f'AP{ap:03d}': f'Network {ap}' for ap in range(200)}
+    
+    title = visualizer._draw_grouped_topology(ax, sorted(edges), names)
+    
+    points = drawn_points(ax)
+    assert points['Access Points'] == visualizer.TOPOLOGY_MAX_APS
+    assert points['Grouped stations'] == visualizer.TOPOLOGY_MAX_APS
+    assert points['Stations'] == visualizer.TOPOLOGY_MAX_SHARED
+    assert f'top {visualizer.TOPOLOGY_MAX_APS} of 200 Access Points, 11000 Stations' in title
+    assert f'({1000 - visualizer.TOPOLOGY_MAX_SHARED} more stations' in title
+
+
+def test_large_graph_renders_without_spring_layout(monkeypatch):
+    def spring_layout(*args, **kwargs):
+        raise AssertionError('spring layout used for a large graph')
+    monkeypatch.setattr(visualizer.nx, 'spring_layout', spring_layout)
+    
+    graph_data = [{'ap': f'AP{station % 30}', 'ap_name': '', 'station': f'S{station}'}
+                  for station in range(visualizer.SPRING_LAYOUT_MAX_NODES * 2)]
+    image = base64.b64decode(render_network_graph(graph_data))
+    assert image.startswith(b'\x89PNG')